@@ -126,6 +126,7 @@ class APIClient:
         strategy_model: str,
         answer_model: str,
         final_answer_model: str,
+        search_type: str = "vector",
     ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Ask the knowledge base a question (simple, non-streaming)."""
         data = {
@@ -133,6 +134,7 @@ class APIClient:
             "strategy_model": strategy_model,
             "answer_model": answer_model,
             "final_answer_model": final_answer_model,
+            "search_type": search_type,
         }
         # Use configured timeout for long-running ask operations
         return self._make_request(
@@ -2,6 +2,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -9,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from api.auth import PasswordAuthMiddleware
+from api.pagination import NEXT_CURSOR_HEADER
 from api.routers import (
     auth,
     chat,
@@ -31,6 +33,13 @@ from api.routers import (
 )
 from api.routers import commands as commands_router
 from open_notebook.database.async_migrate import AsyncMigrationManager
+from open_notebook.database.repository import close_db_pool, init_db_pool
+from open_notebook.database.vector_index import warm_vector_indexes
+from open_notebook.database.vector_store import close_vector_store
+from open_notebook.graphs.checkpointer import (
+    close_checkpointer,
+    run_checkpoint_maintenance,
+)
 
 # Import commands to register them in the API process
 try:
@@ -44,12 +53,14 @@ except Exception as e:
 async def lifespan(app: FastAPI):
     """
     Lifespan event handler for the FastAPI application.
-    Runs database migrations automatically on startup.
+    Opens the database connection pool and runs database migrations
+    automatically on startup.
     """
     # Startup: Run database migrations
     logger.info("Starting API initialization...")
 
     try:
+        await init_db_pool()
         migration_manager = AsyncMigrationManager()
         current_version = await migration_manager.get_current_version()
         logger.info(f"Current database version: {current_version}")
@@ -69,10 +80,20 @@ async def lifespan(app: FastAPI):
 
     logger.success("API initialization completed successfully")
 
+    # Periodically prune and VACUUM the chat checkpoint file
+    checkpoint_maintenance = asyncio.create_task(run_checkpoint_maintenance())
+    # Build the vector indexes now rather than on the first search
+    vector_index_warmup = asyncio.create_task(warm_vector_indexes())
+
     # Yield control to the application
     yield
 
-    # Shutdown: cleanup if needed
+    # Shutdown: snapshot the local vector store, release pooled connections
+    checkpoint_maintenance.cancel()
+    vector_index_warmup.cancel()
+    await close_vector_store()
+    await close_checkpointer()
+    await close_db_pool()
     logger.info("API shutdown complete")
 
 
@@ -94,6 +115,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination cursor of the list endpoints
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
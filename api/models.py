@@ -31,13 +31,21 @@ class NotebookResponse(BaseModel):
 # Search models
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query")
-    type: Literal["text", "vector"] = Field("text", description="Search type")
+    type: Literal["text", "vector", "hybrid"] = Field(
+        "text", description="Search type"
+    )
     limit: int = Field(100, description="Maximum number of results", le=1000)
     search_sources: bool = Field(True, description="Include sources in search")
     search_notes: bool = Field(True, description="Include notes in search")
     minimum_score: float = Field(
         0.2, description="Minimum score for vector search", ge=0, le=1
     )
+    text_weight: Optional[float] = Field(
+        None, description="Weight of text search results in hybrid search", ge=0
+    )
+    vector_weight: Optional[float] = Field(
+        None, description="Weight of vector search results in hybrid search", ge=0
+    )
 
 
 class SearchResponse(BaseModel):
@@ -48,9 +56,21 @@ class SearchResponse(BaseModel):
 
 class AskRequest(BaseModel):
     question: str = Field(..., description="Question to ask the knowledge base")
-    strategy_model: str = Field(..., description="Model ID for query strategy")
-    answer_model: str = Field(..., description="Model ID for individual answers")
+    strategy_model: Optional[str] = Field(
+        None, description="Model ID for query strategy (required in full mode)"
+    )
+    answer_model: Optional[str] = Field(
+        None, description="Model ID for individual answers (required in full mode)"
+    )
     final_answer_model: str = Field(..., description="Model ID for final answer")
+    search_type: Literal["vector", "hybrid"] = Field(
+        "vector", description="Search used to gather context for each query"
+    )
+    mode: Literal["full", "fast"] = Field(
+        "full",
+        description="full: strategy, one answer per search, final answer; "
+        "fast: one search for the question and a single answer",
+    )
 
 
 class AskResponse(BaseModel):
@@ -97,6 +117,15 @@ class ProviderAvailabilityResponse(BaseModel):
     )
 
 
+class ModelCacheStats(BaseModel):
+    ttl: float = Field(..., description="Seconds cached entries are reused")
+    defaults: Dict[str, int] = Field(..., description="Default models record hits/misses")
+    records: Dict[str, int] = Field(..., description="Model record hits/misses/size")
+    instances: Dict[str, int] = Field(
+        ..., description="Provider client hits/misses/size"
+    )
+
+
 # Transformations API models
 class TransformationCreate(BaseModel):
     name: str = Field(..., description="Transformation name")
@@ -219,6 +248,10 @@ class RebuildRequest(BaseModel):
     include_sources: bool = Field(True, description="Include sources in rebuild")
     include_notes: bool = Field(True, description="Include notes in rebuild")
     include_insights: bool = Field(True, description="Include insights in rebuild")
+    resume: bool = Field(
+        True,
+        description="Resume an unfinished rebuild with the same mode, flags and embedding model",
+    )
 
 
 class RebuildResponse(BaseModel):
@@ -231,6 +264,12 @@ class RebuildProgress(BaseModel):
     processed: int = Field(..., description="Number of items processed")
     total: int = Field(..., description="Total items to process")
     percentage: float = Field(..., description="Progress percentage")
+    items_per_second: Optional[float] = Field(
+        None, description="Processing rate of the current run"
+    )
+    eta_seconds: Optional[float] = Field(
+        None, description="Estimated seconds until the rebuild completes"
+    )
 
 
 class RebuildStats(BaseModel):
@@ -250,6 +289,32 @@ class RebuildStatusResponse(BaseModel):
     error_message: Optional[str] = None
 
 
+class EmbeddingCacheStats(BaseModel):
+    enabled: bool = Field(..., description="Whether the embedding cache is enabled")
+    hits: int = Field(..., description="Cache hits in this process")
+    misses: int = Field(..., description="Cache misses in this process")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+    writes: int = Field(..., description="Vectors written in this process")
+    evictions: int = Field(..., description="Entries evicted by this process")
+    entries: int = Field(..., description="Entries in the cache file")
+    size_bytes: int = Field(..., description="Size of the cached vectors")
+    max_bytes: int = Field(..., description="Size that triggers eviction")
+
+
+class ChatCheckpointStats(BaseModel):
+    threads: int = Field(..., description="Chat threads with checkpoints")
+    checkpoints: int = Field(..., description="Checkpoints stored")
+    keep_last: int = Field(..., description="Checkpoints kept per thread")
+    reads: Dict[str, float] = Field(..., description="Checkpoint read count/avg_ms/max_ms")
+    writes: Dict[str, float] = Field(..., description="Checkpoint write count/avg_ms/max_ms")
+    pruned: int = Field(..., description="Checkpoints pruned by this process")
+    vacuums: int = Field(..., description="VACUUMs run by this process")
+    last_maintenance: Optional[float] = Field(
+        None, description="Unix time of the last maintenance run"
+    )
+    size_bytes: int = Field(..., description="Size of the checkpoint file")
+    wal_bytes: int = Field(..., description="Size of its write-ahead log")
+
 # Settings API models
 class SettingsResponse(BaseModel):
     default_content_processing_engine_doc: Optional[str] = None
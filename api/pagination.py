@@ -0,0 +1,133 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+A page is read with `WHERE (sort, id) after the cursor ORDER BY sort, id
+LIMIT n + 1` instead of `LIMIT n START offset`, so every page costs the
+same however deep the client has scrolled. The cursor is an opaque token
+holding the sort value and id of the last row of the previous page; it is
+returned in the X-Next-Cursor header when there are more rows (the list
+bodies stay plain arrays).
+
+Datetimes are stored with nanosecond precision but reach Python cut to
+microseconds, so queries select the sort field as a string too (Keyset.select)
+and the cursor carries that exact value, cast back in the condition.
+"""
+
+import base64
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+from open_notebook.database.repository import ensure_record_id
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Exact (string) sort value selected alongside each row
+CURSOR_FIELD = "_cursor"
+
+
+def encode_cursor(value: Any, id: str, exact: Optional[str] = None) -> str:
+    """Cursor after (value, id); datetimes are stored as their exact database string."""
+    if isinstance(value, datetime):
+        payload = {"d": exact or value.isoformat(), "id": str(id)}
+    else:
+        payload = {"v": value, "id": str(id)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str, bool]:
+    """
+    The (sort value, id, is_datetime) a cursor points after; 400 if it is
+    malformed. Datetimes are returned as strings, to be cast in the query.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if "d" in payload:
+            value = str(payload["d"])
+            # Validate it (fromisoformat takes at most microseconds)
+            datetime.fromisoformat(re.sub(r"(\.\d{6})\d+", r"\1", value))
+            return value, str(payload["id"]), True
+        return payload["v"], str(payload["id"]), False
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@dataclass
+class Keyset:
+    """Order, filter and limit clauses for one page sorted by (sort_field, id)."""
+
+    sort_field: str
+    descending: bool = True
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    vars: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._cursor_is_datetime = False
+        if self.cursor:
+            value, id, self._cursor_is_datetime = decode_cursor(self.cursor)
+            self.vars.update(cursor_value=value, cursor_id=ensure_record_id(id))
+        if self.limit is not None:
+            # One extra row tells whether there is a next page
+            self.vars["page_limit"] = self.limit + 1
+
+    @property
+    def condition(self) -> Optional[str]:
+        """The WHERE condition for rows after the cursor (None on the first page)."""
+        if not self.cursor:
+            return None
+        op = "<" if self.descending else ">"
+        value = "<datetime>$cursor_value" if self._cursor_is_datetime else "$cursor_value"
+        return (
+            f"({self.sort_field} {op} {value} OR "
+            f"({self.sort_field} = {value} AND id {op} $cursor_id))"
+        )
+
+    @property
+    def select(self) -> str:
+        """Selection of the exact sort value the next cursor is built from."""
+        return f"<string>{self.sort_field} AS {CURSOR_FIELD}"
+
+    def where(self, *conditions: Optional[str]) -> str:
+        """WHERE clause joining the given conditions with the cursor's."""
+        parts = [c for c in (*conditions, self.condition) if c]
+        return f"WHERE {' AND '.join(parts)}" if parts else ""
+
+    @property
+    def order(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        return f"ORDER BY {self.sort_field} {direction}, id {direction}"
+
+    @property
+    def limit_clause(self) -> str:
+        return "LIMIT $page_limit" if self.limit is not None else ""
+
+    def page(self, rows: List[Dict[str, Any]], response: Response) -> List[Dict[str, Any]]:
+        """The page's rows; sets the next cursor header when more rows follow."""
+        if self.limit is not None and len(rows) > self.limit:
+            rows = rows[: self.limit]
+            last = rows[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                last.get(self.sort_field), last["id"], last.get(CURSOR_FIELD)
+            )
+        for row in rows:
+            row.pop(CURSOR_FIELD, None)
+        return rows
+
+
+def parse_order_by(order_by: str, allowed: Sequence[str]) -> Tuple[str, bool]:
+    """(field, descending) from "field [asc|desc]"; 400 for anything else."""
+    parts = order_by.split()
+    direction = parts[1].lower() if len(parts) == 2 else "asc"
+    if not 1 <= len(parts) <= 2 or parts[0] not in allowed or direction not in (
+        "asc",
+        "desc",
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"order_by must be one of {', '.join(allowed)} followed by asc or desc",
+        )
+    return parts[0], direction == "desc"
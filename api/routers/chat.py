@@ -1,17 +1,24 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from api.models import ChatCheckpointStats
 from open_notebook.database.repository import ensure_record_id, repo_query
-from open_notebook.domain.notebook import ChatSession, Note, Notebook, Source
+from open_notebook.domain.notebook import ChatSession, Notebook
 from open_notebook.exceptions import (
     NotFoundError,
 )
-from open_notebook.graphs.chat import graph as chat_graph
+from open_notebook.graphs.chat import get_graph as get_chat_graph
+from open_notebook.graphs.checkpointer import delete_chat_checkpoints, get_checkpointer
+from open_notebook.utils import ThinkingStreamFilter
+from open_notebook.utils.context_loader import cached_notebook_context
 
 router = APIRouter()
 
@@ -178,7 +185,8 @@ async def get_session(session_id: str):
             raise HTTPException(status_code=404, detail="Session not found")
 
         # Get session state from LangGraph to retrieve messages
-        thread_state = chat_graph.get_state(
+        chat_graph = await get_chat_graph()
+        thread_state = await chat_graph.aget_state(
             config=RunnableConfig(configurable={"thread_id": session_id})
         )
 
@@ -301,6 +309,7 @@ async def delete_session(session_id: str):
             raise HTTPException(status_code=404, detail="Session not found")
 
         await session.delete()
+        await delete_chat_checkpoints(full_session_id)
 
         return SuccessResponse(success=True, message="Session deleted successfully")
     except NotFoundError:
@@ -310,74 +319,171 @@ async def delete_session(session_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting session: {str(e)}")
 
 
-@router.post("/chat/execute", response_model=ExecuteChatResponse)
-async def execute_chat(request: ExecuteChatRequest):
-    """Execute a chat request and get AI response."""
+@router.get("/chat/checkpoints", response_model=ChatCheckpointStats)
+async def get_checkpoint_stats():
+    """
+    Get chat checkpoint statistics.
+
+    Latency, pruning and VACUUM counters cover this API process; thread,
+    checkpoint and size figures cover the whole checkpoint file.
+    """
     try:
-        # Verify session exists
-        # Ensure session_id has proper table prefix
-        full_session_id = (
-            request.session_id
-            if request.session_id.startswith("chat_session:")
-            else f"chat_session:{request.session_id}"
+        return ChatCheckpointStats(**await (await get_checkpointer()).stats())
+    except Exception as e:
+        logger.error(f"Error fetching checkpoint stats: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching checkpoint stats: {str(e)}"
         )
-        session = await ChatSession.get(full_session_id)
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
 
-        # Determine model override (per-request override takes precedence over session-level)
-        model_override = (
-            request.model_override
-            if request.model_override is not None
-            else getattr(session, "model_override", None)
-        )
 
-        # Get current state
-        current_state = chat_graph.get_state(
-            config=RunnableConfig(
-                configurable={"thread_id": request.session_id}
-            )
-        )
+async def prepare_chat_input(
+    request: ExecuteChatRequest,
+) -> Tuple[ChatSession, Dict[str, Any], RunnableConfig]:
+    """Load the session and build the graph input and config for a chat turn."""
+    # Ensure session_id has proper table prefix
+    full_session_id = (
+        request.session_id
+        if request.session_id.startswith("chat_session:")
+        else f"chat_session:{request.session_id}"
+    )
+    session = await ChatSession.get(full_session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-        # Prepare state for execution
-        state_values = current_state.values if current_state else {}
-        state_values["messages"] = state_values.get("messages", [])
-        state_values["context"] = request.context
-        state_values["model_override"] = model_override
+    # Determine model override (per-request override takes precedence over session-level)
+    model_override = (
+        request.model_override
+        if request.model_override is not None
+        else getattr(session, "model_override", None)
+    )
 
-        # Add user message to state
-        from langchain_core.messages import HumanMessage
+    # Get current state
+    chat_graph = await get_chat_graph()
+    current_state = await chat_graph.aget_state(
+        config=RunnableConfig(configurable={"thread_id": request.session_id})
+    )
+
+    # Prepare state for execution
+    state_values = current_state.values if current_state else {}
+    state_values["messages"] = state_values.get("messages", [])
+    state_values["context"] = request.context
+    state_values["model_override"] = model_override
+
+    # Add user message to state
+    state_values["messages"].append(HumanMessage(content=request.message))
+
+    config = RunnableConfig(
+        configurable={
+            "thread_id": request.session_id,
+            "model_id": model_override,
+        }
+    )
+    return session, state_values, config
+
+
+def to_chat_message(msg: Any, index: int) -> ChatMessage:
+    return ChatMessage(
+        id=getattr(msg, "id", f"msg_{index}"),
+        type=msg.type if hasattr(msg, "type") else "unknown",
+        content=msg.content if hasattr(msg, "content") else str(msg),
+        timestamp=None,
+    )
 
-        user_message = HumanMessage(content=request.message)
-        state_values["messages"].append(user_message)
+
+@router.post("/chat/execute", response_model=ExecuteChatResponse)
+async def execute_chat(request: ExecuteChatRequest):
+    """Execute a chat request and get AI response."""
+    try:
+        session, state_values, config = await prepare_chat_input(request)
 
         # Execute chat graph
-        result = chat_graph.invoke(
+        chat_graph = await get_chat_graph()
+        result = await chat_graph.ainvoke(
             input=state_values,  # type: ignore[arg-type]
-            config=RunnableConfig(
-                configurable={
-                    "thread_id": request.session_id,
-                    "model_id": model_override,
-                }
-            ),
+            config=config,
         )
 
         # Update session timestamp
         await session.save()
 
         # Convert messages to response format
-        messages: list[ChatMessage] = []
-        for msg in result.get("messages", []):
-            messages.append(
-                ChatMessage(
-                    id=getattr(msg, "id", f"msg_{len(messages)}"),
-                    type=msg.type if hasattr(msg, "type") else "unknown",
-                    content=msg.content if hasattr(msg, "content") else str(msg),
-                    timestamp=None,
-                )
-            )
-
+        messages = [
+            to_chat_message(msg, index)
+            for index, msg in enumerate(result.get("messages", []))
+        ]
         return ExecuteChatResponse(session_id=request.session_id, messages=messages)
+    except HTTPException:
+        raise
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    except Exception as e:
+        logger.error(f"Error executing chat: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error executing chat: {str(e)}")
+
+
+async def stream_chat_response(
+    session: ChatSession,
+    state_values: Dict[str, Any],
+    config: RunnableConfig,
+) -> AsyncGenerator[str, None]:
+    """Stream a chat turn as Server-Sent Events, token by token."""
+    try:
+        chat_graph = await get_chat_graph()
+        thinking = ThinkingStreamFilter()
+        result: Dict[str, Any] = {}
+        async for mode, chunk in chat_graph.astream(
+            input=state_values,  # type: ignore[arg-type]
+            config=config,
+            stream_mode=["messages", "values"],
+        ):
+            if mode == "values":
+                result = chunk
+                continue
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != "agent":
+                continue
+            if isinstance(message, AIMessageChunk) and isinstance(message.content, str):
+                delta = thinking.feed(message.content)
+                if delta:
+                    yield f"data: {json.dumps({'type': 'ai_token', 'content': delta})}\n\n"
+
+        delta = thinking.flush()
+        if delta:
+            yield f"data: {json.dumps({'type': 'ai_token', 'content': delta})}\n\n"
+
+        # The final (cleaned) message, as stored in the session
+        messages = result.get("messages", [])
+        if messages and getattr(messages[-1], "type", None) == "ai":
+            ai_message = to_chat_message(messages[-1], len(messages) - 1)
+            ai_event = {"type": "ai_message", "id": ai_message.id, "content": ai_message.content}
+            yield f"data: {json.dumps(ai_event)}\n\n"
+
+        # Update session timestamp
+        await session.save()
+
+        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+    except Exception as e:
+        logger.error(f"Error in chat streaming: {str(e)}")
+        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+
+@router.post("/chat/execute/stream")
+async def execute_chat_stream(request: ExecuteChatRequest):
+    """
+    Execute a chat request and stream the AI response as Server-Sent Events.
+
+    Events: ai_token (content delta), ai_message (the final message, with
+    thinking removed), then complete, or error.
+    """
+    try:
+        session, state_values, config = await prepare_chat_input(request)
+        return StreamingResponse(
+            stream_chat_response(session, state_values, config),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except HTTPException:
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="Session not found")
     except Exception as e:
@@ -389,102 +495,21 @@ async def execute_chat(request: ExecuteChatRequest):
 async def build_context(request: BuildContextRequest):
     """Build context for a notebook based on context configuration."""
     try:
-        # Verify notebook exists
-        notebook = await Notebook.get(request.notebook_id)
-        if not notebook:
+        # Sources (with insights) and notes are loaded in a single query,
+        # or served from the context cache when none of them changed
+        config = request.context_config
+        built = await cached_notebook_context(
+            request.notebook_id,
+            config.get("sources", {}) if config else None,
+            config.get("notes", {}) if config else None,
+        )
+        if built is None:
             raise HTTPException(status_code=404, detail="Notebook not found")
 
-        context_data: dict[str, list[dict[str, str]]] = {"sources": [], "notes": []}
-        total_content = ""
-
-        # Process context configuration if provided
-        if request.context_config:
-            # Process sources
-            for source_id, status in request.context_config.get("sources", {}).items():
-                if "not in" in status:
-                    continue
-
-                try:
-                    # Add table prefix if not present
-                    full_source_id = (
-                        source_id
-                        if source_id.startswith("source:")
-                        else f"source:{source_id}"
-                    )
-
-                    try:
-                        source = await Source.get(full_source_id)
-                    except Exception:
-                        continue
-
-                    if "insights" in status:
-                        source_context = await source.get_context(context_size="short")
-                        context_data["sources"].append(source_context)
-                        total_content += str(source_context)
-                    elif "full content" in status:
-                        source_context = await source.get_context(context_size="long")
-                        context_data["sources"].append(source_context)
-                        total_content += str(source_context)
-                except Exception as e:
-                    logger.warning(f"Error processing source {source_id}: {str(e)}")
-                    continue
-
-            # Process notes
-            for note_id, status in request.context_config.get("notes", {}).items():
-                if "not in" in status:
-                    continue
-
-                try:
-                    # Add table prefix if not present
-                    full_note_id = (
-                        note_id if note_id.startswith("note:") else f"note:{note_id}"
-                    )
-                    note = await Note.get(full_note_id)
-                    if not note:
-                        continue
-
-                    if "full content" in status:
-                        note_context = note.get_context(context_size="long")
-                        context_data["notes"].append(note_context)
-                        total_content += str(note_context)
-                except Exception as e:
-                    logger.warning(f"Error processing note {note_id}: {str(e)}")
-                    continue
-        else:
-            # Default behavior - include all sources and notes with short context
-            sources = await notebook.get_sources()
-            for source in sources:
-                try:
-                    source_context = await source.get_context(context_size="short")
-                    context_data["sources"].append(source_context)
-                    total_content += str(source_context)
-                except Exception as e:
-                    logger.warning(f"Error processing source {source.id}: {str(e)}")
-                    continue
-
-            notes = await notebook.get_notes()
-            for note in notes:
-                try:
-                    note_context = note.get_context(context_size="short")
-                    context_data["notes"].append(note_context)
-                    total_content += str(note_context)
-                except Exception as e:
-                    logger.warning(f"Error processing note {note.id}: {str(e)}")
-                    continue
-
-        # Calculate character and token counts
-        char_count = len(total_content)
-        # Use token count utility if available
-        try:
-            from open_notebook.utils import token_count
-
-            estimated_tokens = token_count(total_content) if total_content else 0
-        except ImportError:
-            # Fallback to simple estimation
-            estimated_tokens = char_count // 4
-
         return BuildContextResponse(
-            context=context_data, token_count=estimated_tokens, char_count=char_count
+            context=built.context,
+            token_count=built.token_count,
+            char_count=len(built.text),
         )
     except HTTPException:
         raise
@@ -4,13 +4,16 @@ from surreal_commands import get_command_status
 
 from api.command_service import CommandService
 from api.models import (
+    EmbeddingCacheStats,
     RebuildProgress,
     RebuildRequest,
     RebuildResponse,
     RebuildStats,
     RebuildStatusResponse,
 )
+from open_notebook.database.rebuild_checkpoint import load_rebuild_checkpoint
 from open_notebook.database.repository import repo_query
+from open_notebook.utils.embedding_cache import embedding_cache
 
 router = APIRouter()
 
@@ -24,6 +27,8 @@ async def start_rebuild(request: RebuildRequest):
     - **include_sources**: Include sources in rebuild (default: true)
     - **include_notes**: Include notes in rebuild (default: true)
     - **include_insights**: Include insights in rebuild (default: true)
+    - **resume**: Continue an unfinished rebuild with the same settings and
+      embedding model from its checkpoint (default: true)
 
     Returns command ID to track progress and estimated item count.
     """
@@ -101,6 +106,7 @@ async def start_rebuild(request: RebuildRequest):
                 "include_sources": request.include_sources,
                 "include_notes": request.include_notes,
                 "include_insights": request.include_insights,
+                "resume": request.resume,
             },
         )
 
@@ -127,7 +133,8 @@ async def get_rebuild_status(command_id: str):
 
     Returns:
     - **status**: queued, running, completed, failed
-    - **progress**: processed count, total count, percentage
+    - **progress**: processed count, total count, percentage, items/sec, ETA
+      (updated after every page of items while the rebuild runs)
     - **stats**: breakdown by type (sources, notes, insights, failed)
     - **timestamps**: started_at, completed_at
     """
@@ -144,6 +151,29 @@ async def get_rebuild_status(command_id: str):
             status=status.status,
         )
 
+        # While the command runs, progress comes from the rebuild checkpoint
+        checkpoint = await load_rebuild_checkpoint()
+        if checkpoint and checkpoint.command_id == command_id:
+            total = checkpoint.total_items
+            done = checkpoint.done_items
+            response.progress = RebuildProgress(
+                processed=done,
+                total=total,
+                percentage=round((done / total * 100) if total > 0 else 0, 2),
+                items_per_second=round(checkpoint.items_per_second, 2),
+                eta_seconds=(
+                    round(checkpoint.eta_seconds, 1)
+                    if checkpoint.eta_seconds is not None
+                    else None
+                ),
+            )
+            response.stats = RebuildStats(
+                sources=checkpoint.sources_processed,
+                notes=checkpoint.notes_processed,
+                insights=checkpoint.insights_processed,
+                failed=checkpoint.failed_items,
+            )
+
         # Extract metadata from command result
         if status.result and isinstance(status.result, dict):
             result = status.result
@@ -156,6 +186,8 @@ async def get_rebuild_status(command_id: str):
                     processed=processed,
                     total=total,
                     percentage=round((processed / total * 100) if total > 0 else 0, 2),
+                    items_per_second=result.get("items_per_second"),
+                    eta_seconds=0.0 if result.get("success") else None,
                 )
 
             # Build stats
@@ -188,3 +220,21 @@ async def get_rebuild_status(command_id: str):
         raise HTTPException(
             status_code=500, detail=f"Failed to get rebuild status: {str(e)}"
         )
+
+
+@router.get("/cache", response_model=EmbeddingCacheStats)
+async def get_embedding_cache_stats():
+    """
+    Get embedding cache statistics.
+
+    Hit/miss/write/eviction counters cover the API process (query embeddings,
+    note saves); entries and size cover the whole cache file, which the
+    worker shares.
+    """
+    try:
+        return EmbeddingCacheStats(**embedding_cache.stats())
+    except Exception as e:
+        logger.error(f"Failed to get embedding cache stats: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get embedding cache stats: {str(e)}"
+        )
@@ -7,11 +7,12 @@ from loguru import logger
 
 from api.models import (
     DefaultModelsResponse,
+    ModelCacheStats,
     ModelCreate,
     ModelResponse,
     ProviderAvailabilityResponse,
 )
-from open_notebook.domain.models import DefaultModels, Model
+from open_notebook.domain.models import DefaultModels, Model, model_manager
 from open_notebook.exceptions import InvalidInputError
 
 router = APIRouter()
@@ -116,6 +117,7 @@ async def create_model(model_data: ModelCreate):
             type=model_data.type,
         )
         await new_model.save()
+        model_manager.invalidate()
 
         return ModelResponse(
             id=new_model.id or "",
@@ -143,6 +145,7 @@ async def delete_model(model_id: str):
             raise HTTPException(status_code=404, detail="Model not found")
         
         await model.delete()
+        model_manager.invalidate(model_id)
         
         return {"message": "Model deleted successfully"}
     except HTTPException:
@@ -195,8 +198,7 @@ async def update_default_models(defaults_data: DefaultModelsResponse):
             defaults.default_tools_model = defaults_data.default_tools_model  # type: ignore[attr-defined]
         
         await defaults.update()
-
-        # No cache refresh needed - next access will fetch fresh data from DB
+        model_manager.invalidate()
 
         return DefaultModelsResponse(
             default_chat_model=defaults.default_chat_model,  # type: ignore[attr-defined]
@@ -214,6 +216,12 @@ async def update_default_models(defaults_data: DefaultModelsResponse):
         raise HTTPException(status_code=500, detail=f"Error updating default models: {str(e)}")
 
 
+@router.get("/models/cache", response_model=ModelCacheStats)
+async def get_model_cache_stats():
+    """Get hit/miss counters of the resolved model cache (this API process)."""
+    return ModelCacheStats(**model_manager.stats())
+
+
 @router.get("/models/providers", response_model=ProviderAvailabilityResponse)
 async def get_provider_availability():
     """Get provider availability based on environment variables."""
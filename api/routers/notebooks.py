@@ -1,37 +1,53 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from loguru import logger
 
 from api.models import NotebookCreate, NotebookResponse, NotebookUpdate
+from api.pagination import Keyset, parse_order_by
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.notebook import Notebook, Source
 from open_notebook.exceptions import InvalidInputError
+from open_notebook.utils.context_cache import invalidate_context
 
 router = APIRouter()
 
 
 @router.get("/notebooks", response_model=List[NotebookResponse])
 async def get_notebooks(
+    response: Response,
     archived: Optional[bool] = Query(None, description="Filter by archived status"),
-    order_by: str = Query("updated desc", description="Order by field and direction"),
+    order_by: str = Query(
+        "updated desc",
+        description="Order by field (updated, created or name) and direction",
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Page size (all notebooks if not set)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header of the previous page"
+    ),
 ):
-    """Get all notebooks with optional filtering and ordering."""
+    """Get notebooks with optional filtering, ordering and keyset pagination."""
     try:
-        # Build the query with counts
+        sort_field, descending = parse_order_by(
+            order_by, ("updated", "created", "name")
+        )
+        keyset = Keyset(sort_field, descending, limit, cursor)
+        archived_filter = None
+        if archived is not None:
+            archived_filter = "archived = $archived"
+            keyset.vars["archived"] = archived
+
+        # source_count and note_count are stored on the notebook
         query = f"""
-            SELECT *,
-            count(<-reference.in) as source_count,
-            count(<-artifact.in) as note_count
-            FROM notebook
-            ORDER BY {order_by}
+            SELECT *, {keyset.select} FROM notebook
+            {keyset.where(archived_filter)}
+            {keyset.order}
+            {keyset.limit_clause}
         """
 
-        result = await repo_query(query)
-
-        # Filter by archived status if specified
-        if archived is not None:
-            result = [nb for nb in result if nb.get("archived") == archived]
+        result = keyset.page(await repo_query(query, keyset.vars), response)
 
         return [
             NotebookResponse(
@@ -46,6 +62,8 @@ async def get_notebooks(
             )
             for nb in result
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching notebooks: {str(e)}")
         raise HTTPException(
@@ -86,14 +104,9 @@ async def create_notebook(notebook: NotebookCreate):
 async def get_notebook(notebook_id: str):
     """Get a specific notebook by ID."""
     try:
-        # Query with counts for single notebook
-        query = """
-            SELECT *,
-            count(<-reference.in) as source_count,
-            count(<-artifact.in) as note_count
-            FROM $notebook_id
-        """
-        result = await repo_query(query, {"notebook_id": ensure_record_id(notebook_id)})
+        result = await repo_query(
+            "SELECT * FROM $notebook_id", {"notebook_id": ensure_record_id(notebook_id)}
+        )
 
         if not result:
             raise HTTPException(status_code=404, detail="Notebook not found")
@@ -136,14 +149,9 @@ async def update_notebook(notebook_id: str, notebook_update: NotebookUpdate):
 
         await notebook.save()
 
-        # Query with counts after update
-        query = """
-            SELECT *,
-            count(<-reference.in) as source_count,
-            count(<-artifact.in) as note_count
-            FROM $notebook_id
-        """
-        result = await repo_query(query, {"notebook_id": ensure_record_id(notebook_id)})
+        result = await repo_query(
+            "SELECT * FROM $notebook_id", {"notebook_id": ensure_record_id(notebook_id)}
+        )
 
         if result:
             nb = result[0]
@@ -190,7 +198,7 @@ async def add_source_to_notebook(notebook_id: str, source_id: str):
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         # Check if source exists
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -212,6 +220,7 @@ async def add_source_to_notebook(notebook_id: str, source_id: str):
                     "source_id": ensure_record_id(source_id),
                 },
             )
+            await invalidate_context(notebook_id)
 
         return {"message": "Source linked to notebook successfully"}
     except HTTPException:
@@ -242,6 +251,7 @@ async def remove_source_from_notebook(notebook_id: str, source_id: str):
                 "source_id": ensure_record_id(source_id),
             },
         )
+        await invalidate_context(notebook_id)
 
         return {"message": "Source removed from notebook successfully"}
     except HTTPException:
@@ -1,9 +1,11 @@
 from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from loguru import logger
 
 from api.models import NoteCreate, NoteResponse, NoteUpdate
+from api.pagination import Keyset
+from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.notebook import Note
 from open_notebook.exceptions import InvalidInputError
 
@@ -12,29 +14,49 @@ router = APIRouter()
 
 @router.get("/notes", response_model=List[NoteResponse])
 async def get_notes(
-    notebook_id: Optional[str] = Query(None, description="Filter by notebook ID")
+    response: Response,
+    notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Page size (all notes if not set)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header of the previous page"
+    ),
 ):
-    """Get all notes with optional notebook filtering."""
+    """Get notes, most recently updated first, with optional notebook filtering."""
     try:
+        keyset = Keyset("updated", True, limit, cursor)
         if notebook_id:
             # Get notes for a specific notebook
             from open_notebook.domain.notebook import Notebook
             notebook = await Notebook.get(notebook_id)
             if not notebook:
                 raise HTTPException(status_code=404, detail="Notebook not found")
-            notes = await notebook.get_notes()
+            # Notebook listings leave out the content, as Notebook.get_notes does
+            keyset.vars["notebook_id"] = ensure_record_id(notebook_id)
+            source = "(SELECT VALUE in FROM artifact WHERE out = $notebook_id)"
+            omit = "content, embedding"
         else:
             # Get all notes
-            notes = await Note.get_all(order_by="updated desc")
-        
+            source = "note"
+            omit = "embedding"
+
+        query = f"""
+            SELECT *, {keyset.select} OMIT {omit} FROM {source}
+            {keyset.where()}
+            {keyset.order}
+            {keyset.limit_clause}
+        """
+        notes = keyset.page(await repo_query(query, keyset.vars), response)
+
         return [
             NoteResponse(
-                id=note.id or "",
-                title=note.title,
-                content=note.content,
-                note_type=note.note_type,
-                created=str(note.created),
-                updated=str(note.updated),
+                id=str(note["id"]),
+                title=note.get("title"),
+                content=note.get("content"),
+                note_type=note.get("note_type"),
+                created=str(note.get("created")),
+                updated=str(note.get("updated")),
             )
             for note in notes
         ]
@@ -105,7 +127,7 @@ async def create_note(note_data: NoteCreate):
 async def get_note(note_id: str):
     """Get a specific note by ID."""
     try:
-        note = await Note.get(note_id)
+        note = await Note.get(note_id, omit=["embedding"])
         if not note:
             raise HTTPException(status_code=404, detail="Note not found")
         
@@ -166,7 +188,7 @@ async def update_note(note_id: str, note_update: NoteUpdate):
 async def delete_note(note_id: str):
     """Delete a note."""
     try:
-        note = await Note.get(note_id)
+        note = await Note.get(note_id, omit=["embedding"])
         if not note:
             raise HTTPException(status_code=404, detail="Note not found")
         
@@ -1,31 +1,35 @@
 import json
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
+from langgraph.constants import TAG_NOSTREAM
 from loguru import logger
 
 from api.models import AskRequest, AskResponse, SearchRequest, SearchResponse
 from open_notebook.domain.models import Model, model_manager
-from open_notebook.domain.notebook import text_search, vector_search
+from open_notebook.domain.notebook import hybrid_search, text_search, vector_search
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
+from open_notebook.graphs.ask import fast_graph as fast_ask_graph
 from open_notebook.graphs.ask import graph as ask_graph
+from open_notebook.utils import ThinkingStreamFilter
 
 router = APIRouter()
 
 
 @router.post("/search", response_model=SearchResponse)
 async def search_knowledge_base(search_request: SearchRequest):
-    """Search the knowledge base using text or vector search."""
+    """Search the knowledge base using text, vector or hybrid search."""
     try:
-        if search_request.type == "vector":
+        if search_request.type in ("vector", "hybrid"):
             # Check if embedding model is available for vector search
             if not await model_manager.get_embedding_model():
                 raise HTTPException(
                     status_code=400,
-                    detail="Vector search requires an embedding model. Please configure one in the Models section.",
+                    detail=f"{search_request.type.capitalize()} search requires an embedding model. Please configure one in the Models section.",
                 )
 
+        if search_request.type == "vector":
             results = await vector_search(
                 keyword=search_request.query,
                 results=search_request.limit,
@@ -33,6 +37,16 @@ async def search_knowledge_base(search_request: SearchRequest):
                 note=search_request.search_notes,
                 minimum_score=search_request.minimum_score,
             )
+        elif search_request.type == "hybrid":
+            results = await hybrid_search(
+                keyword=search_request.query,
+                results=search_request.limit,
+                source=search_request.search_sources,
+                note=search_request.search_notes,
+                minimum_score=search_request.minimum_score,
+                text_weight=search_request.text_weight,
+                vector_weight=search_request.vector_weight,
+            )
         else:
             # Text search
             results = await text_search(
@@ -58,24 +72,109 @@ async def search_knowledge_base(search_request: SearchRequest):
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+async def load_ask_models(
+    ask_request: AskRequest,
+) -> Tuple[Optional[Model], Optional[Model], Model]:
+    """Check the models the request's mode needs; raise 400 when one is missing."""
+    needed = {"final_answer_model": "Final answer"}
+    if ask_request.mode == "full":
+        needed = {
+            "strategy_model": "Strategy",
+            "answer_model": "Answer",
+            **needed,
+        }
+    models: Dict[str, Optional[Model]] = {
+        "strategy_model": None,
+        "answer_model": None,
+    }
+    for field, label in needed.items():
+        model_id = getattr(ask_request, field)
+        if not model_id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label} model is required in {ask_request.mode} mode",
+            )
+        model = await Model.get(model_id)
+        if not model:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label} model {model_id} not found",
+            )
+        models[field] = model
+
+    # Check if embedding model is available
+    if not await model_manager.get_embedding_model():
+        raise HTTPException(
+            status_code=400,
+            detail="Ask feature requires an embedding model. Please configure one in the Models section.",
+        )
+    return (
+        models["strategy_model"],
+        models["answer_model"],
+        models["final_answer_model"],  # type: ignore[return-value]
+    )
+
+
+def ask_graph_input(
+    question: str,
+    strategy_model: Optional[Model],
+    answer_model: Optional[Model],
+    final_answer_model: Model,
+    search_type: str,
+    mode: str,
+) -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+    """The graph for the mode, with its input and config."""
+    config = dict(
+        configurable=dict(
+            strategy_model=strategy_model.id if strategy_model else None,
+            answer_model=answer_model.id if answer_model else None,
+            final_answer_model=final_answer_model.id,
+            search_type=search_type,
+        )
+    )
+    graph = fast_ask_graph if mode == "fast" else ask_graph
+    return graph, dict(question=question), config
+
+
 async def stream_ask_response(
-    question: str, strategy_model: Model, answer_model: Model, final_answer_model: Model
+    question: str,
+    strategy_model: Optional[Model],
+    answer_model: Optional[Model],
+    final_answer_model: Model,
+    search_type: str = "vector",
+    mode: str = "full",
 ) -> AsyncGenerator[str, None]:
-    """Stream the ask response as Server-Sent Events."""
+    """
+    Stream the ask response as Server-Sent Events.
+
+    The final answer is streamed as `final_answer_token` deltas (thinking
+    blocks filtered out) before the complete `final_answer` event.
+    """
     try:
         final_answer = None
+        graph, input, config = ask_graph_input(
+            question, strategy_model, answer_model, final_answer_model, search_type, mode
+        )
+        thinking_filter = ThinkingStreamFilter()
 
-        async for chunk in ask_graph.astream(
-            input=dict(question=question),  # type: ignore[arg-type]
-            config=dict(
-                configurable=dict(
-                    strategy_model=strategy_model.id,
-                    answer_model=answer_model.id,
-                    final_answer_model=final_answer_model.id,
-                )
-            ),
-            stream_mode="updates",
+        async for stream_mode, chunk in graph.astream(
+            input=input,  # type: ignore[arg-type]
+            config=config,  # type: ignore[arg-type]
+            stream_mode=["updates", "messages"],
         ):
+            if stream_mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") != "write_final_answer":
+                    continue
+                if TAG_NOSTREAM in (metadata.get("tags") or []):
+                    continue
+                if isinstance(message.content, str):
+                    delta = thinking_filter.feed(message.content)
+                    if delta:
+                        token_data = {"type": "final_answer_token", "content": delta}
+                        yield f"data: {json.dumps(token_data)}\n\n"
+                continue
+
             if "agent" in chunk:
                 strategy_data = {
                     "type": "strategy",
@@ -93,6 +192,10 @@ async def stream_ask_response(
                     yield f"data: {json.dumps(answer_data)}\n\n"
 
             elif "write_final_answer" in chunk:
+                rest = thinking_filter.flush()
+                if rest:
+                    token_data = {"type": "final_answer_token", "content": rest}
+                    yield f"data: {json.dumps(token_data)}\n\n"
                 final_answer = chunk["write_final_answer"]["final_answer"]
                 final_data = {"type": "final_answer", "content": final_answer}
                 yield f"data: {json.dumps(final_data)}\n\n"
@@ -111,38 +214,19 @@ async def stream_ask_response(
 async def ask_knowledge_base(ask_request: AskRequest):
     """Ask the knowledge base a question using AI models."""
     try:
-        # Validate models exist
-        strategy_model = await Model.get(ask_request.strategy_model)
-        answer_model = await Model.get(ask_request.answer_model)
-        final_answer_model = await Model.get(ask_request.final_answer_model)
-
-        if not strategy_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Strategy model {ask_request.strategy_model} not found",
-            )
-        if not answer_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Answer model {ask_request.answer_model} not found",
-            )
-        if not final_answer_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Final answer model {ask_request.final_answer_model} not found",
-            )
-
-        # Check if embedding model is available
-        if not await model_manager.get_embedding_model():
-            raise HTTPException(
-                status_code=400,
-                detail="Ask feature requires an embedding model. Please configure one in the Models section.",
-            )
+        strategy_model, answer_model, final_answer_model = await load_ask_models(
+            ask_request
+        )
 
         # For streaming response
         return StreamingResponse(
             stream_ask_response(
-                ask_request.question, strategy_model, answer_model, final_answer_model
+                ask_request.question,
+                strategy_model,
+                answer_model,
+                final_answer_model,
+                ask_request.search_type,
+                ask_request.mode,
             ),
             media_type="text/plain",
         )
@@ -158,49 +242,21 @@ async def ask_knowledge_base(ask_request: AskRequest):
 async def ask_knowledge_base_simple(ask_request: AskRequest):
     """Ask the knowledge base a question and return a simple response (non-streaming)."""
     try:
-        # Validate models exist
-        strategy_model = await Model.get(ask_request.strategy_model)
-        answer_model = await Model.get(ask_request.answer_model)
-        final_answer_model = await Model.get(ask_request.final_answer_model)
-
-        if not strategy_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Strategy model {ask_request.strategy_model} not found",
-            )
-        if not answer_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Answer model {ask_request.answer_model} not found",
-            )
-        if not final_answer_model:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Final answer model {ask_request.final_answer_model} not found",
-            )
-
-        # Check if embedding model is available
-        if not await model_manager.get_embedding_model():
-            raise HTTPException(
-                status_code=400,
-                detail="Ask feature requires an embedding model. Please configure one in the Models section.",
-            )
+        strategy_model, answer_model, final_answer_model = await load_ask_models(
+            ask_request
+        )
 
         # Run the ask graph and get final result
-        final_answer = None
-        async for chunk in ask_graph.astream(
-            input=dict(question=ask_request.question),  # type: ignore[arg-type]
-            config=dict(
-                configurable=dict(
-                    strategy_model=strategy_model.id,
-                    answer_model=answer_model.id,
-                    final_answer_model=final_answer_model.id,
-                )
-            ),
-            stream_mode="updates",
-        ):
-            if "write_final_answer" in chunk:
-                final_answer = chunk["write_final_answer"]["final_answer"]
+        graph, input, config = ask_graph_input(
+            ask_request.question,
+            strategy_model,
+            answer_model,
+            final_answer_model,
+            ask_request.search_type,
+            ask_request.mode,
+        )
+        result = await graph.ainvoke(input, config)  # type: ignore[arg-type]
+        final_answer = result.get("final_answer")
 
         if not final_answer:
             raise HTTPException(status_code=500, detail="No answer generated")
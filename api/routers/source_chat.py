@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException, Path
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
 from loguru import logger
 from pydantic import BaseModel, Field
 
@@ -14,7 +15,9 @@ from open_notebook.domain.notebook import ChatSession, Source
 from open_notebook.exceptions import (
     NotFoundError,
 )
-from open_notebook.graphs.source_chat import source_chat_graph as source_chat_graph
+from open_notebook.graphs.checkpointer import delete_chat_checkpoints
+from open_notebook.graphs.source_chat import get_source_chat_graph
+from open_notebook.utils import ThinkingStreamFilter
 
 router = APIRouter()
 
@@ -70,7 +73,7 @@ async def create_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -108,7 +111,7 @@ async def get_source_chat_sessions(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -154,7 +157,7 @@ async def get_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -174,7 +177,8 @@ async def get_source_chat_session(
             raise HTTPException(status_code=404, detail="Session not found for this source")
         
         # Get session state from LangGraph to retrieve messages
-        thread_state = source_chat_graph.get_state(
+        source_chat_graph = await get_source_chat_graph()
+        thread_state = await source_chat_graph.aget_state(
             config=RunnableConfig(configurable={"thread_id": session_id})
         )
         
@@ -230,7 +234,7 @@ async def update_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -282,7 +286,7 @@ async def delete_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -302,6 +306,7 @@ async def delete_source_chat_session(
             raise HTTPException(status_code=404, detail="Session not found for this source")
         
         await session.delete()
+        await delete_chat_checkpoints(full_session_id)
         
         return SuccessResponse(
             success=True,
@@ -320,23 +325,35 @@ async def stream_source_chat_response(
     message: str,
     model_override: Optional[str] = None
 ) -> AsyncGenerator[str, None]:
-    """Stream the source chat response as Server-Sent Events."""
+    """
+    Stream the source chat response as Server-Sent Events.
+
+    The model's tokens are sent as `ai_token` deltas while it generates
+    (thinking blocks filtered out), followed by the final `ai_message`,
+    the `context_indicators` and `complete`.
+    """
     try:
-        # Get current state
-        current_state = source_chat_graph.get_state(
-            config=RunnableConfig(configurable={"thread_id": session_id})
+        source_chat_graph = await get_source_chat_graph()
+        config = RunnableConfig(
+            configurable={
+                "thread_id": session_id,
+                "model_id": model_override
+            }
         )
-        
+
+        # Get current state
+        current_state = await source_chat_graph.aget_state(config=config)
+
         # Prepare state for execution
         state_values = current_state.values if current_state else {}
         state_values["messages"] = state_values.get("messages", [])
         state_values["source_id"] = source_id
         state_values["model_override"] = model_override
-        
+
         # Add user message to state
         user_message = HumanMessage(content=message)
         state_values["messages"].append(user_message)
-        
+
         # Send user message event
         user_event = {
             "type": "user_message",
@@ -344,29 +361,44 @@ async def stream_source_chat_response(
             "timestamp": None
         }
         yield f"data: {json.dumps(user_event)}\n\n"
-        
-        # Execute source chat graph synchronously (like notebook chat does)
-        result = source_chat_graph.invoke(
-            input=state_values,  # type: ignore[arg-type]
-            config=RunnableConfig(
-                configurable={
-                    "thread_id": session_id,
-                    "model_id": model_override
-                }
-            )
-        )
-        
-        # Stream the complete AI response
-        if "messages" in result:
-            for msg in result["messages"]:
-                if hasattr(msg, 'type') and msg.type == 'ai':
-                    ai_event = {
-                        "type": "ai_message", 
-                        "content": msg.content if hasattr(msg, 'content') else str(msg),
-                        "timestamp": None
-                    }
-                    yield f"data: {json.dumps(ai_event)}\n\n"
-        
+
+        # Run the graph, forwarding the model's tokens as they arrive
+        thinking_filter = ThinkingStreamFilter()
+        async for event in source_chat_graph.astream_events(
+            state_values,  # type: ignore[arg-type]
+            config=config,
+            version="v2",
+        ):
+            if event["event"] != "on_chat_model_stream":
+                continue
+            if event.get("metadata", {}).get("langgraph_node") != "source_chat_agent":
+                continue
+            # e.g. the history summary, generated inside the same node
+            if TAG_NOSTREAM in event.get("tags", []):
+                continue
+            chunk = event["data"]["chunk"]
+            if not isinstance(chunk.content, str):
+                continue
+            delta = thinking_filter.feed(chunk.content)
+            if delta:
+                yield f"data: {json.dumps({'type': 'ai_token', 'content': delta})}\n\n"
+        delta = thinking_filter.flush()
+        if delta:
+            yield f"data: {json.dumps({'type': 'ai_token', 'content': delta})}\n\n"
+
+        # The node's cleaned message and context are in the checkpoint
+        result = (await source_chat_graph.aget_state(config=config)).values
+
+        # Send the complete AI response
+        messages = result.get("messages", [])
+        if messages and getattr(messages[-1], "type", None) == "ai":
+            ai_event = {
+                "type": "ai_message",
+                "content": messages[-1].content,
+                "timestamp": None
+            }
+            yield f"data: {json.dumps(ai_event)}\n\n"
+
         # Stream context indicators
         if "context_indicators" in result:
             context_event = {
@@ -374,11 +406,11 @@ async def stream_source_chat_response(
                 "data": result["context_indicators"]
             }
             yield f"data: {json.dumps(context_event)}\n\n"
-        
+
         # Send completion signal
         completion_event = {"type": "complete"}
         yield f"data: {json.dumps(completion_event)}\n\n"
-        
+
     except Exception as e:
         logger.error(f"Error in source chat streaming: {str(e)}")
         error_event = {"type": "error", "message": str(e)}
@@ -395,7 +427,7 @@ async def send_message_to_source_chat(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -431,11 +463,10 @@ async def send_message_to_source_chat(
                 message=request.message,
                 model_override=model_override
             ),
-            media_type="text/plain",
+            media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
-                "Content-Type": "text/plain; charset=utf-8"
             }
         )
         
@@ -26,6 +26,7 @@ from api.models import (
     SourceStatusResponse,
     SourceUpdate,
 )
+from api.pagination import Keyset
 from commands.source_commands import SourceProcessingInput
 from open_notebook.config import UPLOADS_FOLDER
 from open_notebook.database.repository import ensure_record_id, repo_query
@@ -151,13 +152,19 @@ def parse_source_form_data(
 
 @router.get("/sources", response_model=List[SourceListResponse])
 async def get_sources(
+    response: Response,
     notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
     limit: int = Query(50, ge=1, le=100, description="Number of sources to return (1-100)"),
-    offset: int = Query(0, ge=0, description="Number of sources to skip"),
+    offset: int = Query(
+        0, ge=0, description="Number of sources to skip (prefer cursor, which doesn't slow down with depth)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor header of the previous page"
+    ),
     sort_by: str = Query("updated", description="Field to sort by (created or updated)"),
     sort_order: str = Query("desc", description="Sort order (asc or desc)"),
 ):
-    """Get sources with pagination and sorting support."""
+    """Get sources with keyset pagination and sorting support."""
     try:
         # Validate sort parameters
         if sort_by not in ["created", "updated"]:
@@ -165,8 +172,12 @@ async def get_sources(
         if sort_order.lower() not in ["asc", "desc"]:
             raise HTTPException(status_code=400, detail="sort_order must be 'asc' or 'desc'")
 
-        # Build ORDER BY clause
-        order_clause = f"ORDER BY {sort_by} {sort_order.upper()}"
+        keyset = Keyset(sort_by, sort_order.lower() == "desc", limit, cursor)
+        # Offset paging is kept for older clients; a cursor replaces it
+        start_clause = ""
+        if offset and not cursor:
+            start_clause = "START $offset"
+            keyset.vars["offset"] = offset
 
         # Build the query
         if notebook_id:
@@ -175,33 +186,23 @@ async def get_sources(
             if not notebook:
                 raise HTTPException(status_code=404, detail="Notebook not found")
 
-            # Query sources for specific notebook - include command field
-            query = f"""
-                SELECT id, asset, created, title, updated, topics, command,
-                (SELECT VALUE count() FROM source_insight WHERE source = $parent.id GROUP ALL)[0].count OR 0 AS insights_count,
-                ((SELECT VALUE id FROM source_embedding WHERE source = $parent.id LIMIT 1)) != NONE AS embedded
-                FROM (select value in from reference where out=$notebook_id)
-                {order_clause}
-                LIMIT $limit START $offset
-            """
-            result = await repo_query(
-                query, {
-                    "notebook_id": ensure_record_id(notebook_id),
-                    "limit": limit,
-                    "offset": offset
-                }
-            )
+            # Query sources for specific notebook
+            keyset.vars["notebook_id"] = ensure_record_id(notebook_id)
+            from_clause = "(select value in from reference where out=$notebook_id)"
         else:
-            # Query all sources - include command field
-            query = f"""
-                SELECT id, asset, created, title, updated, topics, command,
-                (SELECT VALUE count() FROM source_insight WHERE source = $parent.id GROUP ALL)[0].count OR 0 AS insights_count,
-                ((SELECT VALUE id FROM source_embedding WHERE source = $parent.id LIMIT 1)) != NONE AS embedded
-                FROM source
-                {order_clause}
-                LIMIT $limit START $offset
-            """
-            result = await repo_query(query, {"limit": limit, "offset": offset})
+            # Query all sources
+            from_clause = "source"
+
+        # Include command field; the counts are stored on the source
+        query = f"""
+            SELECT id, asset, created, title, updated, topics, command,
+            insights_count, embedded_chunks, embedded, {keyset.select}
+            FROM {from_clause}
+            {keyset.where()}
+            {keyset.order}
+            {keyset.limit_clause} {start_clause}
+        """
+        result = keyset.page(await repo_query(query, keyset.vars), response)
 
         # Extract command IDs for batch status fetching
         command_ids = []
@@ -296,9 +297,9 @@ async def get_sources(
                     )
                     if row.get("asset")
                     else None,
-                    embedded=row.get("embedded", False),
-                    embedded_chunks=0,  # Removed from query - not needed in list view
-                    insights_count=row.get("insights_count", 0),
+                    embedded=row.get("embedded") or False,
+                    embedded_chunks=row.get("embedded_chunks") or 0,
+                    insights_count=row.get("insights_count") or 0,
                     created=str(row["created"]),
                     updated=str(row["updated"]),
                     # Status fields
@@ -595,7 +596,7 @@ async def create_source_json(source_data: SourceCreate):
 
 
 async def _resolve_source_file(source_id: str) -> tuple[str, str]:
-    source = await Source.get(source_id)
+    source = await Source.get(source_id, omit=["full_text"])
     if not source:
         raise HTTPException(status_code=404, detail="Source not found")
 
@@ -726,7 +727,7 @@ async def get_source_status(source_id: str):
     """Get processing status for a source."""
     try:
         # First, verify source exists
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -830,7 +831,7 @@ async def retry_source_processing(source_id: str):
     """Retry processing for a failed or stuck source."""
     try:
         # First, verify source exists
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -875,8 +876,9 @@ async def retry_source_processing(source_id: str):
                 )
         else:
             # Check if it's a text source by trying to get full_text
-            if source.full_text:
-                content_state = {"content": source.full_text}
+            full_text = await source.get_full_text()
+            if full_text:
+                content_state = {"content": full_text}
             else:
                 raise HTTPException(
                     status_code=400, detail="Cannot determine source content for retry"
@@ -923,7 +925,7 @@ async def retry_source_processing(source_id: str):
                 )
                 if source.asset
                 else None,
-                full_text=source.full_text,
+                full_text=await source.get_full_text(),
                 embedded=embedded_chunks > 0,
                 embedded_chunks=embedded_chunks,
                 created=str(source.created),
@@ -954,7 +956,7 @@ async def retry_source_processing(source_id: str):
 async def delete_source(source_id: str):
     """Delete a source."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -972,7 +974,7 @@ async def delete_source(source_id: str):
 async def get_source_insights(source_id: str):
     """Get all insights for a specific source."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -1001,8 +1003,8 @@ async def get_source_insights(source_id: str):
 async def create_source_insight(source_id: str, request: CreateSourceInsightRequest):
     """Create a new insight for a source by running a transformation."""
     try:
-        # Get source
-        source = await Source.get(source_id)
+        # Get source (the transformation loads its text)
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
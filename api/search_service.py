@@ -42,14 +42,16 @@ class SearchService:
         question: str,
         strategy_model: str,
         answer_model: str,
-        final_answer_model: str
+        final_answer_model: str,
+        search_type: str = "vector"
     ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Ask the knowledge base a question."""
         response = api_client.ask_simple(
             question=question,
             strategy_model=strategy_model,
             answer_model=answer_model,
-            final_answer_model=final_answer_model
+            final_answer_model=final_answer_model,
+            search_type=search_type
         )
         return response
 
@@ -0,0 +1,110 @@
+"""
+Latency comparison of the ask graph's full and fast modes.
+
+Model calls and searches are replaced by stubs that sleep for a fixed
+latency, so the run needs no database, embedding model or API key and the
+difference comes only from the shape of each pipeline: full mode writes a
+strategy, summarizes each search and writes the final answer; fast mode
+searches for the question once and makes a single answer call. Hits are
+measured with word offsets instead of tiktoken.
+
+Usage:
+    uv run python benchmarks/ask_modes.py [--llm-latency 1.5] [--search-latency 0.2] [--searches 3]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage  # noqa: E402
+
+from open_notebook.graphs import ask  # noqa: E402
+from open_notebook.utils.text_splitter import word_offsets  # noqa: E402
+
+pack_results = ask.pack_results
+
+
+class FakeModel:
+    """Answers after a fixed delay; strategy prompts get a JSON strategy."""
+
+    def __init__(self, latency: float, searches: int, calls: List[str]) -> None:
+        self.latency = latency
+        self.searches = searches
+        self.calls = calls
+
+    async def ainvoke(self, prompt: Any, config: Any = None) -> AIMessage:
+        await asyncio.sleep(self.latency)
+        if '"searches"' in str(prompt):
+            self.calls.append("strategy")
+            strategy = {
+                "reasoning": "Look at the question from a few angles.",
+                "searches": [
+                    {"term": f"aspect {i}", "instructions": "Summarize it."}
+                    for i in range(self.searches)
+                ],
+            }
+            return AIMessage(content=json.dumps(strategy))
+        self.calls.append("answer")
+        return AIMessage(content="An answer citing [source:s1].")
+
+
+def fake_hits(term: str, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"source:s{i}",
+            "title": f"Source {i}",
+            "matches": [f"{term} " + "lorem ipsum " * 60],
+            "similarity": 1 - i / 100,
+        }
+        for i in range(count)
+    ]
+
+
+async def run(graph: Any, args: argparse.Namespace) -> tuple[float, List[str]]:
+    calls: List[str] = []
+
+    async def provision(*_args: Any, **_kwargs: Any) -> FakeModel:
+        return FakeModel(args.llm_latency, args.searches, calls)
+
+    async def search(terms: List[str], config: Any, results: int = 10) -> List[list]:
+        await asyncio.sleep(args.search_latency)
+        return [fake_hits(term, results) for term in terms]
+
+    ask.provision_langchain_model = provision  # type: ignore[assignment]
+    ask.search_terms = search  # type: ignore[assignment]
+    ask.pack_results = partial(pack_results, token_offsets=word_offsets)  # type: ignore[assignment]
+
+    start = time.perf_counter()
+    result = await graph.ainvoke({"question": "What do the sources say?"})
+    assert result.get("final_answer")
+    return time.perf_counter() - start, calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--searches", type=int, default=3)
+    args = parser.parse_args()
+
+    full, full_calls = asyncio.run(run(ask.graph, args))
+    fast, fast_calls = asyncio.run(run(ask.fast_graph, args))
+
+    print(
+        f"llm latency {args.llm_latency:.2f} s, search latency "
+        f"{args.search_latency:.2f} s, {args.searches} searches"
+    )
+    print(f"  full: {full:6.2f} s  ({len(full_calls)} model calls)")
+    print(f"  fast: {fast:6.2f} s  ({len(fast_calls)} model calls)")
+    print(f"  speedup: {full / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark for open_notebook.database.repository.parse_record_ids.
+
+Builds vector-heavy query results shaped like source_embedding / note rows and
+compares the current implementation against the original fully recursive one.
+
+Usage:
+    uv run python benchmarks/parse_record_ids.py [--rows 200] [--dims 1536]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from surrealdb import RecordID  # type: ignore
+
+from open_notebook.database.repository import parse_record_ids
+
+
+def parse_record_ids_baseline(obj: Any) -> Any:
+    """The original implementation, kept here for comparison."""
+    if isinstance(obj, dict):
+        return {k: parse_record_ids_baseline(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [parse_record_ids_baseline(item) for item in obj]
+    elif isinstance(obj, RecordID):
+        return str(obj)
+    return obj
+
+
+def make_rows(rows: int, dims: int) -> list:
+    return [
+        {
+            "id": RecordID("source_embedding", f"chunk{i}"),
+            "source": RecordID("source", f"src{i % 10}"),
+            "order": i,
+            "content": "lorem ipsum " * 40,
+            "embedding": [random.random() for _ in range(dims)],
+        }
+        for i in range(rows)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    data = make_rows(args.rows, args.dims)
+    assert parse_record_ids(data) == parse_record_ids_baseline(data)
+
+    baseline = min(
+        timeit.repeat(lambda: parse_record_ids_baseline(data), number=1, repeat=args.repeat)
+    )
+    current = min(
+        timeit.repeat(lambda: parse_record_ids(data), number=1, repeat=args.repeat)
+    )
+
+    print(f"{args.rows} rows x {args.dims} dims")
+    print(f"  baseline: {baseline * 1000:8.2f} ms")
+    print(f"  current:  {current * 1000:8.2f} ms")
+    print(f"  speedup:  {baseline / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark for open_notebook.utils.text_utils.split_text.
+
+Builds synthetic documents of the requested sizes and compares the
+encode-once TokenOffsetSplitter against the original implementation
+(langchain's RecursiveCharacterTextSplitter re-encoding every fragment with
+token_count). Reports throughput in MB/s for each.
+
+Usage:
+    uv run python benchmarks/split_text.py [--sizes 1 50] [--chunk-size 500]
+
+--tokenizer words measures chunk sizes in whitespace-separated words on both
+sides, for machines without the tiktoken encoding files.
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # type: ignore
+
+from open_notebook.utils.text_splitter import (
+    DEFAULT_SEPARATORS,
+    TokenOffsetSplitter,
+    tiktoken_offsets,
+    word_offsets,
+)
+from open_notebook.utils.token_utils import token_count
+
+WORDS = (
+    "the of and to in is that for it as with was on be by this are from at or "
+    "notebook source embedding vector search context model chunk document token "
+    "research analysis transcript summary insight podcast question answer"
+).split()
+
+
+def make_document(size_mb: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    paragraphs = []
+    length = 0
+    while length < target:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(5, 30))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:target]
+
+
+def split_text_baseline(text: str, chunk_size: int, length_function) -> list:
+    """The original implementation, kept here for comparison."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=int(chunk_size * 0.15),
+        length_function=length_function,
+        separators=DEFAULT_SEPARATORS,
+    ).split_text(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 50])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tokenizer", choices=["tiktoken", "words"], default="tiktoken")
+    args = parser.parse_args()
+
+    if args.tokenizer == "words":
+        offsets, length_function = word_offsets, lambda s: len(s.split())
+    else:
+        offsets, length_function = tiktoken_offsets, token_count
+    splitter = TokenOffsetSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=int(args.chunk_size * 0.15),
+        token_offsets=offsets,
+    )
+
+    for size in args.sizes:
+        text = make_document(size)
+        chunks = splitter.split(text)
+        baseline_chunks = split_text_baseline(text, args.chunk_size, length_function)
+
+        baseline = min(
+            timeit.repeat(
+                lambda: split_text_baseline(text, args.chunk_size, length_function),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        current = min(
+            timeit.repeat(lambda: splitter.split(text), number=1, repeat=args.repeat)
+        )
+        same = sum(a.text == b for a, b in zip(chunks, baseline_chunks))
+
+        print(f"{size:g} MB document, chunk size {args.chunk_size} ({args.tokenizer})")
+        print(f"  chunks:   {len(chunks)} current, {len(baseline_chunks)} baseline, {same} identical")
+        print(f"  baseline: {baseline:8.2f} s  {size / baseline:8.2f} MB/s")
+        print(f"  current:  {current:8.2f} s  {size / current:8.2f} MB/s")
+        print(f"  speedup:  {baseline / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 from .embedding_commands import embed_single_item_command, rebuild_embeddings_command
 from .example_commands import analyze_data_command, process_text_command
+from .maintenance_commands import repair_counters_command
 from .podcast_commands import generate_podcast_command
 from .source_commands import process_source_command
 
@@ -12,4 +13,5 @@ __all__ = [
     "process_text_command",
     "analyze_data_command",
     "rebuild_embeddings_command",
+    "repair_counters_command",
 ]
@@ -1,3 +1,5 @@
+import asyncio
+import os
 import time
 from typing import Dict, List, Literal, Optional
 
@@ -5,10 +7,35 @@ from loguru import logger
 from pydantic import BaseModel
 from surreal_commands import CommandInput, CommandOutput, command, submit_command
 
-from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.database import vector_store
+from open_notebook.database.counters import add_embedded_chunks, set_embedded_chunks
+from open_notebook.database.rebuild_checkpoint import (
+    RebuildCheckpoint,
+    load_rebuild_checkpoint,
+    save_rebuild_checkpoint,
+)
+from open_notebook.database.repository import ensure_record_id, repo_insert, repo_query
+from open_notebook.database.vector_index import (
+    prepare_vector_write,
+    warm_vector_indexes,
+)
 from open_notebook.domain.models import model_manager
 from open_notebook.domain.notebook import Note, Source, SourceInsight
-from open_notebook.utils.text_utils import split_text
+from open_notebook.utils.embedding_cache import cached_embed, model_key
+from open_notebook.utils.text_utils import batch_chunks, split_text
+
+# Upper bounds for a single embed_chunk_batch job / provider call.
+# Most providers cap inputs per request (e.g. 2048 texts for OpenAI) and total
+# tokens per request; keep both comfortably below the strictest common limits.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "16000"))
+
+# rebuild_embeddings: items per checkpoint page, and how many sources (or
+# note/insight embedding batches) are processed at once
+REBUILD_PAGE_SIZE = int(os.getenv("REBUILD_PAGE_SIZE", "50"))
+REBUILD_CONCURRENCY = int(os.getenv("REBUILD_CONCURRENCY", "4"))
+# Rows per bulk insert of source chunks
+REBUILD_INSERT_BATCH = 100
 
 
 def full_model_dump(model):
@@ -49,6 +76,20 @@ class EmbedChunkOutput(CommandOutput):
     error_message: Optional[str] = None
 
 
+class EmbedChunkBatchInput(CommandInput):
+    source_id: str
+    start_index: int
+    chunks: List[str]
+
+
+class EmbedChunkBatchOutput(CommandOutput):
+    success: bool
+    source_id: str
+    start_index: int
+    chunks_embedded: int = 0
+    error_message: Optional[str] = None
+
+
 class VectorizeSourceInput(CommandInput):
     source_id: str
 
@@ -58,6 +99,7 @@ class VectorizeSourceOutput(CommandOutput):
     source_id: str
     total_chunks: int
     jobs_submitted: int
+    batches: int = 0
     processing_time: float
     error_message: Optional[str] = None
 
@@ -67,6 +109,7 @@ class RebuildEmbeddingsInput(CommandInput):
     include_sources: bool = True
     include_notes: bool = True
     include_insights: bool = True
+    resume: bool = True
 
 
 class RebuildEmbeddingsOutput(CommandOutput):
@@ -77,6 +120,8 @@ class RebuildEmbeddingsOutput(CommandOutput):
     sources_processed: int = 0
     notes_processed: int = 0
     insights_processed: int = 0
+    resumed: bool = False
+    items_per_second: float = 0.0
     processing_time: float
     error_message: Optional[str] = None
 
@@ -127,12 +172,13 @@ async def embed_single_item_command(
             logger.info(f"Source vectorized: {chunks_created} chunks created")
 
         elif input_data.item_type == "note":
-            # Get note and save (auto-embeds via ObjectModel.save())
+            # Get note and re-embed it (ObjectModel.save() only embeds
+            # changed content unless asked to)
             note = await Note.get(input_data.item_id)
             if not note:
                 raise ValueError(f"Note '{input_data.item_id}' not found")
 
-            await note.save()
+            await note.save(reembed=True)
             logger.info(f"Note embedded: {input_data.item_id}")
 
         elif input_data.item_type == "insight":
@@ -142,16 +188,18 @@ async def embed_single_item_command(
                 raise ValueError(f"Insight '{input_data.item_id}' not found")
 
             # Generate new embedding
-            embedding = (await EMBEDDING_MODEL.aembed([insight.content]))[0]
+            embedding = (await cached_embed(EMBEDDING_MODEL, [insight.content]))[0]
+            await prepare_vector_write(len(embedding))
 
             # Update insight with new embedding
-            await repo_query(
+            updated = await repo_query(
                 "UPDATE $insight_id SET embedding = $embedding",
                 {
                     "insight_id": ensure_record_id(input_data.item_id),
                     "embedding": embedding,
                 },
             )
+            await vector_store.record_vectors("source_insight", updated)
             logger.info(f"Insight embedded: {input_data.item_id}")
 
         else:
@@ -205,6 +253,8 @@ async def embed_chunk_command(
 
     This command is designed to be submitted as a background job for each chunk
     of a source document, allowing natural concurrency control through the worker pool.
+    vectorize_source now submits embed_chunk_batch jobs instead; this command is
+    kept so that jobs queued by earlier versions still run.
 
     Retry Strategy:
     - Retries up to 5 times for transient failures:
@@ -231,10 +281,11 @@ async def embed_chunk_command(
             )
 
         # Generate embedding for the chunk
-        embedding = (await EMBEDDING_MODEL.aembed([input_data.chunk_text]))[0]
+        embedding = (await cached_embed(EMBEDDING_MODEL, [input_data.chunk_text]))[0]
+        await prepare_vector_write(len(embedding))
 
         # Insert chunk embedding into database
-        await repo_query(
+        created = await repo_query(
             """
             CREATE source_embedding CONTENT {
                 "source": $source_id,
@@ -250,6 +301,8 @@ async def embed_chunk_command(
                 "embedding": embedding,
             },
         )
+        await vector_store.record_vectors("source_embedding", created)
+        await add_embedded_chunks(input_data.source_id, len(created))
 
         logger.debug(
             f"Successfully embedded chunk {input_data.chunk_index} for source {input_data.source_id}"
@@ -288,18 +341,122 @@ async def embed_chunk_command(
         )
 
 
+@command(
+    "embed_chunk_batch",
+    app="open_notebook",
+    retry={
+        "max_attempts": 5,
+        "wait_strategy": "exponential_jitter",
+        "wait_min": 1,
+        "wait_max": 30,
+        "retry_on": [RuntimeError, ConnectionError, TimeoutError],
+    },
+)
+async def embed_chunk_batch_command(
+    input_data: EmbedChunkBatchInput,
+) -> EmbedChunkBatchOutput:
+    """
+    Embed a batch of consecutive chunks of a source with one provider call and
+    store them with one bulk insert.
+
+    Chunk i of the batch is stored with order ``start_index + i``. A retry
+    re-runs the whole batch; nothing is written until every chunk is embedded,
+    so a failed attempt never leaves a partial batch behind.
+
+    Retry Strategy:
+    - Same policy as embed_chunk: up to 5 attempts with exponential-jitter
+      backoff (1-30s) on RuntimeError (SurrealDB transaction conflicts),
+      ConnectionError and TimeoutError (embedding provider failures)
+    - ValueError and other exceptions are returned as permanent failures
+    """
+    batch_range = (
+        f"{input_data.start_index}-{input_data.start_index + len(input_data.chunks) - 1}"
+    )
+    try:
+        logger.debug(
+            f"Processing chunks {batch_range} for source {input_data.source_id}"
+        )
+
+        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        if not EMBEDDING_MODEL:
+            raise ValueError(
+                "No embedding model configured. Please configure one in the Models section."
+            )
+
+        embeddings = await cached_embed(EMBEDDING_MODEL, input_data.chunks)
+        if len(embeddings) != len(input_data.chunks):
+            raise ValueError(
+                f"Embedding model returned {len(embeddings)} vectors for {len(input_data.chunks)} chunks"
+            )
+        await prepare_vector_write(len(embeddings[0]))
+
+        source_id = ensure_record_id(input_data.source_id)
+        inserted = await repo_insert(
+            "source_embedding",
+            [
+                {
+                    "source": source_id,
+                    "order": input_data.start_index + offset,
+                    "content": chunk_text,
+                    "embedding": embedding,
+                }
+                for offset, (chunk_text, embedding) in enumerate(
+                    zip(input_data.chunks, embeddings)
+                )
+            ],
+        )
+        await vector_store.record_vectors("source_embedding", inserted)
+        await add_embedded_chunks(input_data.source_id, len(inserted))
+
+        logger.debug(
+            f"Successfully embedded chunks {batch_range} for source {input_data.source_id}"
+        )
+
+        return EmbedChunkBatchOutput(
+            success=True,
+            source_id=input_data.source_id,
+            start_index=input_data.start_index,
+            chunks_embedded=len(input_data.chunks),
+        )
+
+    except RuntimeError:
+        logger.warning(
+            f"Transaction conflict for chunks {batch_range} - will be retried by retry mechanism"
+        )
+        raise
+    except (ConnectionError, TimeoutError) as e:
+        logger.warning(
+            f"Network/timeout error for chunks {batch_range} ({type(e).__name__}: {e}) - will be retried by retry mechanism"
+        )
+        raise
+    except Exception as e:
+        logger.error(
+            f"Failed to embed chunks {batch_range} for source {input_data.source_id}: {e}"
+        )
+        logger.exception(e)
+
+        return EmbedChunkBatchOutput(
+            success=False,
+            source_id=input_data.source_id,
+            start_index=input_data.start_index,
+            error_message=str(e),
+        )
+
+
 @command("vectorize_source", app="open_notebook", retry=None)
 async def vectorize_source_command(
     input_data: VectorizeSourceInput,
 ) -> VectorizeSourceOutput:
     """
     Orchestrate source vectorization by splitting text into chunks and submitting
-    individual embed_chunk jobs to the worker queue.
+    batched embed_chunk_batch jobs to the worker queue.
 
     This command:
     1. Deletes existing embeddings (idempotency)
     2. Splits source text into chunks
-    3. Submits each chunk as a separate embed_chunk job
+    3. Groups chunks into batches (EMBEDDING_BATCH_SIZE texts,
+       EMBEDDING_BATCH_MAX_TOKENS tokens) and submits one embed_chunk_batch
+       job per batch
     4. Returns immediately (jobs run in background)
 
     Natural concurrency control is provided by the worker pool size.
@@ -307,7 +464,7 @@ async def vectorize_source_command(
     Retry Strategy:
     - Retries disabled (retry=None) - fails fast on job submission errors
     - This ensures immediate visibility when orchestration fails
-    - Individual embed_chunk jobs have their own retry logic for DB conflicts
+    - Individual embed_chunk_batch jobs have their own retry logic for DB conflicts
     """
     start_time = time.time()
 
@@ -328,6 +485,10 @@ async def vectorize_source_command(
             "DELETE source_embedding WHERE source = $source_id",
             {"source_id": ensure_record_id(input_data.source_id)}
         )
+        await vector_store.forget_source_vectors(
+            input_data.source_id, tables=("source_embedding",)
+        )
+        await set_embedded_chunks(input_data.source_id, 0)
         deleted_count = len(delete_result) if delete_result else 0
         if deleted_count > 0:
             logger.info(f"Deleted {deleted_count} existing embeddings")
@@ -341,35 +502,44 @@ async def vectorize_source_command(
         if total_chunks == 0:
             raise ValueError("No chunks created after splitting text")
 
-        # 4. Submit each chunk as a separate job
-        logger.info(f"Submitting {total_chunks} chunk jobs to worker queue")
+        # 4. Submit one job per batch of chunks
+        batches = batch_chunks(
+            chunks,
+            max_texts=EMBEDDING_BATCH_SIZE,
+            max_tokens=EMBEDDING_BATCH_MAX_TOKENS,
+        )
+        logger.info(
+            f"Submitting {len(batches)} batch jobs ({total_chunks} chunks) to worker queue"
+        )
         jobs_submitted = 0
+        start_index = 0
 
-        for idx, chunk_text in enumerate(chunks):
+        for batch_number, batch in enumerate(batches, 1):
             try:
-                job_id = submit_command(
+                submit_command(
                     "open_notebook",  # app name
-                    "embed_chunk",    # command name
+                    "embed_chunk_batch",  # command name
                     {
                         "source_id": input_data.source_id,
-                        "chunk_index": idx,
-                        "chunk_text": chunk_text,
-                    }
+                        "start_index": start_index,
+                        "chunks": batch,
+                    },
                 )
                 jobs_submitted += 1
 
-                if (idx + 1) % 100 == 0:
-                    logger.info(f"  Submitted {idx + 1}/{total_chunks} chunk jobs")
+                if batch_number % 20 == 0:
+                    logger.info(f"  Submitted {batch_number}/{len(batches)} batch jobs")
 
             except Exception as e:
-                logger.error(f"Failed to submit chunk job {idx}: {e}")
-                # Continue submitting other chunks even if one fails
+                logger.error(f"Failed to submit batch job starting at chunk {start_index}: {e}")
+                # Continue submitting other batches even if one fails
+            start_index += len(batch)
 
         processing_time = time.time() - start_time
 
         logger.info(
             f"Vectorization orchestration complete for source {input_data.source_id}: "
-            f"{jobs_submitted}/{total_chunks} jobs submitted in {processing_time:.2f}s"
+            f"{jobs_submitted}/{len(batches)} batch jobs submitted in {processing_time:.2f}s"
         )
 
         return VectorizeSourceOutput(
@@ -377,6 +547,7 @@ async def vectorize_source_command(
             source_id=input_data.source_id,
             total_chunks=total_chunks,
             jobs_submitted=jobs_submitted,
+            batches=len(batches),
             processing_time=processing_time,
         )
 
@@ -459,9 +630,108 @@ async def collect_items_for_rebuild(
         items["insights"] = [str(item["id"]) for item in result] if result else []
         logger.info(f"Collected {len(items['insights'])} insights for rebuild")
 
+    # Processed in id order, so a checkpoint cursor marks everything before it
+    for ids in items.values():
+        ids.sort()
     return items
 
 
+async def rebuild_source_embeddings(source_id: str, embedding_model) -> int:
+    """
+    Re-split and re-embed one source, replacing its chunks with bulk inserts.
+
+    The old chunks are only deleted once every new chunk is embedded, so a
+    failure leaves the source searchable. Returns the number of chunks.
+    """
+    record_id = ensure_record_id(source_id)
+    result = await repo_query("SELECT full_text FROM $source_id", {"source_id": record_id})
+    if not result:
+        raise ValueError(f"Source '{source_id}' not found")
+    full_text = result[0].get("full_text")
+    if not full_text:
+        raise ValueError(f"Source {source_id} has no text to vectorize")
+
+    chunks = await asyncio.to_thread(split_text, full_text)
+    if not chunks:
+        raise ValueError("No chunks created after splitting text")
+
+    embeddings: List[List[float]] = []
+    for batch in batch_chunks(
+        chunks, max_texts=EMBEDDING_BATCH_SIZE, max_tokens=EMBEDDING_BATCH_MAX_TOKENS
+    ):
+        embeddings.extend(await cached_embed(embedding_model, batch))
+    if len(embeddings) != len(chunks):
+        raise ValueError(
+            f"Embedding model returned {len(embeddings)} vectors for {len(chunks)} chunks"
+        )
+    await prepare_vector_write(len(embeddings[0]))
+
+    await repo_query(
+        "DELETE source_embedding WHERE source = $source_id", {"source_id": record_id}
+    )
+    await vector_store.forget_source_vectors(source_id, tables=("source_embedding",))
+    await set_embedded_chunks(source_id, 0)
+    rows = [
+        {"source": record_id, "order": order, "content": chunk, "embedding": embedding}
+        for order, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+    for start in range(0, len(rows), REBUILD_INSERT_BATCH):
+        inserted = await repo_insert(
+            "source_embedding", rows[start : start + REBUILD_INSERT_BATCH]
+        )
+        await vector_store.record_vectors("source_embedding", inserted)
+        await add_embedded_chunks(source_id, len(inserted))
+    return len(chunks)
+
+
+async def rebuild_content_embeddings(
+    table: Literal["note", "source_insight"],
+    ids: List[str],
+    embedding_model,
+    slots: asyncio.Semaphore,
+) -> int:
+    """
+    Re-embed the content of a page of notes or insights.
+
+    Contents are embedded in batches (up to REBUILD_CONCURRENCY provider calls
+    at once) and written back with a single query. Items without content get
+    their embedding cleared. Returns the number of items that no longer exist.
+    """
+    parent = ", source" if table == "source_insight" else ""
+    rows = await repo_query(
+        f"SELECT id, content{parent} FROM $ids",
+        {"ids": [ensure_record_id(item_id) for item_id in ids]},
+    )
+    texts = [row["content"] for row in rows if row.get("content")]
+
+    async def embed(batch: List[str]) -> List[List[float]]:
+        async with slots:
+            return await cached_embed(embedding_model, batch)
+
+    batches = batch_chunks(
+        texts, max_texts=EMBEDDING_BATCH_SIZE, max_tokens=EMBEDDING_BATCH_MAX_TOKENS
+    )
+    results = await asyncio.gather(*(embed(batch) for batch in batches))
+    vectors = [vector for result in results for vector in result]
+    if vectors:
+        await prepare_vector_write(len(vectors[0]))
+    embedded = iter(vectors)
+    for row in rows:
+        row["embedding"] = next(embedded) if row.get("content") else None
+
+    await repo_query(
+        "FOR $row IN $rows { UPDATE $row.id SET embedding = $row.embedding; };",
+        {
+            "rows": [
+                {"id": ensure_record_id(row["id"]), "embedding": row["embedding"]}
+                for row in rows
+            ]
+        },
+    )
+    await vector_store.record_vectors(table, rows)
+    return len(ids) - len(rows)
+
+
 @command("rebuild_embeddings", app="open_notebook", retry=None)
 async def rebuild_embeddings_command(
     input_data: RebuildEmbeddingsInput,
@@ -469,12 +739,29 @@ async def rebuild_embeddings_command(
     """
     Rebuild embeddings for sources, notes, and/or insights
 
+    Items are processed in id order, one page (REBUILD_PAGE_SIZE items) at a
+    time: up to REBUILD_CONCURRENCY sources are re-embedded at once, notes and
+    insights are embedded in batches and written back in bulk. After each page
+    the checkpoint (open_notebook:embedding_rebuild) records the last id per
+    item type and the progress shown by the status endpoint.
+
+    A rebuild with the same mode, include flags and embedding model as an
+    unfinished one resumes after its cursors (unless resume is false).
+
     Retry Strategy:
     - Retries disabled (retry=None) - batch failures are immediately reported
-    - This ensures immediate visibility when batch operations fail
-    - Allows operators to quickly identify and resolve issues
+    - Items that fail on their own (missing, no text) are counted and skipped
+    - Provider/network errors (ConnectionError, TimeoutError) stop the rebuild
+      without moving the checkpoint past the failing page; starting the
+      rebuild again resumes from there
     """
     start_time = time.time()
+    command_id = (
+        input_data.execution_context.command_id
+        if input_data.execution_context
+        else None
+    )
+    checkpoint: Optional[RebuildCheckpoint] = None
 
     try:
         logger.info("=" * 60)
@@ -491,6 +778,24 @@ async def rebuild_embeddings_command(
 
         logger.info(f"Using embedding model: {EMBEDDING_MODEL}")
 
+        key = {
+            "mode": input_data.mode,
+            "include_sources": input_data.include_sources,
+            "include_notes": input_data.include_notes,
+            "include_insights": input_data.include_insights,
+            "model": model_key(EMBEDDING_MODEL),
+        }
+        previous = await load_rebuild_checkpoint() if input_data.resume else None
+        resumed = previous is not None and previous.can_resume(key)
+        if resumed:
+            checkpoint = previous
+            checkpoint.resume(command_id)
+            logger.info(
+                f"Resuming previous rebuild after {checkpoint.done_items} items: {checkpoint.cursors}"
+            )
+        else:
+            checkpoint = RebuildCheckpoint(command_id=command_id, key=key)
+
         # Collect items to process
         items = await collect_items_for_rebuild(
             input_data.mode,
@@ -498,123 +803,109 @@ async def rebuild_embeddings_command(
             input_data.include_notes,
             input_data.include_insights,
         )
-
-        total_items = (
-            len(items["sources"]) + len(items["notes"]) + len(items["insights"])
-        )
-        logger.info(f"Total items to process: {total_items}")
-
-        if total_items == 0:
+        for item_type, ids in items.items():
+            cursor = checkpoint.cursors.get(item_type)
+            if cursor:
+                ids = [item_id for item_id in ids if item_id > cursor]
+            # The interrupted page, whatever happened to its items since
+            pending = checkpoint.pending.get(item_type, [])
+            items[item_type] = sorted(set(ids).union(pending))
+
+        remaining = sum(len(ids) for ids in items.values())
+        checkpoint.total_items = checkpoint.done_items + remaining
+        logger.info(f"Total items to process: {remaining}")
+        await save_rebuild_checkpoint(checkpoint)
+
+        if checkpoint.total_items == 0:
             logger.warning("No items found to rebuild")
-            return RebuildEmbeddingsOutput(
-                success=True,
-                total_items=0,
-                processed_items=0,
-                failed_items=0,
-                processing_time=time.time() - start_time,
-            )
-
-        # Initialize counters
-        sources_processed = 0
-        notes_processed = 0
-        insights_processed = 0
-        failed_items = 0
 
-        # Process sources
-        logger.info(f"\nProcessing {len(items['sources'])} sources...")
-        for idx, source_id in enumerate(items["sources"], 1):
-            try:
-                source = await Source.get(source_id)
-                if not source:
-                    logger.warning(f"Source {source_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                await source.vectorize()
-                sources_processed += 1
-
-                if idx % 10 == 0 or idx == len(items["sources"]):
-                    logger.info(
-                        f"  Progress: {idx}/{len(items['sources'])} sources processed"
-                    )
-
-            except Exception as e:
-                logger.error(f"Failed to re-embed source {source_id}: {e}")
-                failed_items += 1
-
-        # Process notes
-        logger.info(f"\nProcessing {len(items['notes'])} notes...")
-        for idx, note_id in enumerate(items["notes"], 1):
-            try:
-                note = await Note.get(note_id)
-                if not note:
-                    logger.warning(f"Note {note_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                await note.save()  # Auto-embeds via ObjectModel.save()
-                notes_processed += 1
-
-                if idx % 10 == 0 or idx == len(items["notes"]):
-                    logger.info(f"  Progress: {idx}/{len(items['notes'])} notes processed")
-
-            except Exception as e:
-                logger.error(f"Failed to re-embed note {note_id}: {e}")
-                failed_items += 1
-
-        # Process insights
-        logger.info(f"\nProcessing {len(items['insights'])} insights...")
-        for idx, insight_id in enumerate(items["insights"], 1):
-            try:
-                insight = await SourceInsight.get(insight_id)
-                if not insight:
-                    logger.warning(f"Insight {insight_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                # Re-generate embedding
-                embedding = (await EMBEDDING_MODEL.aembed([insight.content]))[0]
-
-                # Update insight with new embedding
-                await repo_query(
-                    "UPDATE $insight_id SET embedding = $embedding",
-                    {
-                        "insight_id": ensure_record_id(insight_id),
-                        "embedding": embedding,
-                    },
+        slots = asyncio.Semaphore(REBUILD_CONCURRENCY)
+
+        async def rebuild_source(source_id: str) -> bool:
+            async with slots:
+                try:
+                    await rebuild_source_embeddings(source_id, EMBEDDING_MODEL)
+                    return True
+                except (ConnectionError, TimeoutError):
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to re-embed source {source_id}: {e}")
+                    return False
+
+        for item_type in ("sources", "notes", "insights"):
+            ids = items[item_type]
+            if not ids:
+                continue
+            logger.info(f"Processing {len(ids)} {item_type}...")
+            for start in range(0, len(ids), REBUILD_PAGE_SIZE):
+                page = ids[start : start + REBUILD_PAGE_SIZE]
+                checkpoint.pending[item_type] = page
+                await save_rebuild_checkpoint(checkpoint)
+                if item_type == "sources":
+                    # A provider error cancels (and awaits) the rest of the
+                    # page before the checkpoint is saved as failed
+                    try:
+                        async with asyncio.TaskGroup() as group:
+                            tasks = [group.create_task(rebuild_source(i)) for i in page]
+                    except ExceptionGroup as errors:
+                        raise errors.exceptions[0] from None
+                    failed = [task.result() for task in tasks].count(False)
+                else:
+                    table = "note" if item_type == "notes" else "source_insight"
+                    try:
+                        failed = await rebuild_content_embeddings(
+                            table, page, EMBEDDING_MODEL, slots
+                        )
+                        if failed:
+                            logger.warning(f"{failed} {item_type} not found, skipping")
+                    except (ConnectionError, TimeoutError):
+                        raise
+                    except Exception as e:
+                        logger.error(f"Failed to re-embed {item_type} {page[0]}..{page[-1]}: {e}")
+                        failed = len(page)
+
+                processed = len(page) - failed
+                setattr(
+                    checkpoint,
+                    f"{item_type}_processed",
+                    getattr(checkpoint, f"{item_type}_processed") + processed,
+                )
+                checkpoint.processed_items += processed
+                checkpoint.failed_items += failed
+                checkpoint.cursors[item_type] = page[-1]
+                checkpoint.pending.pop(item_type, None)
+                await save_rebuild_checkpoint(checkpoint)
+                logger.info(
+                    f"  Progress: {checkpoint.done_items}/{checkpoint.total_items} items "
+                    f"({checkpoint.items_per_second:.1f}/s, ETA {checkpoint.eta_seconds or 0:.0f}s)"
                 )
-                insights_processed += 1
-
-                if idx % 10 == 0 or idx == len(items["insights"]):
-                    logger.info(
-                        f"  Progress: {idx}/{len(items['insights'])} insights processed"
-                    )
-
-            except Exception as e:
-                logger.error(f"Failed to re-embed insight {insight_id}: {e}")
-                failed_items += 1
 
+        checkpoint.status = "completed"
+        await save_rebuild_checkpoint(checkpoint)
+        # Every vector now has the new model's dimension: build its indexes
+        await warm_vector_indexes()
         processing_time = time.time() - start_time
-        processed_items = sources_processed + notes_processed + insights_processed
 
         logger.info("=" * 60)
         logger.info("REBUILD COMPLETE")
-        logger.info(f"  Total processed: {processed_items}/{total_items}")
-        logger.info(f"  Sources: {sources_processed}")
-        logger.info(f"  Notes: {notes_processed}")
-        logger.info(f"  Insights: {insights_processed}")
-        logger.info(f"  Failed: {failed_items}")
-        logger.info(f"  Time: {processing_time:.2f}s")
+        logger.info(f"  Total processed: {checkpoint.processed_items}/{checkpoint.total_items}")
+        logger.info(f"  Sources: {checkpoint.sources_processed}")
+        logger.info(f"  Notes: {checkpoint.notes_processed}")
+        logger.info(f"  Insights: {checkpoint.insights_processed}")
+        logger.info(f"  Failed: {checkpoint.failed_items}")
+        logger.info(f"  Time: {processing_time:.2f}s ({checkpoint.items_per_second:.1f} items/s)")
         logger.info("=" * 60)
 
         return RebuildEmbeddingsOutput(
             success=True,
-            total_items=total_items,
-            processed_items=processed_items,
-            failed_items=failed_items,
-            sources_processed=sources_processed,
-            notes_processed=notes_processed,
-            insights_processed=insights_processed,
+            total_items=checkpoint.total_items,
+            processed_items=checkpoint.processed_items,
+            failed_items=checkpoint.failed_items,
+            sources_processed=checkpoint.sources_processed,
+            notes_processed=checkpoint.notes_processed,
+            insights_processed=checkpoint.insights_processed,
+            resumed=resumed,
+            items_per_second=checkpoint.items_per_second,
             processing_time=processing_time,
         )
 
@@ -623,11 +914,19 @@ async def rebuild_embeddings_command(
         logger.error(f"Rebuild embeddings failed: {e}")
         logger.exception(e)
 
+        if checkpoint is not None:
+            checkpoint.status = "failed"
+            checkpoint.error_message = str(e)
+            try:
+                await save_rebuild_checkpoint(checkpoint)
+            except Exception as save_error:
+                logger.warning(f"Could not save rebuild checkpoint: {save_error}")
+
         return RebuildEmbeddingsOutput(
             success=False,
-            total_items=0,
-            processed_items=0,
-            failed_items=0,
+            total_items=checkpoint.total_items if checkpoint else 0,
+            processed_items=checkpoint.processed_items if checkpoint else 0,
+            failed_items=checkpoint.failed_items if checkpoint else 0,
             processing_time=processing_time,
             error_message=str(e),
         )
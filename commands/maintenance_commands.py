@@ -0,0 +1,51 @@
+import time
+from typing import Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.database.counters import repair_counters
+
+
+class RepairCountersInput(CommandInput):
+    pass
+
+
+class RepairCountersOutput(CommandOutput):
+    success: bool
+    sources_repaired: int = 0
+    notebooks_repaired: int = 0
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("repair_counters", app="open_notebook", retry=None)
+async def repair_counters_command(
+    input_data: RepairCountersInput,
+) -> RepairCountersOutput:
+    """
+    Recompute the stored counters (source insights_count / embedded_chunks,
+    notebook source_count / note_count) from the underlying rows and rewrite
+    the ones that drifted. Safe to run at any time.
+    """
+    start_time = time.time()
+    try:
+        repaired = await repair_counters()
+        logger.info(
+            f"Repaired counters on {repaired.get('sources', 0)} sources and "
+            f"{repaired.get('notebooks', 0)} notebooks"
+        )
+        return RepairCountersOutput(
+            success=True,
+            sources_repaired=repaired.get("sources", 0),
+            notebooks_repaired=repaired.get("notebooks", 0),
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Failed to repair counters: {e}")
+        logger.exception(e)
+        return RepairCountersOutput(
+            success=False,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
@@ -81,7 +81,7 @@ async def process_source_command(
         logger.info(f"Loaded {len(transformations)} transformations")
 
         # 2. Get existing source record to update its command field
-        source = await Source.get(input_data.source_id)
+        source = await Source.get(input_data.source_id, omit=["full_text"])
         if not source:
             raise ValueError(f"Source '{input_data.source_id}' not found")
 
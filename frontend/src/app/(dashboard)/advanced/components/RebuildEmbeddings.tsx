@@ -106,6 +106,8 @@ export function RebuildEmbeddings() {
   const processedItems = progressData?.processed_items ?? progressData?.processed ?? 0
   const derivedProgressPercent = progressData?.percentage ?? (totalItems > 0 ? (processedItems / totalItems) * 100 : 0)
   const progressPercent = Number.isFinite(derivedProgressPercent) ? derivedProgressPercent : 0
+  const itemsPerSecond = progressData?.items_per_second
+  const etaSeconds = progressData?.eta_seconds
 
   const sourcesProcessed = stats?.sources_processed ?? stats?.sources ?? 0
   const notesProcessed = stats?.notes_processed ?? stats?.notes ?? 0
@@ -258,6 +260,12 @@ export function RebuildEmbeddings() {
                   </span>
                 </div>
                 <Progress value={progressPercent} className="h-2" />
+                {status.status === 'running' && itemsPerSecond !== undefined && (
+                  <p className="text-sm text-muted-foreground">
+                    {itemsPerSecond.toFixed(1)} items/s
+                    {etaSeconds != null && ` · about ${Math.ceil(etaSeconds / 60)} min remaining`}
+                  </p>
+                )}
                 {failedItems > 0 && (
                   <p className="text-sm text-yellow-600">
                     ⚠️ {failedItems} items failed to process
@@ -30,7 +30,7 @@ export default function SourcesPage() {
   const router = useRouter()
   const tableRef = useRef<HTMLTableElement>(null)
   const scrollContainerRef = useRef<HTMLDivElement>(null)
-  const offsetRef = useRef(0)
+  const cursorRef = useRef<string | undefined>(undefined)
   const loadingMoreRef = useRef(false)
   const hasMoreRef = useRef(true)
   const PAGE_SIZE = 30
@@ -44,7 +44,7 @@ export default function SourcesPage() {
 
       if (reset) {
         setLoading(true)
-        offsetRef.current = 0
+        cursorRef.current = undefined
         setSources([])
         hasMoreRef.current = true
       } else {
@@ -52,9 +52,9 @@ export default function SourcesPage() {
         setLoadingMore(true)
       }
 
-      const data = await sourcesApi.list({
+      const { items: data, nextCursor } = await sourcesApi.listPage({
         limit: PAGE_SIZE,
-        offset: offsetRef.current,
+        cursor: cursorRef.current,
         sort_by: sortBy,
         sort_order: sortOrder,
       })
@@ -66,9 +66,8 @@ export default function SourcesPage() {
       }
 
       // Check if we have more data
-      const hasMoreData = data.length === PAGE_SIZE
-      hasMoreRef.current = hasMoreData
-      offsetRef.current += data.length
+      hasMoreRef.current = !!nextCursor
+      cursorRef.current = nextCursor
     } catch (err) {
       console.error('Failed to fetch sources:', err)
       setError('Failed to load sources')
@@ -18,6 +18,7 @@ export interface RebuildEmbeddingsRequest {
   include_sources?: boolean
   include_notes?: boolean
   include_insights?: boolean
+  resume?: boolean
 }
 
 export interface RebuildEmbeddingsResponse {
@@ -33,6 +34,8 @@ export interface RebuildProgress {
   total?: number
   processed?: number
   percentage?: number
+  items_per_second?: number
+  eta_seconds?: number | null
 }
 
 export interface RebuildStats {
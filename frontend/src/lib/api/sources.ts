@@ -22,6 +22,21 @@ export const sourcesApi = {
     return response.data
   },
 
+  // One keyset page; pass the returned nextCursor to get the following one
+  listPage: async (params: {
+    notebook_id?: string
+    limit?: number
+    cursor?: string
+    sort_by?: 'created' | 'updated'
+    sort_order?: 'asc' | 'desc'
+  }): Promise<{ items: SourceListResponse[]; nextCursor?: string }> => {
+    const response = await apiClient.get<SourceListResponse[]>('/sources', { params })
+    return {
+      items: response.data,
+      nextCursor: response.headers['x-next-cursor'] || undefined,
+    }
+  },
+
   get: async (id: string) => {
     const response = await apiClient.get<SourceDetailResponse>(`/sources/${id}`)
     return response.data
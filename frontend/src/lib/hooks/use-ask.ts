@@ -3,7 +3,7 @@
 import { useState, useCallback } from 'react'
 import { toast } from 'sonner'
 import { searchApi } from '@/lib/api/search'
-import { AskStreamEvent } from '@/lib/types/search'
+import { AskMode, AskStreamEvent } from '@/lib/types/search'
 
 interface AskModels {
   strategy: string
@@ -33,14 +33,15 @@ export function useAsk() {
     error: null
   })
 
-  const sendAsk = useCallback(async (question: string, models: AskModels) => {
+  const sendAsk = useCallback(async (question: string, models: AskModels, mode: AskMode = 'full') => {
     // Validate inputs
     if (!question.trim()) {
       toast.error('Please enter a question')
       return
     }
 
-    if (!models.strategy || !models.answer || !models.finalAnswer) {
+    const needsAllModels = mode === 'full'
+    if (!models.finalAnswer || (needsAllModels && (!models.strategy || !models.answer))) {
       toast.error('Please configure all required models')
       return
     }
@@ -59,7 +60,8 @@ export function useAsk() {
         question,
         strategy_model: models.strategy,
         answer_model: models.answer,
-        final_answer_model: models.finalAnswer
+        final_answer_model: models.finalAnswer,
+        mode
       })
 
       if (!response) {
@@ -104,6 +106,11 @@ export function useAsk() {
                   ...prev,
                   answers: [...prev.answers, data.content || '']
                 }))
+              } else if (data.type === 'final_answer_token') {
+                setState(prev => ({
+                  ...prev,
+                  finalAnswer: (prev.finalAnswer || '') + (data.content || '')
+                }))
               } else if (data.type === 'final_answer') {
                 setState(prev => ({
                   ...prev,
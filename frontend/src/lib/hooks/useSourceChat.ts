@@ -150,7 +150,7 @@ export function useSourceChat(sourceId: string) {
             try {
               const data = JSON.parse(line.slice(6))
               
-              if (data.type === 'ai_message') {
+              if (data.type === 'ai_token' || data.type === 'ai_message') {
                 // Create AI message on first content chunk to avoid empty bubble
                 if (!aiMessage) {
                   aiMessage = {
@@ -161,7 +161,10 @@ export function useSourceChat(sourceId: string) {
                   }
                   setMessages(prev => [...prev, aiMessage!])
                 } else {
-                  aiMessage.content += data.content || ''
+                  // Tokens are deltas; the final ai_message carries the full text
+                  aiMessage.content = data.type === 'ai_token'
+                    ? aiMessage.content + (data.content || '')
+                    : data.content || ''
                   setMessages(prev =>
                     prev.map(msg => msg.id === aiMessage!.id
                       ? { ...msg, content: aiMessage!.content }
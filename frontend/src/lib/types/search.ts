@@ -1,11 +1,13 @@
 // Search types
 export interface SearchRequest {
   query: string
-  type: 'text' | 'vector'
+  type: 'text' | 'vector' | 'hybrid'
   limit: number
   search_sources: boolean
   search_notes: boolean
   minimum_score: number
+  text_weight?: number
+  vector_weight?: number
 }
 
 export interface SearchResult {
@@ -32,11 +34,17 @@ export interface SearchResponse {
 // Ask types
 export interface AskRequest {
   question: string
-  strategy_model: string
-  answer_model: string
+  strategy_model?: string
+  answer_model?: string
   final_answer_model: string
+  search_type?: 'vector' | 'hybrid'
+  // 'fast' skips the strategy and per-search answers (only final_answer_model is needed)
+  mode?: AskMode
 }
 
+export type AskMode = 'full' | 'fast'
+
+
 export interface AskResponse {
   answer: string
   question: string
@@ -52,7 +60,7 @@ export interface StrategyData {
 }
 
 export interface AskStreamEvent {
-  type: 'strategy' | 'answer' | 'final_answer' | 'complete' | 'error'
+  type: 'strategy' | 'answer' | 'final_answer_token' | 'final_answer' | 'complete' | 'error'
   reasoning?: string
   searches?: Array<{ term: string; instructions: string }>
   content?: string
@@ -0,0 +1,38 @@
+"""
+Counters stored on source and notebook rows for the list endpoints.
+
+insights_count, source_count and note_count are kept by SurrealDB events on
+source_insight, reference and artifact (migrations/11.surrealql). Source
+chunks are written in bulk by the embedding commands, which keep
+embedded_chunks with the functions below; source.embedded is derived from it.
+Counter writes leave the rows' updated time alone.
+
+repair_counters() recomputes every counter and rewrites the ones that drifted
+(e.g. rows written while the events were not defined).
+"""
+
+from typing import Dict
+
+from .repository import ensure_record_id, repo_query
+
+
+async def add_embedded_chunks(source_id: str, count: int) -> None:
+    """Count `count` chunks just stored for the source."""
+    await repo_query(
+        "RETURN fn::add_embedded_chunks($source_id, $count);",
+        {"source_id": ensure_record_id(source_id), "count": count},
+    )
+
+
+async def set_embedded_chunks(source_id: str, count: int) -> None:
+    """Set the source's chunk count (0 after its chunks are deleted)."""
+    await repo_query(
+        "RETURN fn::set_embedded_chunks($source_id, $count);",
+        {"source_id": ensure_record_id(source_id), "count": count},
+    )
+
+
+async def repair_counters() -> Dict[str, int]:
+    """Recompute all counters; returns how many sources and notebooks were fixed."""
+    result = await repo_query("RETURN fn::repair_counters();")
+    return result if isinstance(result, dict) else {"sources": 0, "notebooks": 0}
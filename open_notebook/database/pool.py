@@ -0,0 +1,222 @@
+"""
+Async connection pool for SurrealDB.
+
+Connections are opened, signed in and bound to a namespace/database once, then
+reused across queries instead of paying for a new socket handshake per call.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+from surrealdb import AsyncSurreal  # type: ignore
+
+
+@dataclass
+class PooledConnection:
+    """A live SurrealDB connection plus the bookkeeping the pool needs."""
+
+    db: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SurrealConnectionPool:
+    """
+    Bounded pool of authenticated SurrealDB connections.
+
+    - Keeps at least ``min_size`` connections open once started
+    - Never holds more than ``max_size`` connections at a time
+    - Pings connections that have been idle longer than ``health_check_interval``
+      before handing them out, replacing the ones that no longer respond
+    - Discards a connection (and opens a fresh one on demand) when a query on it
+      fails and the connection does not pass a health check afterwards
+
+    A pool is bound to the event loop it was started on, because the underlying
+    websocket connections are.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        username: Optional[str],
+        password: Optional[str],
+        namespace: Optional[str],
+        database: Optional[str],
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self.url = url
+        self.username = username
+        self.password = password
+        self.namespace = namespace
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: List[PooledConnection] = []
+        self._in_use = 0
+        self._closed = False
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.connections_opened = 0
+        self.connections_discarded = 0
+        self.acquisitions = 0
+
+    @property
+    def size(self) -> int:
+        """Number of connections currently owned by the pool (idle + in use)."""
+        return len(self._idle) + self._in_use
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "connections_opened": self.connections_opened,
+            "connections_discarded": self.connections_discarded,
+            "acquisitions": self.acquisitions,
+        }
+
+    async def start(self) -> None:
+        """Bind the pool to the running loop and open ``min_size`` connections."""
+        self._bind_loop()
+        while self.size < self.min_size:
+            self._idle.append(await self._open_connection())
+        logger.info(
+            f"SurrealDB connection pool started ({self.size} connections, max {self.max_size})"
+        )
+
+    async def close(self) -> None:
+        """Close every idle connection and refuse further acquisitions.
+
+        Connections that are still borrowed are closed when they are released.
+        """
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._close_connection(conn)
+        logger.info("SurrealDB connection pool closed")
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """Borrow a connection for the duration of the ``async with`` block."""
+        conn = await self._acquire()
+        failed = False
+        try:
+            yield conn.db
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self._release(conn, failed)
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+            self._slots = asyncio.Semaphore(self.max_size)
+        elif self.loop is not loop:
+            raise RuntimeError("Connection pool used from a different event loop")
+
+    async def _acquire(self) -> PooledConnection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        self._bind_loop()
+        assert self._slots is not None
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Timed out waiting for a database connection (pool size {self.max_size})"
+            )
+
+        try:
+            conn: Optional[PooledConnection] = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if await self._is_healthy(candidate):
+                    conn = candidate
+                    break
+                await self._discard(candidate)
+            if conn is None:
+                conn = await self._open_connection()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._in_use += 1
+        self.acquisitions += 1
+        return conn
+
+    async def _release(self, conn: PooledConnection, failed: bool) -> None:
+        assert self._slots is not None
+        self._in_use -= 1
+        try:
+            if self._closed or (failed and not await self._ping(conn)):
+                await self._discard(conn)
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    async def _is_healthy(self, conn: PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        return await self._ping(conn)
+
+    async def _ping(self, conn: PooledConnection) -> bool:
+        try:
+            await asyncio.wait_for(conn.db.query("RETURN true;"), timeout=5)
+            conn.last_used = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            return False
+
+    async def _discard(self, conn: PooledConnection) -> None:
+        self.connections_discarded += 1
+        await self._close_connection(conn)
+
+    async def _open_connection(self) -> PooledConnection:
+        db = AsyncSurreal(self.url)
+        try:
+            await db.signin({"username": self.username, "password": self.password})
+            await db.use(self.namespace, self.database)
+        except Exception:
+            await self._close_connection(PooledConnection(db=db))
+            raise
+        self.connections_opened += 1
+        return PooledConnection(db=db)
+
+    async def _close_connection(self, conn: PooledConnection) -> None:
+        try:
+            await conn.db.close()
+        except Exception as e:
+            logger.debug(f"Error closing database connection: {e}")
@@ -0,0 +1,99 @@
+"""
+Checkpoint and live progress of the embedding rebuild.
+
+A single record (open_notebook:embedding_rebuild) holds the state of the last
+rebuild: its parameters, the last processed id per item type and running
+counters. rebuild_embeddings writes it after every page of items, so:
+
+- a rebuild started with the same parameters and embedding model after an
+  interrupted one (worker restart, provider outage) resumes after the cursors,
+  starting with the page that was in progress (its ids are recorded before it
+  is processed: in "existing" mode its sources may have lost their chunks, so
+  they can't be found again from the chunk table)
+- the status endpoint reports progress, items/sec and ETA while the command
+  is still running (the command result only exists once it finishes)
+"""
+
+import time
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+from .repository import repo_query
+
+REBUILD_CHECKPOINT_RECORD = "open_notebook:embedding_rebuild"
+
+
+@dataclass
+class RebuildCheckpoint:
+    command_id: Optional[str]
+    # mode, include flags and embedding model: resuming requires a match
+    key: Dict[str, Any]
+    status: str = "running"
+    # item type ("sources", "notes", "insights") -> last processed id
+    cursors: Dict[str, str] = field(default_factory=dict)
+    # item type -> ids of the page being processed, redone when resuming
+    pending: Dict[str, List[str]] = field(default_factory=dict)
+    total_items: int = 0
+    processed_items: int = 0
+    failed_items: int = 0
+    sources_processed: int = 0
+    notes_processed: int = 0
+    insights_processed: int = 0
+    # Items finished before this run started (resumed rebuilds)
+    resumed_items: int = 0
+    run_started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    items_per_second: float = 0.0
+    eta_seconds: Optional[float] = None
+    error_message: Optional[str] = None
+
+    @property
+    def done_items(self) -> int:
+        return self.processed_items + self.failed_items
+
+    def can_resume(self, key: Dict[str, Any]) -> bool:
+        return self.status != "completed" and self.key == key
+
+    def resume(self, command_id: Optional[str]) -> None:
+        """Start a new run from this checkpoint's cursors and counters."""
+        self.command_id = command_id
+        self.status = "running"
+        self.error_message = None
+        self.resumed_items = self.done_items
+        self.run_started_at = time.time()
+        self.items_per_second = 0.0
+        self.eta_seconds = None
+
+    def update_rate(self) -> None:
+        """Recompute items/sec over this run and the ETA of the remaining items."""
+        self.updated_at = time.time()
+        elapsed = self.updated_at - self.run_started_at
+        done_this_run = self.done_items - self.resumed_items
+        self.items_per_second = done_this_run / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total_items - self.done_items, 0)
+        if remaining == 0:
+            self.eta_seconds = 0.0
+        elif self.items_per_second > 0:
+            self.eta_seconds = remaining / self.items_per_second
+        else:
+            self.eta_seconds = None
+
+
+async def load_rebuild_checkpoint() -> Optional[RebuildCheckpoint]:
+    result = await repo_query(f"SELECT * FROM {REBUILD_CHECKPOINT_RECORD};")
+    if not result:
+        return None
+    known = {f.name for f in fields(RebuildCheckpoint)}
+    data = {k: v for k, v in result[0].items() if k in known}
+    if "key" not in data:
+        return None
+    data.setdefault("command_id", None)
+    return RebuildCheckpoint(**data)
+
+
+async def save_rebuild_checkpoint(checkpoint: RebuildCheckpoint) -> None:
+    checkpoint.update_rate()
+    await repo_query(
+        f"UPSERT {REBUILD_CHECKPOINT_RECORD} CONTENT $data;",
+        {"data": asdict(checkpoint)},
+    )
@@ -1,13 +1,19 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TypeVar, Union
+from typing import Any, Dict, List, Literal, Optional, TypeVar, Union
 
 from loguru import logger
 from surrealdb import AsyncSurreal, RecordID  # type: ignore
 
+from .pool import SurrealConnectionPool
+
 T = TypeVar("T", Dict[str, Any], List[Dict[str, Any]])
 
+# Process-wide connection pool, created lazily on first use or by init_db_pool()
+_pool: Optional[SurrealConnectionPool] = None
+
 
 def get_database_url():
     """Get database URL with backward compatibility"""
@@ -26,13 +32,38 @@ def get_database_password():
     return os.getenv("SURREAL_PASSWORD") or os.getenv("SURREAL_PASS")
 
 
+# Fields that only ever hold numeric vectors. They never contain RecordIDs, so
+# they are passed through as-is instead of being rebuilt element by element.
+VECTOR_FIELDS = frozenset({"embedding"})
+
+_SCALAR_TYPES = (str, int, float, bool, type(None), datetime)
+
+
+def _is_numeric_array(items: list) -> bool:
+    """Whether every item is a float (e.g. an embedding returned by a SELECT)."""
+    return all(type(item) is float for item in items)
+
+
 def parse_record_ids(obj: Any) -> Any:
-    """Recursively parse and convert RecordIDs into strings."""
+    """
+    Recursively parse and convert RecordIDs into strings.
+
+    Numeric arrays, and any value stored under a VECTOR_FIELDS key, are returned
+    untouched: a 1536-dim embedding would otherwise cost 1536 recursive calls
+    and a new list on every read.
+    """
+    if isinstance(obj, _SCALAR_TYPES):
+        return obj
     if isinstance(obj, dict):
-        return {k: parse_record_ids(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
+        return {
+            k: v if k in VECTOR_FIELDS else parse_record_ids(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        if not obj or _is_numeric_array(obj):
+            return obj
         return [parse_record_ids(item) for item in obj]
-    elif isinstance(obj, RecordID):
+    if isinstance(obj, RecordID):
         return str(obj)
     return obj
 
@@ -44,8 +75,62 @@ def ensure_record_id(value: Union[str, RecordID]) -> RecordID:
     return RecordID.parse(value)
 
 
+def create_db_pool() -> SurrealConnectionPool:
+    """Build a connection pool from the SURREAL_* environment variables."""
+    return SurrealConnectionPool(
+        url=get_database_url(),
+        username=os.environ.get("SURREAL_USER"),
+        password=get_database_password(),
+        namespace=os.environ.get("SURREAL_NAMESPACE"),
+        database=os.environ.get("SURREAL_DATABASE"),
+        min_size=int(os.getenv("SURREAL_POOL_MIN_SIZE", "1")),
+        max_size=int(os.getenv("SURREAL_POOL_MAX_SIZE", "10")),
+        acquire_timeout=float(os.getenv("SURREAL_POOL_TIMEOUT", "30")),
+        health_check_interval=float(
+            os.getenv("SURREAL_POOL_HEALTH_CHECK_INTERVAL", "30")
+        ),
+    )
+
+
+async def init_db_pool() -> SurrealConnectionPool:
+    """Open the process-wide connection pool (idempotent)."""
+    global _pool
+    if _pool is None or _pool.closed:
+        _pool = create_db_pool()
+    await _pool.start()
+    return _pool
+
+
+async def close_db_pool() -> None:
+    """Close the process-wide connection pool, if one was opened."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+def get_db_pool() -> Optional[SurrealConnectionPool]:
+    """
+    Return the pool usable from the running event loop.
+
+    The pool is created on first use. Code that runs on a different, short-lived
+    loop (e.g. sync LangGraph nodes driving their own loop in a thread) gets None
+    and falls back to a dedicated connection.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool.closed:
+        _pool = create_db_pool()
+    if _pool.loop is not None and _pool.loop is not loop:
+        if _pool.loop.is_closed():
+            _pool = create_db_pool()
+        else:
+            return None
+    return _pool
+
+
 @asynccontextmanager
-async def db_connection():
+async def _dedicated_connection():
     db = AsyncSurreal(get_database_url())
     await db.signin(
         {
@@ -62,6 +147,18 @@ async def db_connection():
         await db.close()
 
 
+@asynccontextmanager
+async def db_connection():
+    """Borrow a signed-in connection from the pool for the current event loop."""
+    pool = get_db_pool()
+    if pool is None:
+        async with _dedicated_connection() as db:
+            yield db
+        return
+    async with pool.connection() as db:
+        yield db
+
+
 async def repo_query(
     query_str: str, vars: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
@@ -82,6 +179,26 @@ async def repo_query(
             raise
 
 
+async def repo_query_many(
+    query_str: str, vars: Optional[Dict[str, Any]] = None
+) -> List[Any]:
+    """
+    Execute several SurrealQL statements in one round trip and return the
+    result of each statement, in order (LET statements yield None).
+    """
+    async with db_connection() as connection:
+        response = await connection.query_raw(query_str, vars)
+    if response.get("error"):
+        raise RuntimeError(response["error"].get("message", str(response["error"])))
+    results = []
+    for statement in response.get("result", []):
+        if statement.get("status") != "OK":
+            logger.error(str(statement.get("result")))
+            raise RuntimeError(str(statement.get("result")))
+        results.append(parse_record_ids(statement.get("result")))
+    return results
+
+
 async def repo_create(table: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new record in the specified table"""
     # Remove 'id' attribute if it exists in data
@@ -128,9 +245,17 @@ async def repo_upsert(
 
 
 async def repo_update(
-    table: str, id: str, data: Dict[str, Any]
+    table: str,
+    id: str,
+    data: Dict[str, Any],
+    returning: Literal["AFTER", "DIFF", "NONE"] = "AFTER",
 ) -> List[Dict[str, Any]]:
-    """Update an existing record by table and id"""
+    """
+    Merge data into an existing record by table and id.
+
+    returning selects what the database sends back: the whole record
+    ("AFTER"), the changes as JSON patches ("DIFF"), or nothing ("NONE").
+    """
     # If id already contains the table name, use it as is
     try:
         if isinstance(id, RecordID) or (":" in id and id.startswith(f"{table}:")):
@@ -141,7 +266,7 @@ async def repo_update(
         if "created" in data and isinstance(data["created"], str):
             data["created"] = datetime.fromisoformat(data["created"])
         data["updated"] = datetime.now(timezone.utc)
-        query = f"UPDATE {record_id} MERGE $data;"
+        query = f"UPDATE {record_id} MERGE $data RETURN {returning};"
         # logger.debug(f"Update query: {query}")
         result = await repo_query(query, {"data": data})
         # if isinstance(result, list):
@@ -0,0 +1,188 @@
+"""
+HNSW vector index management for the embedding fields.
+
+SurrealDB vector indexes have a fixed dimension and reject writes of any other
+length, so the dimension can't be set in a migration: it follows the configured
+embedding model. The indexed dimension is stored in open_notebook:vector_index,
+which fn::vector_search reads to decide between a KNN lookup and an exact scan.
+
+- vector_indexes_ready() is called from vector_search with the query vector
+  length; when the indexes don't serve it, it starts one background build
+  (ensure_vector_indexes) and the search uses an exact scan meanwhile
+- warm_vector_indexes() runs at API startup and after an embedding rebuild,
+  building the indexes for the stored embeddings' dimension ahead of searches
+- prepare_vector_write() is called before storing an embedding and drops the
+  indexes when the vector length no longer matches (embedding model switched),
+  so writes never fail; the next search re-creates them once all rows match
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+from .repository import repo_query
+
+VECTOR_INDEX_RECORD = "open_notebook:vector_index"
+
+# table -> index name
+VECTOR_INDEXES: Dict[str, str] = {
+    "source_embedding": "idx_source_embedding_vector",
+    "source_insight": "idx_source_insight_vector",
+    "note": "idx_note_vector",
+}
+
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "true").lower() == "true"
+
+# K of the KNN lookups in fn::vector_search (migrations/10.surrealql): asking
+# for more results than this makes it scan every row instead
+VECTOR_INDEX_MAX_RESULTS = 100
+
+# How long a known index dimension is trusted before re-reading it
+_CACHE_TTL = 30.0
+# How long to wait before retrying a failed index build (e.g. mixed dimensions)
+_RETRY_AFTER = 300.0
+
+_known_dimension: Optional[int] = None
+_checked_at = 0.0
+_failed_builds: Dict[int, float] = {}
+# One build at a time; the background build started from the search path
+_build_lock = asyncio.Lock()
+_build_task: Optional["asyncio.Task[bool]"] = None
+
+
+async def get_indexed_dimension() -> Optional[int]:
+    """Return the dimension the vector indexes were built for, if any."""
+    global _known_dimension, _checked_at
+    if _checked_at and time.monotonic() - _checked_at < _CACHE_TTL:
+        return _known_dimension
+    result = await repo_query(f"RETURN {VECTOR_INDEX_RECORD}.dimension;")
+    _known_dimension = result if isinstance(result, int) else None
+    _checked_at = time.monotonic()
+    return _known_dimension
+
+
+def _remember(dimension: Optional[int]) -> None:
+    global _known_dimension, _checked_at
+    _known_dimension = dimension
+    _checked_at = time.monotonic()
+
+
+async def drop_vector_indexes() -> None:
+    """Remove the vector indexes; searches fall back to exact scans."""
+    statements = [
+        f"REMOVE INDEX IF EXISTS {index} ON TABLE {table};"
+        for table, index in VECTOR_INDEXES.items()
+    ]
+    await repo_query(" ".join(statements) + f" DELETE {VECTOR_INDEX_RECORD};")
+    _remember(None)
+
+
+async def ensure_vector_indexes(dimension: int) -> bool:
+    """
+    Make sure HNSW indexes exist for vectors of the given dimension.
+
+    Returns True when fn::vector_search can use the indexes for this dimension.
+    Building fails while rows of another dimension remain (e.g. halfway through
+    a rebuild after switching models); that is logged and retried later.
+    """
+    if not VECTOR_INDEX_ENABLED or dimension <= 0:
+        return False
+    if await get_indexed_dimension() == dimension:
+        return True
+    async with _build_lock:
+        # Another caller may have built them while this one waited
+        if _known_dimension == dimension:
+            return True
+        return await _build_vector_indexes(dimension)
+
+
+async def _build_vector_indexes(dimension: int) -> bool:
+    failed_at = _failed_builds.get(dimension)
+    if failed_at and time.monotonic() - failed_at < _RETRY_AFTER:
+        return False
+
+    try:
+        await drop_vector_indexes()
+        logger.info(f"Building HNSW vector indexes for dimension {dimension}")
+        for table, index in VECTOR_INDEXES.items():
+            await repo_query(
+                f"DEFINE INDEX IF NOT EXISTS {index} ON TABLE {table} "
+                f"FIELDS embedding HNSW DIMENSION {int(dimension)} DIST COSINE;"
+            )
+        await repo_query(
+            f"UPSERT {VECTOR_INDEX_RECORD} SET dimension = $dimension;",
+            {"dimension": int(dimension)},
+        )
+    except Exception as e:
+        logger.warning(
+            f"Could not build vector indexes for dimension {dimension}, "
+            f"using exact scans: {e}"
+        )
+        _failed_builds[dimension] = time.monotonic()
+        try:
+            await drop_vector_indexes()
+        except Exception:
+            pass
+        return False
+
+    _failed_builds.pop(dimension, None)
+    _remember(dimension)
+    return True
+
+
+async def _build_in_background(dimension: int) -> bool:
+    try:
+        return await ensure_vector_indexes(dimension)
+    except Exception as e:
+        logger.warning(f"Vector index build for dimension {dimension} failed: {e}")
+        return False
+
+
+async def vector_indexes_ready(dimension: int) -> bool:
+    """
+    Whether the indexes serve vectors of this dimension right now.
+
+    If not, a build is started in the background (one at a time) and False is
+    returned, so the caller searches with an exact scan instead of waiting.
+    """
+    global _build_task
+    if not VECTOR_INDEX_ENABLED or dimension <= 0:
+        return False
+    if await get_indexed_dimension() == dimension:
+        return True
+    if _build_task is None or _build_task.done():
+        _build_task = asyncio.create_task(_build_in_background(dimension))
+    return False
+
+
+async def warm_vector_indexes() -> bool:
+    """Build the indexes for the dimension of the stored embeddings, if any."""
+    if not VECTOR_INDEX_ENABLED:
+        return False
+    try:
+        for table in VECTOR_INDEXES:
+            result = await repo_query(
+                f"SELECT VALUE array::len(embedding) FROM {table} "
+                "WHERE embedding != NONE LIMIT 1;"
+            )
+            if result:
+                return await ensure_vector_indexes(int(result[0]))
+    except Exception as e:
+        logger.warning(f"Could not warm the vector indexes: {e}")
+    return False
+
+
+async def prepare_vector_write(dimension: int) -> None:
+    """Drop the vector indexes if they can't accept vectors of this dimension."""
+    if dimension <= 0:
+        return
+    indexed = await get_indexed_dimension()
+    if indexed is not None and indexed != dimension:
+        logger.warning(
+            f"Embedding dimension changed ({indexed} -> {dimension}); "
+            "dropping vector indexes until embeddings are rebuilt"
+        )
+        await drop_vector_indexes()
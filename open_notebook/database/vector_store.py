@@ -0,0 +1,662 @@
+"""
+Optional in-process vector search engine (VECTOR_SEARCH_ENGINE=local).
+
+Every embedding (source chunks, insights, notes) is kept in one L2-normalized
+matrix, so a query is a single matrix-vector product plus argpartition instead
+of a scan inside SurrealDB. SurrealDB stays the source of truth: only ids and
+scores come from the matrix, titles and content are read back for the hits.
+
+State lives under DATA_FOLDER/vector_store:
+- meta.json, rows.json, vectors.npy: the last snapshot. The matrix is
+  memory-mapped on load, so a restart doesn't re-read every vector
+- journal-<generation>.jsonl: changes since that snapshot
+
+The API and the worker are separate processes, so writers (embed_chunk_batch,
+ObjectModel.save, Source.add_insight, ...) only append to the journal. The
+process serving searches replays new journal lines before each query and
+folds them into a new snapshot every VECTOR_STORE_SNAPSHOT_INTERVAL seconds.
+Journal entries are idempotent upserts/deletes, so replaying one twice is
+harmless. The first search builds the initial snapshot from SurrealDB.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from open_notebook.config import DATA_FOLDER
+
+from .repository import ensure_record_id, repo_query
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+VECTOR_SEARCH_ENGINE = os.getenv("VECTOR_SEARCH_ENGINE", "surreal").lower()
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float32").lower()
+VECTOR_STORE_SNAPSHOT_INTERVAL = float(
+    os.getenv("VECTOR_STORE_SNAPSHOT_INTERVAL", "300")
+)
+VECTOR_STORE_DIR = os.path.join(DATA_FOLDER, "vector_store")
+
+# Tables holding embeddings, in table-code order
+TABLES: Tuple[str, ...] = ("source_embedding", "source_insight", "note")
+SOURCE_TABLES: Tuple[str, ...] = ("source_embedding", "source_insight")
+
+# Rows read per query while building the first snapshot from SurrealDB
+_BOOTSTRAP_PAGE_SIZE = 500
+
+
+def is_enabled() -> bool:
+    """Whether vector_search should use the in-process engine."""
+    return VECTOR_SEARCH_ENGINE == "local" and np is not None
+
+
+def _encode_vector(vector: Sequence[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+
+def _decode_vector(data: str) -> "np.ndarray":
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
+
+class LocalVectorStore:
+    """
+    Normalized embedding matrix with a row -> record id table.
+
+    Rows loaded from a snapshot stay in the (read-only, memory-mapped) base
+    matrix; rows added afterwards go to an in-memory overflow matrix.
+    Replaced and deleted rows are masked out and dropped at the next snapshot.
+    """
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector store dtype: {dtype}")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.generation = 0
+        self.dimension: Optional[int] = None
+        self._journal_offset = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    # -- in-memory state ---------------------------------------------------
+
+    def _reset(self, dimension: Optional[int]) -> None:
+        self.dimension = dimension
+        width = dimension or 0
+        self._base = np.zeros((0, width), dtype=self.dtype)
+        self._extra = np.zeros((0, width), dtype=self.dtype)
+        self._extra_count = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._tables = np.zeros(0, dtype=np.int8)
+        self._ids: List[str] = []
+        self._parents: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._children: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _ensure_rows(self, extra_rows: int) -> None:
+        total = len(self._ids) + extra_rows
+        if total > len(self._alive):
+            capacity = max(total, 2 * len(self._alive), 1024)
+            self._alive = np.resize(self._alive, capacity)
+            self._tables = np.resize(self._tables, capacity)
+            self._alive[len(self._ids):] = False
+
+    def _ensure_extra(self, extra_rows: int) -> None:
+        needed = self._extra_count + extra_rows
+        if needed > len(self._extra):
+            capacity = max(needed, 2 * len(self._extra), 1024)
+            grown = np.zeros((capacity, self.dimension or 0), dtype=self.dtype)
+            grown[: self._extra_count] = self._extra[: self._extra_count]
+            self._extra = grown
+
+    def upsert(
+        self,
+        table: str,
+        ids: Sequence[str],
+        parents: Sequence[Optional[str]],
+        vectors: "np.ndarray",
+    ) -> None:
+        """Add or replace rows. A new dimension means a new embedding model:
+        vectors of the old one can't be compared with it and are dropped."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if len(ids) == 0:
+            return
+        with self._lock:
+            if self.dimension != vectors.shape[1]:
+                if self.dimension is not None:
+                    logger.warning(
+                        f"Embedding dimension changed ({self.dimension} -> "
+                        f"{vectors.shape[1]}); clearing the local vector store"
+                    )
+                self._reset(vectors.shape[1])
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+
+            self.remove(ids)
+            self._ensure_rows(len(ids))
+            self._ensure_extra(len(ids))
+            code = TABLES.index(table)
+            for record_id, parent, vector in zip(ids, parents, vectors):
+                row = len(self._ids)
+                self._extra[self._extra_count] = vector
+                self._extra_count += 1
+                self._ids.append(record_id)
+                self._parents.append(parent)
+                self._alive[row] = True
+                self._tables[row] = code
+                self._row_of[record_id] = row
+                if parent:
+                    self._children.setdefault(parent, set()).add(record_id)
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for record_id in ids:
+                row = self._row_of.pop(record_id, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                parent = self._parents[row]
+                if parent and parent in self._children:
+                    self._children[parent].discard(record_id)
+                    if not self._children[parent]:
+                        del self._children[parent]
+                self._dirty = True
+
+    def remove_children(self, parent: str, tables: Sequence[str] = SOURCE_TABLES) -> None:
+        """Remove the rows of the given tables that belong to a source."""
+        with self._lock:
+            codes = {TABLES.index(t) for t in tables}
+            children = [
+                record_id
+                for record_id in self._children.get(parent, ())
+                if self._tables[self._row_of[record_id]] in codes
+            ]
+            self.remove(children)
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        tables: Sequence[str],
+        min_similarity: float = 0.0,
+    ) -> List[Tuple[str, str, Optional[str], float]]:
+        """
+        Top `limit` rows per table by cosine similarity.
+
+        Returns (record_id, table, parent_id, similarity) tuples, best first.
+        """
+        q = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            if self.dimension != len(q) or not self._row_of or limit <= 0:
+                return []
+            norm = np.linalg.norm(q)
+            if norm == 0:
+                return []
+            q = (q / norm).astype(self.dtype)
+            count = len(self._ids)
+            scores = np.empty(count, dtype=np.float32)
+            base_rows = len(self._base)
+            if base_rows:
+                scores[:base_rows] = self._base @ q
+            scores[base_rows:] = self._extra[: self._extra_count] @ q
+            alive = self._alive[:count]
+            row_tables = self._tables[:count]
+
+            hits = []
+            for table in tables:
+                candidates = np.flatnonzero(
+                    alive
+                    & (row_tables == TABLES.index(table))
+                    & (scores >= min_similarity)
+                )
+                if len(candidates) > limit:
+                    top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                    candidates = candidates[top]
+                hits.extend(
+                    (self._ids[row], table, self._parents[row], float(scores[row]))
+                    for row in candidates
+                )
+        hits.sort(key=lambda hit: hit[3], reverse=True)
+        return hits
+
+    # -- persistence -------------------------------------------------------
+
+    @property
+    def _meta_file(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _journal_file(self, generation: int) -> str:
+        return os.path.join(self.path, f"journal-{generation}.jsonl")
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize journal appends and snapshots across processes."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "lock"), "w") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_generation(self) -> Optional[int]:
+        try:
+            with open(self._meta_file) as f:
+                return int(json.load(f)["generation"])
+        except FileNotFoundError:
+            return None
+
+    def has_snapshot(self) -> bool:
+        return self._read_generation() is not None
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        """Append change entries to the journal of the current generation."""
+        if not entries:
+            return
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._file_lock():
+            generation = self._read_generation() or 0
+            with open(self._journal_file(generation), "a") as f:
+                f.write(lines)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry.get("op")
+        if op == "upsert":
+            rows = entry["rows"]
+            self.upsert(
+                entry["table"],
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                np.stack([_decode_vector(row[2]) for row in rows]),
+            )
+        elif op == "remove":
+            self.remove(entry["ids"])
+        elif op == "remove_children":
+            self.remove_children(entry["parent"], entry.get("tables", SOURCE_TABLES))
+
+    def _replay(self) -> None:
+        journal = self._journal_file(self.generation)
+        if not os.path.exists(journal):
+            return
+        with open(journal, "rb") as f:
+            f.seek(self._journal_offset)
+            data = f.read()
+        # A line still being written has no newline yet; pick it up next time
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._journal_offset += len(complete)
+
+    def sync(self) -> None:
+        """Load a newer snapshot if another process wrote one, then replay
+        journal lines this process hasn't seen yet."""
+        with self._lock:
+            generation = self._read_generation()
+            if generation is not None and generation != self.generation:
+                with self._file_lock():
+                    self.load()
+            self._replay()
+
+    def load(self) -> None:
+        """Load the current snapshot (memory-mapped) and reset the journal offset."""
+        with self._lock:
+            with open(self._meta_file) as f:
+                meta = json.load(f)
+            with open(os.path.join(self.path, "rows.json")) as f:
+                rows = json.load(f)
+            self.dtype = np.dtype(meta["dtype"])
+            self._reset(meta["dimension"])
+            self.generation = meta["generation"]
+            self._journal_offset = 0
+            count = meta["rows"]
+            if count:
+                self._base = np.load(
+                    os.path.join(self.path, "vectors.npy"), mmap_mode="r"
+                )
+            self._ensure_rows(count)
+            self._ids = list(rows["ids"])
+            self._parents = list(rows["parents"])
+            self._alive[:count] = True
+            self._tables[:count] = rows["tables"]
+            self._row_of = {record_id: row for row, record_id in enumerate(self._ids)}
+            for record_id, parent in zip(self._ids, self._parents):
+                if parent:
+                    self._children.setdefault(parent, set()).add(record_id)
+            self._dirty = False
+            logger.info(
+                f"Loaded local vector store snapshot {self.generation}: "
+                f"{count} vectors"
+            )
+
+    def snapshot(self) -> None:
+        """Fold the journal into a new snapshot generation."""
+        with self._lock, self._file_lock():
+            if self._read_generation() not in (None, self.generation):
+                # Another process already folded the journal: start from its snapshot
+                self.load()
+            # Entries appended since the last sync must not be lost with the
+            # old journal; writers hold the file lock, so every line is complete
+            self._replay()
+            count = len(self._ids)
+            live = np.flatnonzero(self._alive[:count])
+            base_rows = len(self._base)
+            width = self.dimension or 0
+            matrix = np.zeros((len(live), width), dtype=self.dtype)
+            in_base = live < base_rows
+            if in_base.any():
+                matrix[in_base] = self._base[live[in_base]]
+            if (~in_base).any():
+                matrix[~in_base] = self._extra[live[~in_base] - base_rows]
+
+            old_generation = self.generation
+            generation = old_generation + 1
+            os.makedirs(self.path, exist_ok=True)
+            self._write(
+                "vectors.npy", lambda f: np.save(f, matrix), binary=True
+            )
+            self._write(
+                "rows.json",
+                lambda f: json.dump(
+                    {
+                        "ids": [self._ids[row] for row in live],
+                        "parents": [self._parents[row] for row in live],
+                        "tables": self._tables[live].tolist(),
+                    },
+                    f,
+                ),
+            )
+            # meta.json is written last: it is what readers check
+            self._write(
+                "meta.json",
+                lambda f: json.dump(
+                    {
+                        "generation": generation,
+                        "dimension": self.dimension,
+                        "dtype": self.dtype.name,
+                        "rows": len(live),
+                        "created": time.time(),
+                    },
+                    f,
+                ),
+            )
+            try:
+                os.remove(self._journal_file(old_generation))
+            except FileNotFoundError:
+                pass
+            self.load()
+
+    def _write(self, name: str, writer, binary: bool = False) -> None:
+        target = os.path.join(self.path, name)
+        tmp = f"{target}.tmp"
+        with open(tmp, "wb" if binary else "w") as f:
+            writer(f)
+        os.replace(tmp, target)
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+
+_store: Optional[LocalVectorStore] = None
+_store_lock: Optional[asyncio.Lock] = None
+_last_snapshot = 0.0
+
+
+def _get_store() -> LocalVectorStore:
+    global _store
+    if _store is None:
+        _store = LocalVectorStore(VECTOR_STORE_DIR, VECTOR_STORE_DTYPE)
+    return _store
+
+
+async def _bootstrap(store: LocalVectorStore) -> None:
+    """Build the first snapshot from the vectors stored in SurrealDB."""
+    logger.info("Building local vector store from SurrealDB")
+    start = time.time()
+    for table in TABLES:
+        parent_expr = "source" if table in SOURCE_TABLES else "NONE"
+        offset = 0
+        while True:
+            rows = await repo_query(
+                f"SELECT id, {parent_expr} AS parent, embedding FROM {table} "
+                "WHERE embedding != NONE START $start LIMIT $limit;",
+                {"start": offset, "limit": _BOOTSTRAP_PAGE_SIZE},
+            )
+            if not rows:
+                break
+            _upsert_rows(store, table, rows, "parent")
+            offset += len(rows)
+    # Writes that happened while reading are in the generation-0 journal
+    await asyncio.to_thread(store.snapshot)
+    logger.info(
+        f"Local vector store built with {len(store)} vectors "
+        f"in {time.time() - start:.1f}s"
+    )
+
+
+def _upsert_rows(
+    store: LocalVectorStore, table: str, rows: List[Dict[str, Any]], parent_key: str
+) -> None:
+    by_dimension: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row.get("embedding"):
+            by_dimension.setdefault(len(row["embedding"]), []).append(row)
+    for group in by_dimension.values():
+        store.upsert(
+            table,
+            [str(row["id"]) for row in group],
+            [str(row[parent_key]) if row.get(parent_key) else None for row in group],
+            np.asarray([row["embedding"] for row in group], dtype=np.float32),
+        )
+
+
+async def _ready_store() -> LocalVectorStore:
+    """The store of this process, loaded and synced with the journal."""
+    global _store_lock, _last_snapshot
+    if _store_lock is None:
+        _store_lock = asyncio.Lock()
+    store = _get_store()
+    async with _store_lock:
+        if not store.has_snapshot():
+            await _bootstrap(store)
+            _last_snapshot = time.monotonic()
+        await asyncio.to_thread(store.sync)
+        if (
+            store.dirty
+            and time.monotonic() - _last_snapshot > VECTOR_STORE_SNAPSHOT_INTERVAL
+        ):
+            await asyncio.to_thread(store.snapshot)
+            _last_snapshot = time.monotonic()
+    return store
+
+
+async def search(
+    query: Sequence[float],
+    match_count: int,
+    sources: bool = True,
+    notes: bool = True,
+    min_similarity: float = 0.2,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Same contract as fn::vector_search, served from the local store.
+
+    Returns None when the local store can't answer (disabled, dimension
+    mismatch, or an error), in which case the caller should use SurrealDB.
+    """
+    results = await search_many([query], match_count, sources, notes, min_similarity)
+    return None if results is None else results[0]
+
+
+async def search_many(
+    queries: Sequence[Sequence[float]],
+    match_count: int,
+    sources: bool = True,
+    notes: bool = True,
+    min_similarity: float = 0.2,
+) -> Optional[List[List[Dict[str, Any]]]]:
+    """
+    search() for several query vectors, with one read of the hit records.
+
+    Returns one result list per query, or None (see search).
+    """
+    if not is_enabled():
+        return None
+    try:
+        store = await _ready_store()
+        if any(store.dimension != len(query) for query in queries):
+            return None
+        tables = (SOURCE_TABLES if sources else ()) + (("note",) if notes else ())
+        hits_per_query = await asyncio.to_thread(
+            lambda: [
+                store.search(query, match_count, tables, min_similarity)
+                for query in queries
+            ]
+        )
+        hit_ids = list(dict.fromkeys(hit[0] for hits in hits_per_query for hit in hits))
+        if not hit_ids:
+            return [[] for _ in queries]
+
+        rows = await repo_query(
+            """
+            SELECT id, content, title, insight_type,
+                source.id AS source_id, source.title AS source_title
+            FROM $ids;
+            """,
+            {"ids": [ensure_record_id(record_id) for record_id in hit_ids]},
+        )
+        records = {str(row["id"]): row for row in rows}
+        missing = [record_id for record_id in hit_ids if record_id not in records]
+        if missing:
+            # Deleted without going through a hook; don't return them again
+            await forget_vectors(missing)
+
+        return [
+            _group_hits(hits, records)[:match_count] for hits in hits_per_query
+        ]
+    except Exception as e:
+        logger.warning(f"Local vector search failed, using SurrealDB: {e}")
+        logger.exception(e)
+        return None
+
+
+def _group_hits(
+    hits: List[Tuple[str, str, Optional[str], float]],
+    records: Dict[str, Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Group hits by result (a source's chunks are one result), best first."""
+    groups: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
+    for record_id, table, parent_id, similarity in hits:
+        row = records.get(record_id)
+        if row is None:
+            continue
+        if table == "source_embedding":
+            key = (str(row["source_id"]), str(row["source_id"]), row.get("source_title"))
+        elif table == "source_insight":
+            title = f"{row.get('insight_type')} - {row.get('source_title') or ''}"
+            key = (record_id, str(row["source_id"]), title)
+        else:
+            key = (record_id, record_id, row.get("title"))
+        group = groups.setdefault(
+            key,
+            {
+                "id": key[0],
+                "parent_id": key[1],
+                "title": key[2],
+                "similarity": similarity,
+                "matches": [],
+            },
+        )
+        group["similarity"] = max(group["similarity"], similarity)
+        group["matches"].append(row.get("content"))
+    return sorted(groups.values(), key=lambda r: r["similarity"], reverse=True)
+
+
+async def _append(entries: List[Dict[str, Any]]) -> None:
+    try:
+        await asyncio.to_thread(_get_store().append, entries)
+    except Exception as e:
+        logger.warning(f"Could not update the local vector store journal: {e}")
+
+
+async def record_vectors(table: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Record freshly written rows (as returned by CREATE/INSERT/UPDATE) in the
+    local store. Rows without an embedding are removed from it.
+    """
+    if not is_enabled() or table not in TABLES or not rows:
+        return
+    upserts = []
+    removals = []
+    for row in rows:
+        if not row.get("id"):
+            continue
+        if row.get("embedding"):
+            parent = row.get("source") if table in SOURCE_TABLES else None
+            upserts.append(
+                [
+                    str(row["id"]),
+                    str(parent) if parent else None,
+                    _encode_vector(row["embedding"]),
+                ]
+            )
+        else:
+            removals.append(str(row["id"]))
+    entries: List[Dict[str, Any]] = []
+    if upserts:
+        entries.append({"op": "upsert", "table": table, "rows": upserts})
+    if removals:
+        entries.append({"op": "remove", "ids": removals})
+    await _append(entries)
+
+
+async def forget_vectors(ids: List[str]) -> None:
+    """Remove rows from the local store."""
+    if is_enabled() and ids:
+        await _append([{"op": "remove", "ids": [str(i) for i in ids]}])
+
+
+async def forget_source_vectors(
+    source_id: str, tables: Sequence[str] = SOURCE_TABLES
+) -> None:
+    """Remove a source's chunks and/or insights from the local store."""
+    if is_enabled():
+        await _append(
+            [{"op": "remove_children", "parent": str(source_id), "tables": list(tables)}]
+        )
+
+
+async def forget_record(record_id: str) -> None:
+    """Hook for deleted records: drops their vectors (and a source's children)."""
+    table = str(record_id).split(":", 1)[0]
+    if table == "source":
+        await forget_source_vectors(record_id)
+    elif table in TABLES:
+        await forget_vectors([record_id])
+
+
+async def close_vector_store() -> None:
+    """Write a final snapshot so the next start doesn't replay the journal."""
+    if _store is not None and _store.dirty:
+        try:
+            await asyncio.to_thread(_store.snapshot)
+        except Exception as e:
+            logger.warning(f"Could not snapshot the local vector store: {e}")
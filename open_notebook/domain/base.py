@@ -1,9 +1,17 @@
+import re
 from datetime import datetime
 from typing import Any, ClassVar, Dict, List, Optional, Type, TypeVar, Union, cast
 
 from loguru import logger
-from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 
+from open_notebook.database import vector_store
 from open_notebook.database.repository import (
     ensure_record_id,
     repo_create,
@@ -13,24 +21,115 @@ from open_notebook.database.repository import (
     repo_update,
     repo_upsert,
 )
+from open_notebook.database.vector_index import prepare_vector_write
 from open_notebook.exceptions import (
     DatabaseOperationError,
     InvalidInputError,
     NotFoundError,
 )
+from open_notebook.utils.context_cache import invalidate_context
+from open_notebook.utils.embedding_cache import cached_embed
 
 T = TypeVar("T", bound="ObjectModel")
 
+# Fields the database maintains; never diffed or sent on update
+_UNTRACKED_FIELDS = {"id", "created", "updated"}
+# Field names accepted in projections (they are interpolated into queries)
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
 
 class ObjectModel(BaseModel):
     id: Optional[str] = None
     table_name: ClassVar[str] = ""
     nullable_fields: ClassVar[set[str]] = set()  # Fields that can be saved as None
+    # Saving or deleting a record drops the cached chat contexts built from it
+    invalidates_context: ClassVar[bool] = False
     created: Optional[datetime] = None
     updated: Optional[datetime] = None
+    # Field values (as dumped) last read from or written to the database; an
+    # update sends only the fields that differ. None sends every field.
+    _snapshot: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    # Embedding content the stored embedding was computed from
+    _embedded_content: Optional[str] = PrivateAttr(default=None)
+    # Fields a projection left out (None until loaded with _load_field)
+    _omitted: set[str] = PrivateAttr(default_factory=set)
+
+    @classmethod
+    def _from_record(
+        cls: Type[T], record: Dict[str, Any], omitted: Optional[set[str]] = None
+    ) -> T:
+        """Build an instance from a database record, with nothing dirty."""
+        obj = cls(**record)
+        obj._omitted = set(omitted or ())
+        obj._mark_clean(embedded=bool(record.get("embedding")))
+        return obj
+
+    @classmethod
+    def _projection(
+        cls,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+    ) -> tuple[str, set[str]]:
+        """SELECT clause for a projection, and the model fields it leaves out."""
+        if fields and omit:
+            raise InvalidInputError("Use either fields or omit, not both")
+        names = list(fields or omit or [])
+        invalid = [name for name in names if not _FIELD_NAME.match(name)]
+        if invalid:
+            raise InvalidInputError(f"Invalid field names: {', '.join(invalid)}")
+        if fields:
+            selected = ["id", *(name for name in fields if name != "id")]
+            return ", ".join(selected), set(cls.model_fields) - set(selected)
+        if omit:
+            return f"* OMIT {', '.join(omit)}", set(omit) & set(cls.model_fields)
+        return "*", set()
+
+    async def _load_field(self, name: str) -> Any:
+        """A field's value, fetched on first access if a projection left it out."""
+        if name in self._omitted:
+            self._omitted.discard(name)
+            # Unless it was assigned since
+            if getattr(self, name) is None and self.id:
+                result = await repo_query(
+                    f"SELECT {name} FROM $id", {"id": ensure_record_id(self.id)}
+                )
+                setattr(self, name, result[0].get(name) if result else None)
+                if self._snapshot is not None:
+                    self._snapshot[name] = self.model_dump(include={name}).get(name)
+        return getattr(self, name)
+
+    def _mark_clean(
+        self, snapshot: Optional[Dict[str, Any]] = None, embedded: bool = False
+    ) -> None:
+        self._snapshot = self.model_dump() if snapshot is None else snapshot
+        self._embedded_content = self.get_embedding_content() if embedded else None
+
+    def dirty_fields(self) -> set[str]:
+        """Fields changed since the record was loaded or saved (all if unknown)."""
+        return set(self._changed_data(self.model_dump()))
+
+    def _changed_data(self, dump: Dict[str, Any]) -> Dict[str, Any]:
+        if self._snapshot is None:
+            return dump
+        return {
+            key: value
+            for key, value in dump.items()
+            if key not in _UNTRACKED_FIELDS
+            and (key not in self._snapshot or self._snapshot[key] != value)
+        }
 
     @classmethod
-    async def get_all(cls: Type[T], order_by=None) -> List[T]:
+    async def get_all(
+        cls: Type[T],
+        order_by=None,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+    ) -> List[T]:
+        """
+        All records of the table. fields (always with id) or omit project
+        the columns read; the left-out fields are None on the instances.
+        """
+        projection, omitted = cls._projection(fields, omit)
         try:
             # If called from a specific subclass, use its table_name
             if cls.table_name:
@@ -42,15 +141,15 @@ class ObjectModel(BaseModel):
                     "get_all() must be called from a specific model class"
                 )
             if order_by:
-                query = f"SELECT * FROM {table_name} ORDER BY {order_by}"
+                query = f"SELECT {projection} FROM {table_name} ORDER BY {order_by}"
             else:
-                query = f"SELECT * FROM {table_name}"
+                query = f"SELECT {projection} FROM {table_name}"
 
             result = await repo_query(query)
             objects = []
             for obj in result:
                 try:
-                    objects.append(target_class(**obj))
+                    objects.append(target_class._from_record(obj, omitted))
                 except Exception as e:
                     logger.critical(f"Error creating object: {str(e)}")
 
@@ -61,9 +160,20 @@ class ObjectModel(BaseModel):
             raise DatabaseOperationError(e)
 
     @classmethod
-    async def get(cls: Type[T], id: str) -> T:
+    async def get(
+        cls: Type[T],
+        id: str,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+    ) -> T:
+        """
+        The record with this id. fields (always with id) or omit project the
+        columns read, e.g. omit=["full_text"] for a source's metadata.
+        """
         if not id:
             raise InvalidInputError("ID cannot be empty")
+        # Invalid projections are input errors, not a missing record
+        cls._projection(fields, omit)
         try:
             # Get the table name from the ID (everything before the first colon)
             table_name = id.split(":")[0] if ":" in id else id
@@ -78,9 +188,12 @@ class ObjectModel(BaseModel):
                     raise InvalidInputError(f"No class found for table {table_name}")
                 target_class = cast(Type[T], found_class)
 
-            result = await repo_query("SELECT * FROM $id", {"id": ensure_record_id(id)})
+            projection, omitted = target_class._projection(fields, omit)
+            result = await repo_query(
+                f"SELECT {projection} FROM $id", {"id": ensure_record_id(id)}
+            )
             if result:
-                return target_class(**result[0])
+                return target_class._from_record(result[0], omitted)
             else:
                 raise NotFoundError(f"{table_name} with id {id} not found")
         except Exception as e:
@@ -110,51 +223,76 @@ class ObjectModel(BaseModel):
     def get_embedding_content(self) -> Optional[str]:
         return None
 
-    async def save(self) -> None:
+    async def save(self, reembed: bool = False) -> None:
+        """
+        Create the record, or update only its changed fields.
+
+        The embedding is recomputed only when the embedded content changed
+        since the record was loaded (or reembed is set, e.g. after switching
+        embedding models).
+        """
         from open_notebook.domain.models import model_manager
 
         try:
-            self.model_validate(self.model_dump(), strict=True)
-            data = self._prepare_save_data()
+            dump = self.model_dump()
+            self.model_validate(dump, strict=True)
+            data = self._prepare_save_data(
+                dump if self.id is None else self._changed_data(dump)
+            )
             data["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            if self.needs_embedding():
-                embedding_content = self.get_embedding_content()
-                if embedding_content:
-                    EMBEDDING_MODEL = await model_manager.get_embedding_model()
-                    if not EMBEDDING_MODEL:
-                        logger.warning(
-                            "No embedding model found. Content will not be searchable."
-                        )
-                    data["embedding"] = (
-                        (await EMBEDDING_MODEL.aembed([embedding_content]))[0]
-                        if EMBEDDING_MODEL
-                        else []
+            embedding_content = (
+                self.get_embedding_content() if self.needs_embedding() else None
+            )
+            embed = bool(embedding_content) and (
+                reembed or embedding_content != self._embedded_content
+            )
+            if embed:
+                EMBEDDING_MODEL = await model_manager.get_embedding_model()
+                if not EMBEDDING_MODEL:
+                    logger.warning(
+                        "No embedding model found. Content will not be searchable."
                     )
+                data["embedding"] = (
+                    (await cached_embed(EMBEDDING_MODEL, [embedding_content]))[0]
+                    if EMBEDDING_MODEL
+                    else None
+                )
+                if data["embedding"]:
+                    await prepare_vector_write(len(data["embedding"]))
 
-            repo_result: Union[List[Dict[str, Any]], Dict[str, Any]]
             if self.id is None:
                 data["created"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 repo_result = await repo_create(self.__class__.table_name, data)
+                # repo_result is the created record (a list of one dictionary)
+                record = repo_result[0] if isinstance(repo_result, list) else repo_result
+                for key, value in record.items():
+                    if hasattr(self, key):
+                        if isinstance(getattr(self, key), BaseModel):
+                            setattr(self, key, type(getattr(self, key))(**value))
+                        else:
+                            setattr(self, key, value)
+                snapshot = self.model_dump()
             else:
-                data["created"] = (
-                    self.created.strftime("%Y-%m-%d %H:%M:%S")
-                    if isinstance(self.created, datetime)
-                    else self.created
-                )
-                logger.debug(f"Updating record with id {self.id}")
-                repo_result = await repo_update(
-                    self.__class__.table_name, self.id, data
+                # created is kept by the database ($before)
+                data.pop("created", None)
+                logger.debug(f"Updating {sorted(data)} of record with id {self.id}")
+                await repo_update(
+                    self.__class__.table_name, self.id, data, returning="NONE"
                 )
-            # Update the current instance with the result
-            # repo_result is a list of dictionaries
-            result_list: List[Dict[str, Any]] = repo_result if isinstance(repo_result, list) else [repo_result]
-            for key, value in result_list[0].items():
-                if hasattr(self, key):
-                    if isinstance(getattr(self, key), BaseModel):
-                        setattr(self, key, type(getattr(self, key))(**value))
-                    else:
-                        setattr(self, key, value)
+                self.updated = self.parse_datetime(data["updated"])
+                record = {"id": self.id, **data}
+                snapshot = dump
+            if embed:
+                await vector_store.record_vectors(self.__class__.table_name, [record])
+            self._mark_clean(
+                snapshot,
+                embedded=bool(data.get("embedding"))
+                if embed
+                else self._embedded_content is not None,
+            )
+            if self.invalidates_context:
+                await invalidate_context(self.id)
 
         except ValidationError as e:
             logger.error(f"Validation failed: {e}")
@@ -166,8 +304,11 @@ class ObjectModel(BaseModel):
             logger.error(f"Error saving record: {e}")
             raise DatabaseOperationError(e)
 
-    def _prepare_save_data(self) -> Dict[str, Any]:
-        data = self.model_dump()
+    def _prepare_save_data(
+        self, data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if data is None:
+            data = self.model_dump()
         return {
             key: value
             for key, value in data.items()
@@ -179,7 +320,11 @@ class ObjectModel(BaseModel):
             raise InvalidInputError("Cannot delete object without an ID")
         try:
             logger.debug(f"Deleting record with id {self.id}")
-            return await repo_delete(self.id)
+            result = await repo_delete(self.id)
+            await vector_store.forget_record(self.id)
+            if self.invalidates_context:
+                await invalidate_context(self.id)
+            return result
         except Exception as e:
             logger.error(
                 f"Error deleting {self.__class__.table_name} with id {self.id}: {str(e)}"
@@ -1,4 +1,7 @@
-from typing import ClassVar, Dict, Optional, Union
+import json
+import os
+import time
+from typing import Any, ClassVar, Dict, Optional, Tuple, Union
 
 from esperanto import (
     AIFactory,
@@ -14,6 +17,11 @@ from open_notebook.domain.base import ObjectModel, RecordModel
 
 ModelType = Union[LanguageModel, EmbeddingModel, SpeechToTextModel, TextToSpeechModel]
 
+# Seconds a resolved default/model/provider client is reused. The models API
+# invalidates the cache of its own process; other processes (the worker) pick
+# up changes when entries expire.
+MODEL_CACHE_TTL = float(os.getenv("MODEL_CACHE_TTL", "60"))
+
 
 class Model(ObjectModel):
     table_name: ClassVar[str] = "model"
@@ -66,16 +74,77 @@ class DefaultModels(RecordModel):
 
 
 class ModelManager:
-    def __init__(self):
-        pass  # No caching needed
+    def __init__(self, ttl: float = MODEL_CACHE_TTL):
+        # TTL caches of the defaults record, model records and the Esperanto
+        # instances built from them, keyed by (model id, config kwargs)
+        self.ttl = ttl
+        self._defaults: Optional[Tuple[float, DefaultModels]] = None
+        self._records: Dict[str, Tuple[float, Model]] = {}
+        self._instances: Dict[Tuple[str, str], Tuple[float, ModelType]] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {
+            kind: {"hits": 0, "misses": 0}
+            for kind in ("defaults", "records", "instances")
+        }
+
+    def _fresh(self, entry: Optional[Tuple[float, Any]]) -> bool:
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def _count(self, kind: str, hit: bool) -> None:
+        self._metrics[kind]["hits" if hit else "misses"] += 1
+
+    @staticmethod
+    def _config_key(kwargs: Dict[str, Any]) -> str:
+        return json.dumps(kwargs, sort_keys=True, default=repr)
+
+    def invalidate(self, model_id: Optional[str] = None) -> None:
+        """
+        Drop cached entries: everything, or one model's record and instances.
+        The defaults record is always dropped.
+        """
+        self._defaults = None
+        if model_id is None:
+            self._records.clear()
+            self._instances.clear()
+            return
+        self._records.pop(model_id, None)
+        for key in [key for key in self._instances if key[0] == model_id]:
+            del self._instances[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes of the caches."""
+        return {
+            "ttl": self.ttl,
+            "defaults": dict(self._metrics["defaults"]),
+            "records": dict(self._metrics["records"], size=len(self._records)),
+            "instances": dict(
+                self._metrics["instances"], size=len(self._instances)
+            ),
+        }
+
+    async def _get_record(self, model_id: str) -> Model:
+        entry = self._records.get(model_id)
+        if self._fresh(entry):
+            self._count("records", True)
+            return entry[1]  # type: ignore[index]
+        self._count("records", False)
+        model: Model = await Model.get(model_id)
+        self._records[model_id] = (time.monotonic(), model)
+        return model
 
     async def get_model(self, model_id: str, **kwargs) -> Optional[ModelType]:
-        """Get a model by ID. Esperanto will cache the actual model instance."""
+        """Get a model by ID, reusing the instance built for the same config."""
         if not model_id:
             return None
 
+        key = (model_id, self._config_key(kwargs))
+        cached = self._instances.get(key)
+        if self._fresh(cached):
+            self._count("instances", True)
+            return cached[1]  # type: ignore[index]
+        self._count("instances", False)
+
         try:
-            model: Model = await Model.get(model_id)
+            model = await self._get_record(model_id)
         except Exception:
             raise ValueError(f"Model with ID {model_id} not found")
 
@@ -87,27 +156,28 @@ class ModelManager:
         ]:
             raise ValueError(f"Invalid model type: {model.type}")
 
-        # Create model based on type (Esperanto will cache the instance)
+        # Create model based on type
+        instance: ModelType
         if model.type == "language":
-            return AIFactory.create_language(
+            instance = AIFactory.create_language(
                 model_name=model.name,
                 provider=model.provider,
                 config=kwargs,
             )
         elif model.type == "embedding":
-            return AIFactory.create_embedding(
+            instance = AIFactory.create_embedding(
                 model_name=model.name,
                 provider=model.provider,
                 config=kwargs,
             )
         elif model.type == "speech_to_text":
-            return AIFactory.create_speech_to_text(
+            instance = AIFactory.create_speech_to_text(
                 model_name=model.name,
                 provider=model.provider,
                 config=kwargs,
             )
         elif model.type == "text_to_speech":
-            return AIFactory.create_text_to_speech(
+            instance = AIFactory.create_text_to_speech(
                 model_name=model.name,
                 provider=model.provider,
                 config=kwargs,
@@ -115,11 +185,19 @@ class ModelManager:
         else:
             raise ValueError(f"Invalid model type: {model.type}")
 
+        self._instances[key] = (time.monotonic(), instance)
+        return instance
+
     async def get_defaults(self) -> DefaultModels:
-        """Get the default models configuration from database"""
+        """Get the default models configuration (cached for `ttl` seconds)"""
+        if self._fresh(self._defaults):
+            self._count("defaults", True)
+            return self._defaults[1]  # type: ignore[index]
+        self._count("defaults", False)
         defaults = await DefaultModels.get_instance()
         if not defaults:
             raise RuntimeError("Failed to load default models configuration")
+        self._defaults = (time.monotonic(), defaults)
         return defaults
 
     async def get_speech_to_text(self, **kwargs) -> Optional[SpeechToTextModel]:
@@ -1,4 +1,5 @@
 import asyncio
+import os
 from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Union
 
 from loguru import logger
@@ -6,15 +7,44 @@ from pydantic import BaseModel, Field, field_validator
 from surreal_commands import submit_command
 from surrealdb import RecordID
 
-from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.database import vector_store
+from open_notebook.database.repository import (
+    ensure_record_id,
+    repo_query,
+    repo_query_many,
+)
+from open_notebook.database.vector_index import (
+    VECTOR_INDEX_MAX_RESULTS,
+    prepare_vector_write,
+    vector_indexes_ready,
+)
 from open_notebook.domain.base import ObjectModel
 from open_notebook.domain.models import model_manager
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
 from open_notebook.utils import split_text
+from open_notebook.utils.context_cache import invalidate_context
+from open_notebook.utils.embedding_cache import cached_embed
+
+# Scan every row when the HNSW indexes can't serve a query (no index yet, or
+# the query vector has a different dimension than the index)
+VECTOR_SEARCH_EXACT_FALLBACK = (
+    os.getenv("VECTOR_SEARCH_EXACT_FALLBACK", "true").lower() == "true"
+)
+
+# Hybrid search: weights of the text and vector rankings in reciprocal rank
+# fusion, and the RRF constant k (higher flattens the rank contributions)
+HYBRID_SEARCH_TEXT_WEIGHT = float(os.getenv("HYBRID_SEARCH_TEXT_WEIGHT", "1.0"))
+HYBRID_SEARCH_VECTOR_WEIGHT = float(os.getenv("HYBRID_SEARCH_VECTOR_WEIGHT", "1.0"))
+HYBRID_SEARCH_RRF_K = int(os.getenv("HYBRID_SEARCH_RRF_K", "60"))
+# Each search fetches this many candidates per requested result, so that
+# results deduplicated by parent still fill the requested count. The vector
+# search fetches at most VECTOR_INDEX_MAX_RESULTS, to stay on the HNSW index.
+HYBRID_SEARCH_CANDIDATE_FACTOR = 2
 
 
 class Notebook(ObjectModel):
     table_name: ClassVar[str] = "notebook"
+    invalidates_context: ClassVar[bool] = True
     name: str
     description: str
     archived: Optional[bool] = False
@@ -37,7 +67,14 @@ class Notebook(ObjectModel):
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return [Source(**src["source"]) for src in srcs] if srcs else []
+            return (
+                [
+                    Source._from_record(src["source"], omitted={"full_text"})
+                    for src in srcs
+                ]
+                if srcs
+                else []
+            )
         except Exception as e:
             logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -54,7 +91,11 @@ class Notebook(ObjectModel):
             """,
                 {"id": ensure_record_id(self.id)},
             )
-            return [Note(**src["note"]) for src in srcs] if srcs else []
+            return (
+                [Note._from_record(src["note"], omitted={"content"}) for src in srcs]
+                if srcs
+                else []
+            )
         except Exception as e:
             logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -112,6 +153,7 @@ class SourceEmbedding(ObjectModel):
 
 class SourceInsight(ObjectModel):
     table_name: ClassVar[str] = "source_insight"
+    invalidates_context: ClassVar[bool] = True
     insight_type: str
     content: str
 
@@ -143,6 +185,7 @@ class SourceInsight(ObjectModel):
 
 class Source(ObjectModel):
     table_name: ClassVar[str] = "source"
+    invalidates_context: ClassVar[bool] = True
     asset: Optional[Asset] = None
     title: Optional[str] = None
     topics: Optional[List[str]] = Field(default_factory=list)
@@ -172,6 +215,13 @@ class Source(ObjectModel):
             return str(value)
         return str(value) if value else None
 
+    async def get_full_text(self) -> Optional[str]:
+        """
+        The source's text. Sources loaded without it (e.g.
+        Source.get(id, omit=["full_text"])) fetch it on first call.
+        """
+        return await self._load_field("full_text")
+
     async def get_status(self) -> Optional[str]:
         """Get the processing status of the associated command"""
         if not self.command:
@@ -214,16 +264,19 @@ class Source(ObjectModel):
             return None
 
     async def get_context(
-        self, context_size: Literal["short", "long"] = "short"
+        self,
+        context_size: Literal["short", "long"] = "short",
+        insights: Optional[List[SourceInsight]] = None,
     ) -> Dict[str, Any]:
-        insights_list = await self.get_insights()
+        """Context dict of the source; pass preloaded insights to skip the query."""
+        insights_list = insights if insights is not None else await self.get_insights()
         insights = [insight.model_dump() for insight in insights_list]
         if context_size == "long":
             return dict(
                 id=self.id,
                 title=self.title,
                 insights=insights,
-                full_text=self.full_text,
+                full_text=await self.get_full_text(),
             )
         else:
             return dict(id=self.id, title=self.title, insights=insights)
@@ -261,7 +314,9 @@ class Source(ObjectModel):
     async def add_to_notebook(self, notebook_id: str) -> Any:
         if not notebook_id:
             raise InvalidInputError("Notebook ID must be provided")
-        return await self.relate("reference", notebook_id)
+        result = await self.relate("reference", notebook_id)
+        await invalidate_context(notebook_id)
+        return result
 
     async def vectorize(self) -> str:
         """
@@ -281,13 +336,13 @@ class Source(ObjectModel):
         logger.info(f"Submitting vectorization job for source {self.id}")
 
         try:
-            if not self.full_text:
+            if not await self.get_full_text():
                 raise ValueError(f"Source {self.id} has no text to vectorize")
 
             # Submit the vectorize_source command which will:
             # 1. Delete existing embeddings (idempotency)
             # 2. Split text into chunks
-            # 3. Submit each chunk as an embed_chunk job
+            # 3. Submit batches of chunks as embed_chunk_batch jobs
             command_id = submit_command(
                 "open_notebook",      # app name
                 "vectorize_source",   # command name
@@ -318,9 +373,11 @@ class Source(ObjectModel):
             raise InvalidInputError("Insight type and content must be provided")
         try:
             embedding = (
-                (await EMBEDDING_MODEL.aembed([content]))[0] if EMBEDDING_MODEL else []
+                (await cached_embed(EMBEDDING_MODEL, [content]))[0] if EMBEDDING_MODEL else None
             )
-            return await repo_query(
+            if embedding:
+                await prepare_vector_write(len(embedding))
+            result = await repo_query(
                 """
                 CREATE source_insight CONTENT {
                         "source": $source_id,
@@ -335,13 +392,16 @@ class Source(ObjectModel):
                     "embedding": embedding,
                 },
             )
+            await vector_store.record_vectors("source_insight", result)
+            await invalidate_context(self.id)
+            return result
         except Exception as e:
             logger.error(f"Error adding insight to source {self.id}: {str(e)}")
             raise  # DatabaseOperationError(e)
 
-    def _prepare_save_data(self) -> dict:
+    def _prepare_save_data(self, data: Optional[dict] = None) -> dict:
         """Override to ensure command field is always RecordID format for database"""
-        data = super()._prepare_save_data()
+        data = super()._prepare_save_data(data)
 
         # Ensure command field is RecordID format if not None
         if data.get("command") is not None:
@@ -352,6 +412,7 @@ class Source(ObjectModel):
 
 class Note(ObjectModel):
     table_name: ClassVar[str] = "note"
+    invalidates_context: ClassVar[bool] = True
     title: Optional[str] = None
     note_type: Optional[Literal["human", "ai"]] = None
     content: Optional[str] = None
@@ -366,7 +427,9 @@ class Note(ObjectModel):
     async def add_to_notebook(self, notebook_id: str) -> Any:
         if not notebook_id:
             raise InvalidInputError("Notebook ID must be provided")
-        return await self.relate("artifact", notebook_id)
+        result = await self.relate("artifact", notebook_id)
+        await invalidate_context(notebook_id)
+        return result
 
     def get_context(
         self, context_size: Literal["short", "long"] = "short"
@@ -431,27 +494,171 @@ async def vector_search(
     note: bool = True,
     minimum_score=0.2,
 ):
-    if not keyword:
+    return (
+        await vector_search_many([keyword], results, source, note, minimum_score)
+    )[0]
+
+
+async def vector_search_many(
+    keywords: List[str],
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score=0.2,
+) -> List[List[Dict[str, Any]]]:
+    """
+    vector_search for several keywords at once.
+
+    The keywords are embedded in one call and searched in one request (one
+    multi-statement query on SurrealDB). Returns one result list per keyword.
+    """
+    if not keywords or not all(keywords):
         raise InvalidInputError("Search keyword cannot be empty")
     try:
         EMBEDDING_MODEL = await model_manager.get_embedding_model()
         if EMBEDDING_MODEL is None:
             raise ValueError("EMBEDDING_MODEL is not configured")
-        embed = (await EMBEDDING_MODEL.aembed([keyword]))[0]
-        search_results = await repo_query(
-            """
-            SELECT * FROM fn::vector_search($embed, $results, $source, $note, $minimum_score);
-            """,
+        embeds = await cached_embed(EMBEDDING_MODEL, list(keywords))
+        local_results = await vector_store.search_many(
+            embeds, results, source, note, minimum_score
+        )
+        if local_results is not None:
+            return local_results
+        # Exact scan while the indexes are (re)built in the background
+        ready = await vector_indexes_ready(len(embeds[0]))
+        statements = "".join(
+            f"SELECT * FROM fn::vector_search($embed_{i}, $results, $source, $note, $minimum_score, $exact_fallback);\n"
+            for i in range(len(embeds))
+        )
+        return await repo_query_many(
+            statements,
             {
-                "embed": embed,
+                **{f"embed_{i}": embed for i, embed in enumerate(embeds)},
                 "results": results,
                 "source": source,
                 "note": note,
                 "minimum_score": minimum_score,
+                "exact_fallback": VECTOR_SEARCH_EXACT_FALLBACK or not ready,
             },
         )
-        return search_results
     except Exception as e:
         logger.error(f"Error performing vector search: {str(e)}")
         logger.exception(e)
         raise DatabaseOperationError(e)
+
+
+def reciprocal_rank_fusion(
+    rankings: List[Tuple[List[Dict[str, Any]], float]],
+    limit: int,
+    k: int = 60,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists, deduplicated by parent_id.
+
+    Each parent scores sum(weight / (k + rank)) over the lists it appears in,
+    rank being its best (1-based) position in that list. The hit that
+    contributed most represents the parent; matches of all hits are merged.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results, weight in rankings:
+        if weight <= 0:
+            continue
+        rank = 0
+        seen = set()
+        for result in results:
+            parent = str(result.get("parent_id") or result.get("id"))
+            if parent in seen:
+                entry = fused[parent]
+                entry["matches"].extend(
+                    m for m in result.get("matches") or [] if m not in entry["matches"]
+                )
+                continue
+            seen.add(parent)
+            rank += 1
+            contribution = weight / (k + rank)
+            entry = fused.get(parent)
+            if entry is None:
+                entry = fused[parent] = {
+                    "result": result,
+                    "best": contribution,
+                    "score": 0.0,
+                    "matches": [],
+                    "scores": {},
+                }
+            elif contribution > entry["best"]:
+                entry["result"] = result
+                entry["best"] = contribution
+            entry["score"] += contribution
+            entry["matches"].extend(
+                m for m in result.get("matches") or [] if m not in entry["matches"]
+            )
+            for field in ("relevance", "similarity"):
+                if field in result:
+                    entry["scores"].setdefault(field, result[field])
+
+    ranked = sorted(fused.values(), key=lambda e: e["score"], reverse=True)[:limit]
+    return [
+        {
+            **entry["result"],
+            **entry["scores"],
+            "matches": entry["matches"],
+            "final_score": entry["score"],
+        }
+        for entry in ranked
+    ]
+
+
+async def hybrid_search(
+    keyword: str,
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score=0.2,
+    text_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None,
+):
+    """Run text and vector search concurrently and fuse them with RRF."""
+    return (
+        await hybrid_search_many(
+            [keyword], results, source, note, minimum_score, text_weight, vector_weight
+        )
+    )[0]
+
+
+async def hybrid_search_many(
+    keywords: List[str],
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score=0.2,
+    text_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None,
+) -> List[List[Dict[str, Any]]]:
+    """hybrid_search for several keywords, their vector searches batched."""
+    if not keywords or not all(keywords):
+        raise InvalidInputError("Search keyword cannot be empty")
+    candidates = min(results * HYBRID_SEARCH_CANDIDATE_FACTOR, 1000)
+    vector_candidates = min(candidates, VECTOR_INDEX_MAX_RESULTS)
+    *text_results, vector_results = await asyncio.gather(
+        *(text_search(keyword, candidates, source, note) for keyword in keywords),
+        vector_search_many(keywords, vector_candidates, source, note, minimum_score),
+    )
+    return [
+        reciprocal_rank_fusion(
+            [
+                (
+                    text_ranking or [],
+                    HYBRID_SEARCH_TEXT_WEIGHT if text_weight is None else text_weight,
+                ),
+                (
+                    vector_ranking or [],
+                    HYBRID_SEARCH_VECTOR_WEIGHT
+                    if vector_weight is None
+                    else vector_weight,
+                ),
+            ],
+            results,
+            k=HYBRID_SEARCH_RRF_K,
+        )
+        for text_ranking, vector_ranking in zip(text_results, vector_results)
+    ]
@@ -137,9 +137,9 @@ class PodcastEpisode(ObjectModel):
             return ensure_record_id(value)
         return value
 
-    def _prepare_save_data(self) -> dict:
+    def _prepare_save_data(self, data: Optional[dict] = None) -> dict:
         """Override to ensure command field is always RecordID format for database"""
-        data = super()._prepare_save_data()
+        data = super()._prepare_save_data(data)
         
         # Ensure command field is RecordID format if not None
         if data.get("command") is not None:
@@ -1,17 +1,34 @@
+import asyncio
 import operator
-from typing import Annotated, List
+import os
+from typing import Annotated, Any, Dict, List, Optional
 
 from ai_prompter import Prompter
 from langchain_core.output_parsers.pydantic import PydanticOutputParser
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Send
+from loguru import logger
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 
-from open_notebook.domain.notebook import vector_search
+from open_notebook.domain.notebook import hybrid_search_many, vector_search_many
 from open_notebook.graphs.utils import provision_langchain_model
 from open_notebook.utils import clean_thinking_content
+from open_notebook.utils.context_builder import ContextItem
+from open_notebook.utils.context_packing import (
+    TRUNCATABLE_FIELDS,
+    PackingReport,
+    TokenOffsets,
+    measure_content,
+    pack_items,
+)
+from open_notebook.utils.text_splitter import tiktoken_offsets
+
+# Fast mode: hits retrieved for the question, and the token budget they are
+# packed into for the answer
+FAST_ASK_RESULTS = int(os.getenv("FAST_ASK_RESULTS", "20"))
+FAST_ASK_MAX_TOKENS = int(os.getenv("FAST_ASK_MAX_TOKENS", "12000"))
 
 
 class SubGraphState(TypedDict):
@@ -41,11 +58,46 @@ class Strategy(BaseModel):
 class ThreadState(TypedDict):
     question: str
     strategy: Strategy
+    # Retrieval for the question itself, run while the strategy is written
+    question_results: Optional[list]
+    # Results of each search term of the strategy
+    search_results: Dict[str, list]
     answers: Annotated[list, operator.add]
     final_answer: str
 
 
+async def search_terms(
+    terms: List[str], config: RunnableConfig, results: int = 10
+) -> List[list]:
+    """Search all terms at once: one embedding call, one search request."""
+    # "hybrid" fuses text and vector rankings, deduplicated by parent
+    if config.get("configurable", {}).get("search_type") == "hybrid":
+        return await hybrid_search_many(terms, results, True, True)
+    return await vector_search_many(terms, results, True, True)
+
+
+def _term_key(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
 async def call_model_with_messages(state: ThreadState, config: RunnableConfig) -> dict:
+    # Retrieval doesn't depend on the strategy for the question itself: start
+    # it now, so it runs while the strategy model is thinking
+    speculative = asyncio.create_task(search_terms([state["question"]], config))
+    try:
+        strategy = await write_strategy(state, config)
+    except BaseException:
+        speculative.cancel()
+        raise
+    try:
+        question_results: Optional[list] = (await speculative)[0]
+    except Exception as e:
+        logger.warning(f"Speculative retrieval for the question failed: {e}")
+        question_results = None
+    return {"strategy": strategy, "question_results": question_results}
+
+
+async def write_strategy(state: ThreadState, config: RunnableConfig) -> Strategy:
     parser = PydanticOutputParser(pydantic_object=Strategy)
     system_prompt = Prompter(prompt_template="ask/entry", parser=parser).render(  # type: ignore[arg-type]
         data=state  # type: ignore[arg-type]
@@ -66,9 +118,50 @@ async def call_model_with_messages(state: ThreadState, config: RunnableConfig) -
     cleaned_content = clean_thinking_content(message_content)
 
     # Parse the cleaned JSON content
-    strategy = parser.parse(cleaned_content)
+    return parser.parse(cleaned_content)
+
+
+def planned_searches(state: ThreadState) -> List[Search]:
+    """The strategy's searches, or the question itself when it planned none."""
+    return state["strategy"].searches or [
+        Search(
+            term=state["question"],
+            instructions="Extract the information needed to answer the question.",
+        )
+    ]
 
-    return {"strategy": strategy}
+
+async def retrieve(state: ThreadState, config: RunnableConfig) -> dict:
+    """
+    Run every planned search in one batch, reusing the speculative one.
+
+    The question's own results go to one branch: the search for the question,
+    if planned, or else the first planned search that finds nothing. Only one,
+    as each branch is a model call and the others would summarize the same hits.
+    """
+    found: Dict[str, list] = {}
+    question_results = state.get("question_results") or []
+    if state.get("question_results") is not None:
+        found[_term_key(state["question"])] = question_results
+    pending = list(
+        dict.fromkeys(
+            search.term
+            for search in planned_searches(state)
+            if search.term.strip() and _term_key(search.term) not in found
+        )
+    )
+    if pending:
+        for term, results in zip(pending, await search_terms(pending, config)):
+            found[_term_key(term)] = results
+    search_results: Dict[str, list] = {}
+    for search in planned_searches(state):
+        if search.term in search_results:
+            continue
+        results = found.get(_term_key(search.term)) or question_results
+        if results is question_results:
+            question_results = []
+        search_results[search.term] = results
+    return {"search_results": search_results}
 
 
 async def trigger_queries(state: ThreadState, config: RunnableConfig):
@@ -79,22 +172,19 @@ async def trigger_queries(state: ThreadState, config: RunnableConfig):
                 "question": state["question"],
                 "instructions": s.instructions,
                 "term": s.term,
+                "results": state["search_results"].get(s.term, []),
                 # "type": s.type,
             },
         )
-        for s in state["strategy"].searches
+        for s in planned_searches(state)
     ]
 
 
 async def provide_answer(state: SubGraphState, config: RunnableConfig) -> dict:
     payload = state
-    # if state["type"] == "text":
-    #     results = text_search(state["term"], 10, True, True)
-    # else:
-    results = await vector_search(state["term"], 10, True, True)
+    results = state.get("results") or []
     if len(results) == 0:
         return {"answers": []}
-    payload["results"] = results
     ids = [r["id"] for r in results]
     payload["ids"] = ids
     system_prompt = Prompter(prompt_template="ask/query_process").render(data=payload)  # type: ignore[arg-type]
@@ -117,18 +207,102 @@ async def write_final_answer(state: ThreadState, config: RunnableConfig) -> dict
         "tools",
         max_tokens=2000,
     )
-    ai_message = await model.ainvoke(system_prompt)
+    # Passing config lets graph.astream(stream_mode="messages") emit the tokens
+    ai_message = await model.ainvoke(system_prompt, config)
     final_content = ai_message.content if isinstance(ai_message.content, str) else str(ai_message.content)
     return {"final_answer": clean_thinking_content(final_content)}
 
 
 agent_state = StateGraph(ThreadState)
 agent_state.add_node("agent", call_model_with_messages)
+agent_state.add_node("retrieve", retrieve)
 agent_state.add_node("provide_answer", provide_answer)
 agent_state.add_node("write_final_answer", write_final_answer)
 agent_state.add_edge(START, "agent")
-agent_state.add_conditional_edges("agent", trigger_queries, ["provide_answer"])
+agent_state.add_edge("agent", "retrieve")
+agent_state.add_conditional_edges("retrieve", trigger_queries, ["provide_answer"])
 agent_state.add_edge("provide_answer", "write_final_answer")
 agent_state.add_edge("write_final_answer", END)
 
 graph = agent_state.compile()
+
+
+# Fast mode: one retrieval for the question and a single answer call,
+# instead of strategy + one summary per search + final answer
+
+
+class FastState(TypedDict):
+    question: str
+    results: list
+    packing: dict
+    final_answer: str
+
+
+def _hit_item(
+    hit: Dict[str, Any], priority: int, token_offsets: TokenOffsets
+) -> ContextItem:
+    table = str(hit["id"]).split(":", 1)[0]
+    item_type = {"source": "source", "note": "note"}.get(table, "insight")
+    content = {
+        "id": str(hit["id"]),
+        "title": hit.get("title"),
+        TRUNCATABLE_FIELDS[item_type]: "\n\n".join(
+            str(match) for match in hit.get("matches") or []
+        ),
+    }
+    return ContextItem(
+        id=str(hit["id"]),
+        type=item_type,  # type: ignore[arg-type]
+        content=content,
+        priority=priority,
+        tokens=measure_content(item_type, content, token_offsets),
+    )
+
+
+def pack_results(
+    results: List[Dict[str, Any]],
+    max_tokens: int = FAST_ASK_MAX_TOKENS,
+    token_offsets: TokenOffsets = tiktoken_offsets,
+) -> tuple[List[Dict[str, Any]], PackingReport]:
+    """
+    Pack search hits, best first, into max_tokens.
+
+    Each hit becomes a context item holding its matches; a hit that no
+    longer fits whole is truncated rather than dropped (see pack_items).
+    """
+    items = [
+        _hit_item(hit, len(results) - rank, token_offsets)
+        for rank, hit in enumerate(results)
+    ]
+    packed, report = pack_items(items, max_tokens, token_offsets)
+    return [item.content for item in packed], report
+
+
+async def retrieve_for_question(state: FastState, config: RunnableConfig) -> dict:
+    results = (await search_terms([state["question"]], config, FAST_ASK_RESULTS))[0]
+    packed, report = pack_results(results)
+    return {"results": packed, "packing": report.to_dict()}
+
+
+async def write_fast_answer(state: FastState, config: RunnableConfig) -> dict:
+    system_prompt = Prompter(prompt_template="ask/fast_answer").render(data=state)  # type: ignore[arg-type]
+    model = await provision_langchain_model(
+        system_prompt,
+        config.get("configurable", {}).get("final_answer_model"),
+        "tools",
+        max_tokens=2000,
+    )
+    # Passing config lets graph.astream(stream_mode="messages") emit the tokens
+    ai_message = await model.ainvoke(system_prompt, config)
+    final_content = ai_message.content if isinstance(ai_message.content, str) else str(ai_message.content)
+    return {"final_answer": clean_thinking_content(final_content)}
+
+
+fast_state = StateGraph(FastState)
+fast_state.add_node("retrieve", retrieve_for_question)
+fast_state.add_node("write_final_answer", write_fast_answer)
+fast_state.add_edge(START, "retrieve")
+fast_state.add_edge("retrieve", "write_final_answer")
+fast_state.add_edge("write_final_answer", END)
+
+fast_graph = fast_state.compile()
@@ -1,20 +1,18 @@
-import asyncio
-import sqlite3
 from typing import Annotated, Optional
 
 from ai_prompter import Prompter
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import SystemMessage
 from langchain_core.runnables import RunnableConfig
-
-from open_notebook.utils import clean_thinking_content
-from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
 from typing_extensions import TypedDict
 
-from open_notebook.config import LANGGRAPH_CHECKPOINT_FILE
 from open_notebook.domain.notebook import Notebook
+from open_notebook.graphs.checkpointer import get_checkpointer
+from open_notebook.graphs.history import window_history
 from open_notebook.graphs.utils import provision_langchain_model
+from open_notebook.utils import clean_thinking_content, token_count
 
 
 class ThreadState(TypedDict):
@@ -23,68 +21,51 @@ class ThreadState(TypedDict):
     context: Optional[str]
     context_config: Optional[dict]
     model_override: Optional[str]
+    history_summary: Optional[str]
+    history_summarized: Optional[int]
 
 
-def call_model_with_messages(state: ThreadState, config: RunnableConfig) -> dict:
-    system_prompt = Prompter(prompt_template="chat").render(data=state)  # type: ignore[arg-type]
-    payload = [SystemMessage(content=system_prompt)] + state.get("messages", [])
+async def call_model_with_messages(state: ThreadState, config: RunnableConfig) -> dict:
+    history = await window_history(state)
+    system_prompt = Prompter(prompt_template="chat").render(
+        data={**state, "history_summary": history.summary}  # type: ignore[arg-type]
+    )
+    payload = [SystemMessage(content=system_prompt)] + history.messages
     model_id = config.get("configurable", {}).get("model_id") or state.get(
         "model_override"
     )
 
-    # Handle async model provisioning from sync context
-    def run_in_new_loop():
-        """Run the async function in a new event loop"""
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            return new_loop.run_until_complete(
-                provision_langchain_model(
-                    str(payload), model_id, "chat", max_tokens=8192
-                )
-            )
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
-
-    try:
-        # Try to get the current event loop
-        asyncio.get_running_loop()
-        # If we're in an event loop, run in a thread with a new loop
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_in_new_loop)
-            model = future.result()
-    except RuntimeError:
-        # No event loop running, safe to use asyncio.run()
-        model = asyncio.run(
-            provision_langchain_model(
-                str(payload),
-                model_id,
-                "chat",
-                max_tokens=8192,
-            )
-        )
+    model = await provision_langchain_model(
+        str(payload),
+        model_id,
+        "chat",
+        tokens=token_count(system_prompt) + history.tokens,
+        max_tokens=8192,
+    )
 
-    ai_message = model.invoke(payload)
+    # Passing config lets graph.astream(stream_mode="messages") emit the tokens
+    ai_message = await model.ainvoke(payload, config)
 
     # Clean thinking content from AI response (e.g., <think>...</think> tags)
     content = ai_message.content if isinstance(ai_message.content, str) else str(ai_message.content)
     cleaned_content = clean_thinking_content(content)
     cleaned_message = ai_message.model_copy(update={"content": cleaned_content})
 
-    return {"messages": cleaned_message}
+    return {"messages": cleaned_message, **history.state_update()}
 
 
-conn = sqlite3.connect(
-    LANGGRAPH_CHECKPOINT_FILE,
-    check_same_thread=False,
-)
-memory = SqliteSaver(conn)
-
 agent_state = StateGraph(ThreadState)
 agent_state.add_node("agent", call_model_with_messages)
 agent_state.add_edge(START, "agent")
 agent_state.add_edge("agent", END)
-graph = agent_state.compile(checkpointer=memory)
+
+_graph: Optional[CompiledStateGraph] = None
+
+
+async def get_graph() -> CompiledStateGraph:
+    """The chat graph, compiled against the (lazily opened) async checkpointer."""
+    global _graph
+    checkpointer = await get_checkpointer()
+    if _graph is None or _graph.checkpointer is not checkpointer:
+        _graph = agent_state.compile(checkpointer=checkpointer)
+    return _graph
@@ -0,0 +1,349 @@
+"""
+Async checkpointer shared by the chat graphs.
+
+AsyncSqliteSaver binds to the event loop it is created on, so the connection
+is opened on first use (on the API's loop) rather than at import. Graphs are
+compiled against it lazily as well (get_graph, get_source_chat_graph).
+
+Every checkpoint holds a thread's full state, so only the last
+CHECKPOINT_KEEP_LAST checkpoints of each thread are kept: older ones (and
+their pending writes) are pruned as new ones are saved. Deleting a chat
+session deletes its thread, and run_checkpoint_maintenance periodically
+prunes every thread, truncates the WAL and VACUUMs the file once enough of
+it is free pages.
+
+The file's format version is kept in PRAGMA user_version and upgraded when
+the checkpointer is opened (see ChatCheckpointer.migrate).
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from loguru import logger
+
+from open_notebook.config import LANGGRAPH_CHECKPOINT_FILE
+
+# Checkpoints kept per thread (the latest holds the whole conversation)
+CHECKPOINT_KEEP_LAST = max(2, int(os.getenv("CHECKPOINT_KEEP_LAST", "10")))
+# Hours between maintenance runs; 0 disables the background job
+CHECKPOINT_MAINTENANCE_INTERVAL_HOURS = float(
+    os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL_HOURS", "24")
+)
+
+# VACUUM once this fraction of the file is free pages
+_VACUUM_FREE_RATIO = 0.2
+
+# Format of the checkpoint file, stored in PRAGMA user_version
+CHECKPOINT_FORMAT_VERSION = 1
+# Channels source chat checkpointed before version 1: the built source
+# context, now rebuilt (or served from the context cache) on every turn
+_SOURCE_CHAT_CONTEXT_CHANNELS = ("source", "insights", "context")
+_MIGRATION_BATCH = 100
+
+
+class _Latency:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, started: float) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        self.count += 1
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+        }
+
+
+class ChatCheckpointer(AsyncSqliteSaver):
+    """AsyncSqliteSaver that prunes old checkpoints and times reads and writes."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        path: str,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+    ):
+        super().__init__(conn)
+        self.path = path
+        self.keep_last = keep_last
+        self.reads = _Latency()
+        self.writes = _Latency()
+        self.pruned = 0
+        self.vacuums = 0
+        self.last_maintenance: Optional[float] = None
+
+    async def aget_tuple(self, config: RunnableConfig):
+        started = time.perf_counter()
+        try:
+            return await super().aget_tuple(config)
+        finally:
+            self.reads.add(started)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        started = time.perf_counter()
+        try:
+            saved = await super().aput(config, checkpoint, metadata, new_versions)
+            await self.prune_thread(
+                saved["configurable"]["thread_id"],
+                saved["configurable"]["checkpoint_ns"],
+            )
+            return saved
+        finally:
+            self.writes.add(started)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            await super().aput_writes(config, writes, task_id, task_path)
+        finally:
+            self.writes.add(started)
+
+    async def prune_thread(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Delete all but the thread's last keep_last checkpoints."""
+        params = (str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns)
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM checkpoints
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ?
+                    ORDER BY checkpoint_id DESC LIMIT ?
+                )
+                """,
+                (*params, self.keep_last),
+            )
+            deleted = max(cur.rowcount, 0)
+            if deleted:
+                await cur.execute(
+                    """
+                    DELETE FROM writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = ? AND checkpoint_ns = ?
+                    )
+                    """,
+                    params,
+                )
+            await self.conn.commit()
+        self.pruned += deleted
+        return deleted
+
+    async def compact(self) -> Dict[str, Any]:
+        """
+        Prune every thread, truncate the WAL and VACUUM if worthwhile.
+
+        Runs on the saver's connection, under its lock: chat turns wait for
+        it, which is why it only VACUUMs when a good part of the file is free.
+        """
+        await self.setup()
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns
+                            ORDER BY checkpoint_id DESC
+                        ) AS position
+                        FROM checkpoints
+                    ) WHERE position > ?
+                )
+                """,
+                (self.keep_last,),
+            )
+            pruned = max(cur.rowcount, 0)
+            await cur.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                        AND c.checkpoint_ns = writes.checkpoint_ns
+                        AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+            await self.conn.commit()
+            await cur.execute("PRAGMA freelist_count")
+            free_pages = (await cur.fetchone())[0]
+            await cur.execute("PRAGMA page_count")
+            pages = (await cur.fetchone())[0]
+            vacuumed = bool(pages) and free_pages / pages >= _VACUUM_FREE_RATIO
+            if vacuumed:
+                await cur.execute("VACUUM")
+            await cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.pruned += pruned
+        self.vacuums += int(vacuumed)
+        self.last_maintenance = time.time()
+        return {"pruned": pruned, "free_pages": free_pages, "vacuumed": vacuumed}
+
+    async def migrate(self) -> int:
+        """
+        Bring the file up to CHECKPOINT_FORMAT_VERSION.
+
+        Version 1 drops the source context from source chat checkpoints
+        (recognized by their source_id channel). Returns the number of
+        checkpoints rewritten.
+        """
+        await self.setup()
+        async with self.lock:
+            async with self.conn.execute("PRAGMA user_version") as cur:
+                version = (await cur.fetchone())[0]
+            if version >= CHECKPOINT_FORMAT_VERSION:
+                return 0
+            async with self.conn.execute("SELECT rowid FROM checkpoints") as cur:
+                rowids = [row[0] for row in await cur.fetchall()]
+            rewritten = 0
+            threads = set()
+            for start in range(0, len(rowids), _MIGRATION_BATCH):
+                batch = rowids[start : start + _MIGRATION_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                async with self.conn.execute(
+                    "SELECT rowid, thread_id, type, checkpoint FROM checkpoints "
+                    f"WHERE rowid IN ({placeholders})",
+                    batch,
+                ) as cur:
+                    rows = await cur.fetchall()
+                updates = []
+                for rowid, thread_id, type_, blob in rows:
+                    checkpoint = self.serde.loads_typed((type_, blob))
+                    values = checkpoint.get("channel_values", {})
+                    if "source_id" not in values:
+                        continue
+                    for channel in _SOURCE_CHAT_CONTEXT_CHANNELS:
+                        values.pop(channel, None)
+                        checkpoint.get("channel_versions", {}).pop(channel, None)
+                    updates.append((*self.serde.dumps_typed(checkpoint), rowid))
+                    threads.add(thread_id)
+                if updates:
+                    await self.conn.executemany(
+                        "UPDATE checkpoints SET type = ?, checkpoint = ? WHERE rowid = ?",
+                        updates,
+                    )
+                    rewritten += len(updates)
+            channels = ",".join("?" * len(_SOURCE_CHAT_CONTEXT_CHANNELS))
+            for thread_id in threads:
+                await self.conn.execute(
+                    f"DELETE FROM writes WHERE thread_id = ? AND channel IN ({channels})",
+                    (thread_id, *_SOURCE_CHAT_CONTEXT_CHANNELS),
+                )
+            await self.conn.execute(f"PRAGMA user_version = {CHECKPOINT_FORMAT_VERSION}")
+            await self.conn.commit()
+        if rewritten:
+            logger.info(
+                f"Dropped source context from {rewritten} checkpoints "
+                f"of {len(threads)} source chat threads"
+            )
+        return rewritten
+
+    async def stats(self) -> Dict[str, Any]:
+        await self.setup()
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*) FROM checkpoints"
+            )
+            threads, checkpoints = await cur.fetchone()
+        return {
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "keep_last": self.keep_last,
+            "reads": self.reads.to_dict(),
+            "writes": self.writes.to_dict(),
+            "pruned": self.pruned,
+            "vacuums": self.vacuums,
+            "last_maintenance": self.last_maintenance,
+            "size_bytes": _file_size(self.path),
+            "wal_bytes": _file_size(f"{self.path}-wal"),
+        }
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+_checkpointer: Optional[ChatCheckpointer] = None
+_lock = asyncio.Lock()
+
+
+async def open_checkpointer(
+    path: str, keep_last: int = CHECKPOINT_KEEP_LAST
+) -> ChatCheckpointer:
+    """Open a checkpointer on `path` in WAL mode, migrating older files."""
+    conn = await aiosqlite.connect(path, timeout=30)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    checkpointer = ChatCheckpointer(conn, path, keep_last=keep_last)
+    await checkpointer.migrate()
+    return checkpointer
+
+
+async def get_checkpointer() -> ChatCheckpointer:
+    """The checkpointer, opened on the running loop on first use."""
+    global _checkpointer
+    async with _lock:
+        if _checkpointer is None:
+            _checkpointer = await open_checkpointer(LANGGRAPH_CHECKPOINT_FILE)
+    return _checkpointer
+
+
+async def close_checkpointer() -> None:
+    """Close the connection; its worker thread would keep the process alive."""
+    global _checkpointer
+    async with _lock:
+        if _checkpointer is not None:
+            checkpointer, _checkpointer = _checkpointer, None
+            await checkpointer.conn.close()
+
+
+async def delete_chat_checkpoints(session_id: str) -> None:
+    """
+    Delete the checkpoints of a chat session.
+
+    Clients use the session id with or without its table prefix as the
+    thread id, so both are deleted.
+    """
+    bare_id = session_id.split(":", 1)[1] if ":" in session_id else session_id
+    checkpointer = await get_checkpointer()
+    for thread_id in {session_id, bare_id, f"chat_session:{bare_id}"}:
+        await checkpointer.adelete_thread(thread_id)
+
+
+async def run_checkpoint_maintenance() -> None:
+    """Compact the checkpoint file every CHECKPOINT_MAINTENANCE_INTERVAL_HOURS."""
+    if CHECKPOINT_MAINTENANCE_INTERVAL_HOURS <= 0:
+        return
+    while True:
+        await asyncio.sleep(CHECKPOINT_MAINTENANCE_INTERVAL_HOURS * 3600)
+        try:
+            result = await (await get_checkpointer()).compact()
+            logger.info(f"Checkpoint maintenance: {result}")
+        except Exception as e:
+            logger.warning(f"Checkpoint maintenance failed: {e}")
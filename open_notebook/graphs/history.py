@@ -0,0 +1,167 @@
+"""
+Token-budgeted chat history.
+
+The chat graphs used to send the whole conversation on every turn, so long
+sessions grew slower, costlier and were eventually routed to the large
+context model. window_history keeps the last CHAT_HISTORY_MAX_TURNS turns
+verbatim, within CHAT_HISTORY_MAX_TOKENS, and folds the turns before them
+into a rolling summary kept in the thread's state (history_summary, and
+history_summarized: how many leading messages it covers). The checkpointed
+messages themselves are never dropped.
+
+When the window overflows, it is folded down to half its limits, so the
+summary is updated every few turns rather than on each one.
+
+Token counts are cached per message id: a turn only tokenizes its new
+messages, and the total is passed to provision_langchain_model.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ai_prompter import Prompter
+from langchain_core.messages import BaseMessage
+from langgraph.constants import TAG_NOSTREAM
+from loguru import logger
+
+from open_notebook.graphs.utils import provision_langchain_model
+from open_notebook.utils import clean_thinking_content, token_count
+
+CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "10"))
+CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "8000"))
+
+_TOKEN_CACHE_SIZE = 10_000
+_message_token_cache: "OrderedDict[str, int]" = OrderedDict()
+
+Summarizer = Callable[[Optional[str], List[BaseMessage]], Awaitable[str]]
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    return content if isinstance(content, str) else str(content)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Token count of a message, cached by message id."""
+    if not message.id:
+        return token_count(_message_text(message))
+    tokens = _message_token_cache.get(message.id)
+    if tokens is None:
+        tokens = token_count(_message_text(message))
+        _message_token_cache[message.id] = tokens
+        if len(_message_token_cache) > _TOKEN_CACHE_SIZE:
+            _message_token_cache.popitem(last=False)
+    else:
+        _message_token_cache.move_to_end(message.id)
+    return tokens
+
+
+def window_start(
+    messages: List[BaseMessage],
+    summarized: int,
+    max_turns: int = CHAT_HISTORY_MAX_TURNS,
+    max_tokens: int = CHAT_HISTORY_MAX_TOKENS,
+) -> int:
+    """
+    Index of the first message to send verbatim.
+
+    The window starts at a user message, so a turn is never split. It stays
+    at `summarized` while the unsummarized messages fit the limits;
+    otherwise it moves to the earliest turn that fits half of them (at
+    least the last turn is always kept).
+    """
+    turn_starts = [
+        index
+        for index in range(summarized, len(messages))
+        if messages[index].type == "human"
+    ]
+    if not turn_starts:
+        return summarized
+
+    suffix_tokens: Dict[int, int] = {}
+    total = 0
+    for index in range(len(messages) - 1, summarized - 1, -1):
+        total += message_tokens(messages[index])
+        suffix_tokens[index] = total
+
+    if len(turn_starts) <= max_turns and suffix_tokens[summarized] <= max_tokens:
+        return summarized
+
+    keep_turns = max(1, max_turns // 2)
+    for position, start in enumerate(turn_starts):
+        turns = len(turn_starts) - position
+        if turns <= keep_turns and suffix_tokens[start] <= max_tokens // 2:
+            return start
+    return turn_starts[-1]
+
+
+async def summarize_messages(
+    summary: Optional[str], messages: List[BaseMessage]
+) -> str:
+    """Fold messages into the summary with the default transformation model."""
+    prompt = Prompter(prompt_template="chat_summary").render(
+        data={
+            "summary": summary,
+            "messages": [
+                {"type": message.type, "content": _message_text(message)}
+                for message in messages
+            ],
+        }
+    )
+    model = await provision_langchain_model(prompt, None, "transformation")
+    # Keep the summary's tokens out of the chat's token stream
+    response = await model.ainvoke(prompt, config={"tags": [TAG_NOSTREAM]})
+    return clean_thinking_content(_message_text(response)).strip()
+
+
+@dataclass
+class HistoryWindow:
+    messages: List[BaseMessage]
+    summary: Optional[str]
+    summarized: int
+    # Tokens of the verbatim messages (the summary goes in the system prompt)
+    tokens: int
+    changed: bool = False
+
+    def state_update(self) -> Dict[str, Any]:
+        """State keys to return from the node (empty when nothing was folded)."""
+        if not self.changed:
+            return {}
+        return {"history_summary": self.summary, "history_summarized": self.summarized}
+
+
+async def window_history(
+    state: Dict[str, Any],
+    summarize: Summarizer = summarize_messages,
+    max_turns: int = CHAT_HISTORY_MAX_TURNS,
+    max_tokens: int = CHAT_HISTORY_MAX_TOKENS,
+) -> HistoryWindow:
+    """
+    The messages to send this turn, folding older turns into the summary.
+
+    If summarizing fails the older turns are still left out, and folding is
+    retried on the next turn.
+    """
+    messages: List[BaseMessage] = state.get("messages", [])
+    summary: Optional[str] = state.get("history_summary")
+    summarized = min(state.get("history_summarized") or 0, len(messages))
+
+    start = window_start(messages, summarized, max_turns, max_tokens)
+    changed = False
+    if start > summarized:
+        try:
+            summary = await summarize(summary, messages[summarized:start])
+            summarized, changed = start, True
+        except Exception as e:
+            logger.warning(f"Could not summarize chat history: {e}")
+
+    window = messages[start:]
+    return HistoryWindow(
+        messages=window,
+        summary=summary,
+        summarized=summarized,
+        tokens=sum(message_tokens(message) for message in window),
+        changed=changed,
+    )
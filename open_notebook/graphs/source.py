@@ -10,7 +10,7 @@ from loguru import logger
 from typing_extensions import Annotated, TypedDict
 
 from open_notebook.domain.content_settings import ContentSettings
-from open_notebook.domain.models import Model, ModelManager
+from open_notebook.domain.models import Model, model_manager
 from open_notebook.domain.notebook import Asset, Source
 from open_notebook.domain.transformation import Transformation
 from open_notebook.graphs.transformation import graph as transform_graph
@@ -51,7 +51,6 @@ async def content_process(state: SourceState) -> dict:
 
     # Add speech-to-text model configuration from Default Models
     try:
-        model_manager = ModelManager()
         defaults = await model_manager.get_defaults()
         if defaults.default_speech_to_text_model:
             stt_model = await Model.get(defaults.default_speech_to_text_model)
@@ -1,34 +1,47 @@
-import asyncio
-import sqlite3
 from typing import Annotated, Dict, List, Optional
 
 from ai_prompter import Prompter
 from langchain_core.messages import AIMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-
-from open_notebook.utils import clean_thinking_content
-from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
 from typing_extensions import TypedDict
 
-from open_notebook.config import LANGGRAPH_CHECKPOINT_FILE
 from open_notebook.domain.notebook import Source, SourceInsight
+from open_notebook.graphs.checkpointer import get_checkpointer
+from open_notebook.graphs.history import window_history
 from open_notebook.graphs.utils import provision_langchain_model
+from open_notebook.utils import clean_thinking_content, token_count
 from open_notebook.utils.context_builder import ContextBuilder
+from open_notebook.utils.context_cache import (
+    CachedContext,
+    context_key,
+    get_cached_context,
+    put_cached_context,
+)
+
+# Token limit of the source context built for each turn
+SOURCE_CONTEXT_MAX_TOKENS = 50000
 
 
 class SourceChatState(TypedDict):
+    """
+    Checkpointed state of a source chat thread.
+
+    Only messages and ids are persisted: the source context is rebuilt (or
+    read from the context cache) by load_source_context on every turn.
+    """
+
     messages: Annotated[list, add_messages]
     source_id: str
-    source: Optional[Source]
-    insights: Optional[List[SourceInsight]]
-    context: Optional[str]
     model_override: Optional[str]
     context_indicators: Optional[Dict[str, List[str]]]
+    history_summary: Optional[str]
+    history_summarized: Optional[int]
 
 
-def call_model_with_source_context(
+async def call_model_with_source_context(
     state: SourceChatState, config: RunnableConfig
 ) -> dict:
     """
@@ -44,36 +57,9 @@ def call_model_with_source_context(
     if not source_id:
         raise ValueError("source_id is required in state")
 
-    # Build source context using ContextBuilder (run async code in new loop)
-    def build_context():
-        """Build context in a new event loop"""
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            context_builder = ContextBuilder(
-                source_id=source_id,
-                include_insights=True,
-                include_notes=False,  # Focus on source-specific content
-                max_tokens=50000,  # Reasonable limit for source context
-            )
-            return new_loop.run_until_complete(context_builder.build())
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
-
-    # Get the built context
-    try:
-        # Try to get the current event loop
-        asyncio.get_running_loop()
-        # If we're in an event loop, run in a thread with a new loop
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(build_context)
-            context_data = future.result()
-    except RuntimeError:
-        # No event loop running, safe to create a new one
-        context_data = build_context()
+    # Build source context using ContextBuilder (or the context cache)
+    source_context = await load_source_context(source_id)
+    context_data = source_context.context
 
     # Extract source and insights from context
     source = None
@@ -99,8 +85,10 @@ def call_model_with_source_context(
             insights.append(insight)
             context_indicators["insights"].append(insight.id)
 
-    # Format context for the prompt
-    formatted_context = _format_source_context(context_data)
+    # Context formatted for the prompt (cached along with its token count)
+    formatted_context = source_context.text
+
+    history = await window_history(state)
 
     # Build prompt data for the template
     prompt_data = {
@@ -108,69 +96,77 @@ def call_model_with_source_context(
         "insights": [insight.model_dump() for insight in insights] if insights else [],
         "context": formatted_context,
         "context_indicators": context_indicators,
+        "history_summary": history.summary,
     }
 
     # Apply the source_chat prompt template
     system_prompt = Prompter(prompt_template="source_chat").render(data=prompt_data)
-    payload = [SystemMessage(content=system_prompt)] + state.get("messages", [])
-
-    # Handle async model provisioning from sync context
-    def run_in_new_loop():
-        """Run the async function in a new event loop"""
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            return new_loop.run_until_complete(
-                provision_langchain_model(
-                    str(payload),
-                    config.get("configurable", {}).get("model_id")
-                    or state.get("model_override"),
-                    "chat",
-                    max_tokens=8192,
-                )
-            )
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
-
-    try:
-        # Try to get the current event loop
-        asyncio.get_running_loop()
-        # If we're in an event loop, run in a thread with a new loop
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_in_new_loop)
-            model = future.result()
-    except RuntimeError:
-        # No event loop running, safe to use asyncio.run()
-        model = asyncio.run(
-            provision_langchain_model(
-                str(payload),
-                config.get("configurable", {}).get("model_id")
-                or state.get("model_override"),
-                "chat",
-                max_tokens=8192,
-            )
-        )
-
-    ai_message = model.invoke(payload)
+    payload = [SystemMessage(content=system_prompt)] + history.messages
+    # The context's and the messages' tokens are cached: only count the rest
+    payload_tokens = (
+        source_context.token_count
+        + token_count(system_prompt.replace(formatted_context, ""))
+        + history.tokens
+    )
+
+    model = await provision_langchain_model(
+        str(payload),
+        config.get("configurable", {}).get("model_id") or state.get("model_override"),
+        "chat",
+        tokens=payload_tokens,
+        max_tokens=8192,
+    )
+
+    # Passing config lets graph.astream_events emit the tokens as they arrive
+    ai_message = await model.ainvoke(payload, config)
 
     # Clean thinking content from AI response (e.g., <think>...</think> tags)
     content = ai_message.content if isinstance(ai_message.content, str) else str(ai_message.content)
     cleaned_content = clean_thinking_content(content)
     cleaned_message = ai_message.model_copy(update={"content": cleaned_content})
 
-    # Update state with context information
     return {
         "messages": cleaned_message,
-        "source": source,
-        "insights": insights,
-        "context": formatted_context,
         "context_indicators": context_indicators,
+        **history.state_update(),
     }
 
 
+async def load_source_context(source_id: str) -> CachedContext:
+    """
+    Build the source's context and its prompt text, through the context cache.
+
+    A warm turn (source and insights unchanged) skips both the database fetch
+    and the tokenization.
+    """
+    key = context_key(
+        "source_chat",
+        source_id,
+        {"include_insights": True, "include_notes": False},
+        SOURCE_CONTEXT_MAX_TOKENS,
+    )
+    cached = await get_cached_context(key)
+    if cached is not None:
+        return cached
+
+    context_builder = ContextBuilder(
+        source_id=source_id,
+        include_insights=True,
+        include_notes=False,  # Focus on source-specific content
+        max_tokens=SOURCE_CONTEXT_MAX_TOKENS,
+    )
+    context_data = await context_builder.build()
+    text = _format_source_context(context_data)
+    entry = CachedContext(
+        context=context_data,
+        text=text,
+        token_count=token_count(text),
+        versions=context_builder.record_versions,
+    )
+    await put_cached_context(key, source_id, entry)
+    return entry
+
+
 def _format_source_context(context_data: Dict) -> str:
     """
     Format the context data into a readable string for the prompt.
@@ -224,16 +220,19 @@ def _format_source_context(context_data: Dict) -> str:
     return "\n".join(context_parts)
 
 
-# Create SQLite checkpointer
-conn = sqlite3.connect(
-    LANGGRAPH_CHECKPOINT_FILE,
-    check_same_thread=False,
-)
-memory = SqliteSaver(conn)
-
 # Create the StateGraph
 source_chat_state = StateGraph(SourceChatState)
 source_chat_state.add_node("source_chat_agent", call_model_with_source_context)
 source_chat_state.add_edge(START, "source_chat_agent")
 source_chat_state.add_edge("source_chat_agent", END)
-source_chat_graph = source_chat_state.compile(checkpointer=memory)
+
+_graph: Optional[CompiledStateGraph] = None
+
+
+async def get_source_chat_graph() -> CompiledStateGraph:
+    """The source chat graph, compiled against the (lazily opened) async checkpointer."""
+    global _graph
+    checkpointer = await get_checkpointer()
+    if _graph is None or _graph.checkpointer is not checkpointer:
+        _graph = source_chat_state.compile(checkpointer=checkpointer)
+    return _graph
@@ -24,7 +24,7 @@ async def run_transformation(state: dict, config: RunnableConfig) -> dict:
     assert source or content, "No content to transform"
     transformation: Transformation = state["transformation"]
     if not content:
-        content = source.full_text
+        content = await source.get_full_text()
     transformation_template_text = transformation.prompt
     default_prompts: DefaultPrompts = DefaultPrompts(transformation_instructions=None)
     if default_prompts.transformation_instructions:
@@ -7,11 +7,14 @@ To avoid circular imports, import functions directly:
 """
 
 from .text_utils import (
+    ThinkingStreamFilter,
+    batch_chunks,
     clean_thinking_content,
     parse_thinking_content,
     remove_non_ascii,
     remove_non_printable,
     split_text,
+    split_text_with_offsets,
 )
 from .token_utils import token_cost, token_count
 from .version_utils import (
@@ -22,10 +25,13 @@ from .version_utils import (
 
 __all__ = [
     "split_text",
+    "split_text_with_offsets",
+    "batch_chunks",
     "remove_non_ascii",
     "remove_non_printable",
     "parse_thinking_content",
     "clean_thinking_content",
+    "ThinkingStreamFilter",
     "token_count",
     "token_cost",
     "compare_versions",
@@ -6,15 +6,23 @@ and build context from sources, notebooks, insights, and notes.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Literal, Optional
 
 from loguru import logger
 
-from open_notebook.domain.notebook import Note, Notebook, Source
+from open_notebook.domain.notebook import Note, Source, SourceInsight
 from open_notebook.exceptions import DatabaseOperationError, NotFoundError
 
-from .text_utils import token_count
+from .context_loader import LoadedContext, load_context_records
+from .context_packing import (
+    ItemTokens,
+    PackingReport,
+    TokenOffsets,
+    measure_content,
+    pack_items,
+)
+from .text_splitter import tiktoken_offsets
 
 
 @dataclass
@@ -26,12 +34,16 @@ class ContextItem:
     content: Dict[str, Any]
     priority: int = 0
     token_count: Optional[int] = None
+    # Set when the item was cut to fit the token budget
+    truncated: bool = False
+    tokens: Optional[ItemTokens] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         """Calculate token count for the content if not provided."""
         if self.token_count is None:
-            content_str = str(self.content)
-            self.token_count = token_count(content_str)
+            if self.tokens is None:
+                self.tokens = measure_content(self.type, self.content)
+            self.token_count = self.tokens.total
 
 
 @dataclass
@@ -73,6 +85,8 @@ class ContextBuilder:
         - context_config: ContextConfig - Custom context configuration
         - max_tokens: int - Maximum token limit
         - priority_order: List[str] - Custom priority order
+        - token_offsets: Callable - Tokenizer used to count and truncate items
+          (defaults to tiktoken)
         """
         # Store all parameters for flexibility
         self.params = kwargs
@@ -83,6 +97,7 @@ class ContextBuilder:
         self.include_insights: bool = kwargs.get('include_insights', True)
         self.include_notes: bool = kwargs.get('include_notes', True)
         self.max_tokens: Optional[int] = kwargs.get('max_tokens')
+        self.token_offsets: TokenOffsets = kwargs.get('token_offsets', tiktoken_offsets)
 
         # Context configuration
         context_config_arg: Optional[ContextConfig] = kwargs.get('context_config')
@@ -98,6 +113,10 @@ class ContextBuilder:
 
         # Items storage
         self.items: List[ContextItem] = []
+        # What the last truncate_to_fit kept, cut or dropped
+        self.packing_report: Optional[PackingReport] = None
+        # `updated` of every record the last build loaded (context cache stamp)
+        self.record_versions: Dict[str, Any] = {}
 
         logger.debug(f"ContextBuilder initialized with params: {list(kwargs.keys())}")
     
@@ -113,13 +132,19 @@ class ContextBuilder:
             
             # Clear existing items
             self.items = []
+            self.packing_report = None
             
-            # Build context based on parameters
-            if self.source_id:
-                await self._add_source_context(self.source_id)
-            
-            if self.notebook_id:
-                await self._add_notebook_context(self.notebook_id)
+            # Load every selected record in one round trip
+            loaded = await self._load_records()
+            self.record_versions = loaded.versions()
+            for source in loaded.sources:
+                await self._add_source_context(
+                    source,
+                    loaded.levels[source.id or ""],
+                    loaded.source_insights(source.id),
+                )
+            for note in loaded.notes:
+                self._add_note_context(note, loaded.levels[note.id or ""])
             
             # Process any additional custom parameters
             await self._process_custom_params()
@@ -128,8 +153,9 @@ class ContextBuilder:
             self.remove_duplicates()
             self.prioritize()
             
-            if self.max_tokens:
-                self.truncate_to_fit(self.max_tokens)
+            max_tokens = self.max_tokens or self.context_config.max_tokens
+            if max_tokens:
+                self.truncate_to_fit(max_tokens)
             
             # Format and return response
             return self._format_response()
@@ -138,164 +164,121 @@ class ContextBuilder:
             logger.error(f"Error building context: {str(e)}")
             raise DatabaseOperationError(f"Failed to build context: {str(e)}")
     
+    async def _load_records(self) -> LoadedContext:
+        """
+        Collect the sources and notes selected by the parameters and load them
+        (with their insights) in a single query.
+        """
+        sources: Dict[str, str] = {}
+        notes: Dict[str, str] = {}
+        all_notebook_sources = False
+        all_notebook_notes = False
+
+        if self.source_id:
+            sources[self.source_id] = "insights"
+
+        if self.notebook_id:
+            # Sources and notes from context config, or all of the notebook's
+            config_sources = self.context_config.sources
+            if config_sources:
+                sources.update(config_sources)
+            else:
+                all_notebook_sources = True
+
+            if self.include_notes:
+                config_notes = self.context_config.notes
+                if config_notes:
+                    notes.update(config_notes)
+                else:
+                    all_notebook_notes = True
+
+        loaded = await load_context_records(
+            sources,
+            notes,
+            notebook_id=self.notebook_id,
+            all_notebook_sources=all_notebook_sources,
+            all_notebook_notes=all_notebook_notes,
+            default_source_level="insights",
+            default_note_level="full content",
+        )
+        if loaded.notebook_found is False:
+            raise NotFoundError(f"Notebook {self.notebook_id} not found")
+        return loaded
+
     async def _add_source_context(
-        self, 
-        source_id: str, 
-        inclusion_level: str = "insights"
+        self,
+        source: Source,
+        inclusion_level: str = "insights",
+        insights: Optional[List[SourceInsight]] = None,
     ) -> None:
         """
         Add source and its insights to context.
         
         Args:
-            source_id: ID of the source
+            source: Loaded source (full_text only needed for "full content")
             inclusion_level: "insights", "full content", or "not in"
+            insights: The source's insights, already loaded
         """
         if inclusion_level == "not in":
             return
+
+        insights = insights or []
+
+        # Determine context size based on inclusion level
+        context_size: Literal["short", "long"] = "long" if "full content" in inclusion_level else "short"
+        source_context = await source.get_context(
+            context_size=context_size, insights=insights
+        )
+
+        # Add source item
+        priority = (self.context_config.priority_weights or {}).get("source", 100)
+        item = self._make_item(source.id or "", "source", source_context, priority)
+        self.add_item(item)
         
-        try:
-            # Ensure source ID has table prefix
-            full_source_id = (
-                source_id if source_id.startswith("source:")
-                else f"source:{source_id}"
-            )
-            
-            source = await Source.get(full_source_id)
-            if not source:
-                logger.warning(f"Source {source_id} not found")
-                return
-            
-            # Determine context size based on inclusion level
-            context_size: Literal["short", "long"] = "long" if "full content" in inclusion_level else "short"
-            source_context = await source.get_context(context_size=context_size)
-
-            # Add source item
-            priority = (self.context_config.priority_weights or {}).get("source", 100)
-            item = ContextItem(
-                id=source.id or "",
-                type="source",
-                content=source_context,
-                priority=priority
-            )
-            self.add_item(item)
-            
-            # Add insights if requested and available
-            if self.include_insights and "insights" in inclusion_level:
-                insights = await source.get_insights()
-                for insight in insights:
-                    insight_priority = (self.context_config.priority_weights or {}).get("insight", 75)
-                    insight_item = ContextItem(
-                        id=insight.id or "",
-                        type="insight",
-                        content={
-                            "id": insight.id,
-                            "source_id": source.id,
-                            "insight_type": insight.insight_type,
-                            "content": insight.content
-                        },
-                        priority=insight_priority
-                    )
-                    self.add_item(insight_item)
-            
-            logger.debug(f"Added source context for {source_id}")
-            
-        except NotFoundError:
-            logger.warning(f"Source {source_id} not found")
-        except Exception as e:
-            logger.error(f"Error adding source context for {source_id}: {str(e)}")
-            raise
-    
-    async def _add_notebook_context(self, notebook_id: str) -> None:
-        """
-        Add notebook content based on context configuration.
+        # Add insights if requested and available
+        if self.include_insights and "insights" in inclusion_level:
+            for insight in insights:
+                insight_priority = (self.context_config.priority_weights or {}).get("insight", 75)
+                insight_item = self._make_item(
+                    insight.id or "",
+                    "insight",
+                    {
+                        "id": insight.id,
+                        "source_id": source.id,
+                        "insight_type": insight.insight_type,
+                        "content": insight.content
+                    },
+                    insight_priority
+                )
+                self.add_item(insight_item)
         
-        Args:
-            notebook_id: ID of the notebook
-        """
-        try:
-            notebook = await Notebook.get(notebook_id)
-            if not notebook:
-                raise NotFoundError(f"Notebook {notebook_id} not found")
-            
-            # Process sources from context config or get all
-            config_sources = self.context_config.sources
-            if config_sources:
-                for source_id, status in config_sources.items():
-                    await self._add_source_context(source_id, status)
-            else:
-                # Default: get all sources with insights
-                sources = await notebook.get_sources()
-                for source in sources:
-                    if source.id:
-                        await self._add_source_context(source.id, "insights")
-
-            # Process notes from context config or get all
-            if self.include_notes:
-                config_notes = self.context_config.notes
-                if config_notes:
-                    for note_id, status in config_notes.items():
-                        if "not in" not in status:
-                            await self._add_note_context(note_id, status)
-                else:
-                    # Default: get all notes with short content
-                    notes = await notebook.get_notes()
-                    for note in notes:
-                        if note.id:
-                            await self._add_note_context(note.id, "full content")
-            
-            logger.debug(f"Added notebook context for {notebook_id}")
-            
-        except Exception as e:
-            logger.error(f"Error adding notebook context for {notebook_id}: {str(e)}")
-            raise
+        logger.debug(f"Added source context for {source.id}")
     
-    async def _add_note_context(
+    def _add_note_context(
         self, 
-        note_id: str, 
+        note: Note, 
         inclusion_level: str = "full content"
     ) -> None:
         """
         Add note to context.
         
         Args:
-            note_id: ID of the note
+            note: Loaded note
             inclusion_level: "full content" or "not in"
         """
         if inclusion_level == "not in":
             return
         
-        try:
-            # Ensure note ID has table prefix
-            full_note_id = (
-                note_id if note_id.startswith("note:")
-                else f"note:{note_id}"
-            )
-            
-            note = await Note.get(full_note_id)
-            if not note:
-                logger.warning(f"Note {note_id} not found")
-                return
-            
-            # Get note context
-            context_size: Literal["short", "long"] = "long" if "full content" in inclusion_level else "short"
-            note_context = note.get_context(context_size=context_size)
-
-            # Add note item
-            priority = (self.context_config.priority_weights or {}).get("note", 50)
-            item = ContextItem(
-                id=note.id or "",
-                type="note",
-                content=note_context,
-                priority=priority
-            )
-            self.add_item(item)
-            
-            logger.debug(f"Added note context for {note_id}")
-            
-        except NotFoundError:
-            logger.warning(f"Note {note_id} not found")
-        except Exception as e:
-            logger.error(f"Error adding note context for {note_id}: {str(e)}")
+        # Get note context
+        context_size: Literal["short", "long"] = "long" if "full content" in inclusion_level else "short"
+        note_context = note.get_context(context_size=context_size)
+
+        # Add note item
+        priority = (self.context_config.priority_weights or {}).get("note", 50)
+        item = self._make_item(note.id or "", "note", note_context, priority)
+        self.add_item(item)
+        
+        logger.debug(f"Added note context for {note.id}")
     
     async def _process_custom_params(self) -> None:
         """Process any additional custom parameters."""
@@ -306,6 +289,22 @@ class ContextBuilder:
                 logger.debug(f"Processing custom parameter: {key}={value}")
                 # Custom processing logic can be added here
     
+    def _make_item(
+        self,
+        item_id: str,
+        item_type: Literal["source", "note", "insight"],
+        content: Dict[str, Any],
+        priority: int,
+    ) -> ContextItem:
+        """Create a ContextItem, tokenized with the builder's tokenizer."""
+        return ContextItem(
+            id=item_id,
+            type=item_type,
+            content=content,
+            priority=priority,
+            tokens=measure_content(item_type, content, self.token_offsets),
+        )
+    
     def add_item(self, item: ContextItem) -> None:
         """
         Add a ContextItem to the builder.
@@ -323,7 +322,11 @@ class ContextBuilder:
     
     def truncate_to_fit(self, max_tokens: int) -> None:
         """
-        Remove items if total token count exceeds limit.
+        Pack the (prioritized) items into the token limit.
+        
+        Whole items are kept in priority order while they fit; the remaining
+        budget goes to the items that don't, cut at a token boundary. The
+        outcome for every item is kept in packing_report.
         
         Args:
             max_tokens: Maximum allowed tokens
@@ -332,23 +335,20 @@ class ContextBuilder:
             return
         
         total_tokens = sum(item.token_count or 0 for item in self.items)
+        self.items, self.packing_report = pack_items(
+            self.items, max_tokens, self.token_offsets
+        )
         
+        report = self.packing_report
         if total_tokens <= max_tokens:
             logger.debug(f"Token count {total_tokens} within limit {max_tokens}")
             return
         
-        logger.info(f"Truncating from {total_tokens} to {max_tokens} tokens")
-        
-        # Remove items from the end (lowest priority) until under limit
-        current_tokens = total_tokens
-        removed_count = 0
-        
-        while current_tokens > max_tokens and self.items:
-            removed_item = self.items.pop()
-            current_tokens -= (removed_item.token_count or 0)
-            removed_count += 1
-        
-        logger.info(f"Removed {removed_count} items, final token count: {current_tokens}")
+        logger.info(
+            f"Packed {total_tokens} tokens into {report.used_tokens}/{max_tokens}: "
+            f"{report.count('truncated')} items truncated, "
+            f"{report.count('dropped')} dropped"
+        )
     
     def remove_duplicates(self) -> None:
         """Remove duplicate items based on ID."""
@@ -403,7 +403,10 @@ class ContextBuilder:
                     "include_insights": self.include_insights,
                     "include_notes": self.include_notes,
                     "max_tokens": self.max_tokens
-                }
+                },
+                "packing": (
+                    self.packing_report.to_dict() if self.packing_report else None
+                )
             }
         }
         
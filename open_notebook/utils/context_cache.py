@@ -0,0 +1,327 @@
+"""
+Persistent cache of built chat context.
+
+Sources, insights and notes rarely change between chat turns, yet every turn
+used to reload them and re-tokenize the result. Built contexts are stored in
+a local SQLite file keyed by (kind, notebook or source id, context config,
+max_tokens), together with their formatted text and its token count.
+
+Every entry records the `updated` timestamp of each record it was built
+from. A lookup re-reads only those timestamps (one light query, no content)
+and drops the entry when they no longer match. Writes also invalidate
+entries eagerly: saving or deleting a source, note or insight, adding an
+insight and linking or unlinking a source or note from a notebook call
+invalidate_context, which removes every entry that depends on the record.
+
+The file is shared by the API and the worker (WAL mode). When it grows past
+CONTEXT_CACHE_MAX_MB, the least recently used entries are evicted.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+from open_notebook.config import DATA_FOLDER
+from open_notebook.database.repository import ensure_record_id, repo_query
+
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+CONTEXT_CACHE_MAX_MB = float(os.getenv("CONTEXT_CACHE_MAX_MB", "64"))
+CONTEXT_CACHE_FILE = os.path.join(DATA_FOLDER, "sqlite-db", "context_cache.sqlite")
+
+# Evict down to this fraction of the limit, so eviction doesn't run on every write
+_EVICT_TO = 0.9
+
+
+def context_key(kind: str, scope_id: str, config: Any, max_tokens: Optional[int]) -> str:
+    """Cache key of a context built by `kind` for a notebook or source."""
+    raw = json.dumps([kind, scope_id, config, max_tokens], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _stamp_value(value: Any) -> str:
+    # `updated` comes back as a datetime or, for older records, a string
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def version_stamp(versions: Dict[str, Any]) -> str:
+    """Stamp of a set of records from their `updated` timestamps."""
+    lines = sorted(f"{record_id}={_stamp_value(updated)}" for record_id, updated in versions.items())
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedContext:
+    context: Dict[str, Any]
+    text: str
+    token_count: int
+    # record id -> `updated` of every record the context was built from
+    versions: Dict[str, Any] = field(default_factory=dict)
+
+
+class ContextCache:
+    """SQLite-backed key -> built context store with LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._size_estimate: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS context (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    versions TEXT NOT NULL,
+                    context TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    token_count INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS context_dependency (
+                    record_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (record_id, key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_context_last_used ON context (last_used)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_context_dependency_key ON context_dependency (key)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[CachedContext]:
+        """Return the entry for `key`, refreshing its LRU stamp."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT versions, context, text, token_count FROM context WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE context SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+        versions, context, text, tokens = row
+        return CachedContext(
+            context=json.loads(context),
+            text=text,
+            token_count=tokens,
+            versions=json.loads(versions),
+        )
+
+    def put(self, key: str, scope_id: str, entry: CachedContext) -> None:
+        versions = {k: _stamp_value(v) for k, v in entry.versions.items()}
+        context = json.dumps(entry.context, default=str)
+        size = len(context) + len(entry.text)
+        dependencies = {scope_id, *versions}
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM context_dependency WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO context "
+                "(key, version, versions, context, text, token_count, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    version_stamp(versions),
+                    json.dumps(versions),
+                    context,
+                    entry.text,
+                    entry.token_count,
+                    size,
+                    time.time(),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO context_dependency (record_id, key) VALUES (?, ?)",
+                [(record_id, key) for record_id in dependencies],
+            )
+            conn.commit()
+            self.writes += 1
+            if self._size_estimate is None:
+                self._size_estimate = self._total_size(conn)
+            else:
+                self._size_estimate += size
+            if self._size_estimate > self.max_bytes:
+                self._evict(conn)
+
+    def _delete_keys(self, conn: sqlite3.Connection, where: str, params: Iterable) -> int:
+        """Delete the entries (and their dependencies) whose key matches `where`."""
+        params = list(params)
+        deleted = conn.execute(f"DELETE FROM context WHERE key IN ({where})", params).rowcount
+        conn.execute(
+            "DELETE FROM context_dependency WHERE key NOT IN (SELECT key FROM context)"
+        )
+        conn.commit()
+        return deleted
+
+    def discard_stale(self, key: str) -> None:
+        """Drop an entry whose records changed since it was built."""
+        with self._lock:
+            self._delete_keys(self._connection(), "?", [key])
+            self.stale += 1
+
+    def invalidate(self, record_ids: Iterable[str]) -> int:
+        """Drop every entry built from (or scoped to) one of `record_ids`."""
+        ids = list(dict.fromkeys(record_ids))
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            deleted = self._delete_keys(
+                self._connection(),
+                f"SELECT key FROM context_dependency WHERE record_id IN ({placeholders})",
+                ids,
+            )
+            self.invalidations += deleted
+        return deleted
+
+    def _total_size(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM context").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Other processes write too: re-read the real size before evicting
+        total = self._total_size(conn)
+        target = int(self.max_bytes * _EVICT_TO)
+        if total > self.max_bytes:
+            # Least recently used entries until their sizes cover the excess
+            deleted = self._delete_keys(
+                conn,
+                """
+                SELECT key FROM (
+                    SELECT key, size,
+                        SUM(size) OVER (ORDER BY last_used, key) AS running
+                    FROM context
+                ) WHERE running - size < ?
+                """,
+                [total - target],
+            )
+            self.evictions += deleted
+            logger.debug(f"Evicted {deleted} entries from the context cache")
+            total = self._total_size(conn)
+        self._size_estimate = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM context"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": CONTEXT_CACHE_ENABLED,
+            "hits": self.hits - self.stale,
+            "misses": self.misses + self.stale,
+            "stale": self.stale,
+            "hit_rate": (self.hits - self.stale) / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+context_cache = ContextCache(CONTEXT_CACHE_FILE, int(CONTEXT_CACHE_MAX_MB * 1024 * 1024))
+
+
+async def record_versions(record_ids: Iterable[str]) -> Dict[str, Any]:
+    """Current `updated` of each existing record among `record_ids`."""
+    ids = [ensure_record_id(record_id) for record_id in record_ids]
+    if not ids:
+        return {}
+    rows = await repo_query("SELECT id, updated FROM $ids;", {"ids": ids})
+    return {row["id"]: row.get("updated") for row in rows}
+
+
+async def get_cached_context(key: str) -> Optional[CachedContext]:
+    """
+    Return the cached context for `key` if none of its records changed.
+
+    Cache failures are logged and treated as a miss.
+    """
+    if not CONTEXT_CACHE_ENABLED:
+        return None
+    try:
+        entry = await asyncio.to_thread(context_cache.get, key)
+        if entry is None:
+            return None
+        current = await record_versions(entry.versions)
+        if version_stamp(current) != version_stamp(entry.versions):
+            await asyncio.to_thread(context_cache.discard_stale, key)
+            return None
+        return entry
+    except Exception as e:
+        logger.warning(f"Context cache lookup failed: {e}")
+        return None
+
+
+async def put_cached_context(key: str, scope_id: str, entry: CachedContext) -> None:
+    if not CONTEXT_CACHE_ENABLED or not entry.versions:
+        return
+    try:
+        await asyncio.to_thread(context_cache.put, key, scope_id, entry)
+    except Exception as e:
+        logger.warning(f"Context cache write failed: {e}")
+
+
+async def invalidate_context(*record_ids: Optional[str]) -> None:
+    """Drop cached contexts built from, or scoped to, any of `record_ids`."""
+    ids = [str(record_id) for record_id in record_ids if record_id]
+    if not CONTEXT_CACHE_ENABLED or not ids:
+        return
+    try:
+        deleted = await asyncio.to_thread(context_cache.invalidate, ids)
+        if deleted:
+            logger.debug(f"Invalidated {deleted} cached contexts for {ids}")
+    except Exception as e:
+        logger.warning(f"Context cache invalidation failed: {e}")
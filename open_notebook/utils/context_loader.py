@@ -0,0 +1,234 @@
+"""
+Bulk loading of the records that make up a chat context.
+
+Loading a notebook's context one item at a time costs a query per source, two
+more for its insights and one per note. load_context_records fetches the
+selected sources (full_text only for those included with full content), all
+of their insights and the selected notes in a single multi-statement query.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from open_notebook.database.repository import ensure_record_id, repo_query_many
+from open_notebook.domain.notebook import Note, Source, SourceInsight
+
+from .context_cache import (
+    CachedContext,
+    context_key,
+    get_cached_context,
+    put_cached_context,
+)
+from .token_utils import token_count
+
+_LOAD_QUERY = """
+LET $source_ids = IF $notebook_sources {
+    array::union($source_ids, (SELECT VALUE in FROM (
+        SELECT in, in.updated AS updated FROM reference WHERE out = $notebook ORDER BY updated DESC
+    )))
+} ELSE { $source_ids };
+LET $note_ids = IF $notebook_notes {
+    array::union($note_ids, (SELECT VALUE in FROM (
+        SELECT in, in.updated AS updated FROM artifact WHERE out = $notebook ORDER BY updated DESC
+    )))
+} ELSE { $note_ids };
+SELECT VALUE id FROM $notebook;
+SELECT * OMIT full_text FROM $source_ids;
+SELECT * FROM $full_text_ids;
+SELECT * OMIT embedding FROM source_insight
+    WHERE source IN array::union($source_ids, $full_text_ids) ORDER BY created;
+SELECT * OMIT embedding FROM $note_ids;
+"""
+
+
+@dataclass
+class LoadedContext:
+    """Records loaded for a context, in selection order (missing ids skipped)."""
+
+    sources: List[Source] = field(default_factory=list)
+    insights: Dict[str, List[SourceInsight]] = field(default_factory=dict)
+    notes: List[Note] = field(default_factory=list)
+    # Inclusion level of every loaded source and note, by full record id
+    levels: Dict[str, str] = field(default_factory=dict)
+    notebook_found: Optional[bool] = None
+
+    def source_insights(self, source_id: Optional[str]) -> List[SourceInsight]:
+        return self.insights.get(source_id or "", [])
+
+    def versions(self) -> Dict[str, Any]:
+        """`updated` of every loaded record, by id (the context cache stamp)."""
+        insights = [i for items in self.insights.values() for i in items]
+        return {
+            record.id: record.updated
+            for record in [*self.sources, *insights, *self.notes]
+            if record.id
+        }
+
+
+def _full_id(table: str, item_id: str) -> str:
+    return item_id if item_id.startswith(f"{table}:") else f"{table}:{item_id}"
+
+
+async def load_context_records(
+    sources: Optional[Dict[str, str]] = None,
+    notes: Optional[Dict[str, str]] = None,
+    notebook_id: Optional[str] = None,
+    all_notebook_sources: bool = False,
+    all_notebook_notes: bool = False,
+    default_source_level: str = "insights",
+    default_note_level: str = "full content",
+) -> LoadedContext:
+    """
+    Load sources, their insights and notes for a context in one round trip.
+
+    Args:
+        sources: {source_id: inclusion_level}; "not in" entries are skipped.
+        notes: {note_id: inclusion_level}; "not in" entries are skipped.
+        notebook_id: Notebook to check for existence (notebook_found) and to
+            take the all_notebook_* selections from.
+        all_notebook_sources: Also select every source of the notebook (most
+            recently updated first) at default_source_level.
+        all_notebook_notes: Also select every note of the notebook at
+            default_note_level.
+    """
+    requested: Dict[str, str] = {}
+    source_ids: List[str] = []
+    full_text_ids: List[str] = []
+    note_ids: List[str] = []
+
+    for source_id, level in (sources or {}).items():
+        if "not in" in level:
+            continue
+        full_id = _full_id("source", source_id)
+        requested[full_id] = level
+        if "full content" in level:
+            full_text_ids.append(full_id)
+        else:
+            source_ids.append(full_id)
+    for note_id, level in (notes or {}).items():
+        if "not in" in level:
+            continue
+        full_id = _full_id("note", note_id)
+        requested[full_id] = level
+        note_ids.append(full_id)
+
+    notebook_sources = all_notebook_sources and notebook_id is not None
+    notebook_notes = all_notebook_notes and notebook_id is not None
+    _, _, found, short_rows, full_rows, insight_rows, note_rows = await repo_query_many(
+        _LOAD_QUERY,
+        {
+            "notebook": ensure_record_id(notebook_id) if notebook_id else None,
+            "notebook_sources": notebook_sources,
+            "notebook_notes": notebook_notes,
+            "source_ids": [ensure_record_id(i) for i in source_ids],
+            "full_text_ids": [ensure_record_id(i) for i in full_text_ids],
+            "note_ids": [ensure_record_id(i) for i in note_ids],
+        },
+    )
+
+    loaded = LoadedContext()
+    if notebook_id is not None:
+        loaded.notebook_found = bool(found)
+
+    by_id = {row["id"]: row for row in (short_rows or []) + (full_rows or [])}
+    selection = [i for i in requested if i.startswith("source:")]
+    selection += [i for i in by_id if i not in requested]
+    for source_id in selection:
+        if source_id in by_id:
+            loaded.sources.append(Source(**by_id[source_id]))
+            loaded.levels[source_id] = requested.get(source_id, default_source_level)
+
+    for row in insight_rows or []:
+        source_id = str(row.get("source"))
+        loaded.insights.setdefault(source_id, []).append(SourceInsight(**row))
+
+    for row in note_rows or []:
+        loaded.notes.append(Note(**row))
+        loaded.levels[row["id"]] = requested.get(row["id"], default_note_level)
+
+    return loaded
+
+
+async def load_notebook_context_data(
+    notebook_id: str,
+    sources: Optional[Dict[str, str]] = None,
+    notes: Optional[Dict[str, str]] = None,
+) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Source and note context dicts for the notebook context endpoints.
+
+    With a configuration, sources marked "insights" get their short context,
+    sources marked "full content" their long context and notes marked
+    "full content" their long context. Without one, every source and note of
+    the notebook is included with its short context.
+
+    Returns:
+        (source contexts, note contexts, record versions), or None when the
+        notebook doesn't exist.
+    """
+    configured = sources is not None or notes is not None
+    if configured:
+        loaded = await load_context_records(
+            {k: v for k, v in (sources or {}).items() if "insights" in v or "full content" in v},
+            {k: v for k, v in (notes or {}).items() if "full content" in v},
+            notebook_id=notebook_id,
+        )
+    else:
+        loaded = await load_context_records(
+            notebook_id=notebook_id,
+            all_notebook_sources=True,
+            all_notebook_notes=True,
+            default_source_level="insights",
+            default_note_level="short",
+        )
+    if not loaded.notebook_found:
+        return None
+
+    source_contexts = []
+    for source in loaded.sources:
+        level = loaded.levels[source.id or ""]
+        context_size: Literal["short", "long"] = "short" if "insights" in level else "long"
+        source_contexts.append(
+            await source.get_context(
+                context_size=context_size, insights=loaded.source_insights(source.id)
+            )
+        )
+    note_contexts = [
+        note.get_context(
+            context_size="long" if "full content" in loaded.levels[note.id or ""] else "short"
+        )
+        for note in loaded.notes
+    ]
+    return source_contexts, note_contexts, loaded.versions()
+
+
+async def cached_notebook_context(
+    notebook_id: str,
+    sources: Optional[Dict[str, str]] = None,
+    notes: Optional[Dict[str, str]] = None,
+) -> Optional[CachedContext]:
+    """
+    load_notebook_context_data through the context cache.
+
+    The cached context is {"sources": [...], "notes": [...]}; its text is the
+    concatenation the token count is computed on. Returns None when the
+    notebook doesn't exist.
+    """
+    key = context_key("notebook", notebook_id, [sources, notes], None)
+    cached = await get_cached_context(key)
+    if cached is not None:
+        return cached
+
+    data = await load_notebook_context_data(notebook_id, sources, notes)
+    if data is None:
+        return None
+    source_contexts, note_contexts, versions = data
+    text = "".join(str(c) for c in source_contexts + note_contexts)
+    entry = CachedContext(
+        context={"sources": source_contexts, "notes": note_contexts},
+        text=text,
+        token_count=token_count(text) if text else 0,
+        versions=versions,
+    )
+    await put_cached_context(key, notebook_id, entry)
+    return entry
@@ -0,0 +1,189 @@
+"""
+Token-budgeted packing of context items.
+
+Each item is tokenized once, when it is created: its truncatable field (a
+source's full_text, a note's or insight's content) keeps the offsets of its
+tokens, the rest of the item's text is only counted. pack_items fills the
+budget in priority order and, instead of dropping an item that no longer
+fits, cuts its field at a token boundary to use the remaining budget.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from .text_splitter import Offsets, tiktoken_offsets
+
+if TYPE_CHECKING:
+    from .context_builder import ContextItem
+
+TokenOffsets = Callable[[str], Offsets]
+
+# Field cut when an item only partially fits, by item type
+TRUNCATABLE_FIELDS = {"source": "full_text", "note": "content", "insight": "content"}
+TRUNCATION_MARKER = "\n[Content truncated]"
+# A truncated item keeps at least this many tokens of its field, or is dropped
+MIN_TRUNCATED_TOKENS = 32
+
+
+def content_text(value: Any) -> str:
+    """Text of a context value, without the dict and list punctuation of str()."""
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        parts = [content_text(v) for v in value.values()]
+    elif isinstance(value, (list, tuple)):
+        parts = [content_text(v) for v in value]
+    else:
+        return str(value)
+    return "\n".join(part for part in parts if part)
+
+
+@dataclass
+class ItemTokens:
+    """Token measurement of a context item."""
+
+    # Tokens of everything but the truncatable field
+    fixed_tokens: int
+    field: Optional[str] = None
+    text: str = ""
+    offsets: Offsets = ([], [])
+
+    @property
+    def field_tokens(self) -> int:
+        return len(self.offsets[0])
+
+    @property
+    def total(self) -> int:
+        return self.fixed_tokens + self.field_tokens
+
+
+def measure_content(
+    item_type: str,
+    content: Dict[str, Any],
+    token_offsets: TokenOffsets = tiktoken_offsets,
+) -> ItemTokens:
+    name = TRUNCATABLE_FIELDS.get(item_type)
+    text = content.get(name) if name else None
+    if not isinstance(text, str) or not text:
+        name, text = None, ""
+    rest = {k: v for k, v in content.items() if k != name}
+    return ItemTokens(
+        fixed_tokens=len(token_offsets(content_text(rest))[0]),
+        field=name,
+        text=text,
+        offsets=token_offsets(text),
+    )
+
+
+@dataclass
+class PackedItem:
+    id: str
+    type: str
+    priority: int
+    status: Literal["included", "truncated", "dropped"]
+    # Tokens the item takes in the packed context (0 when dropped)
+    tokens: int
+    original_tokens: int
+
+
+@dataclass
+class PackingReport:
+    """What pack_items kept, cut or dropped, in priority order."""
+
+    max_tokens: int
+    used_tokens: int = 0
+    items: List[PackedItem] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for item in self.items if item.status == status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "included": self.count("included"),
+            "truncated": self.count("truncated"),
+            "dropped": self.count("dropped"),
+        }
+
+
+def _truncate(
+    item: ContextItem,
+    budget: int,
+    token_offsets: TokenOffsets,
+    marker_tokens: int,
+) -> Optional[ContextItem]:
+    """Copy of item with its field cut to fit budget tokens, or None."""
+    tokens = item.tokens or measure_content(item.type, item.content, token_offsets)
+    if tokens.field is None:
+        return None
+    keep = min(budget - tokens.fixed_tokens - marker_tokens, tokens.field_tokens)
+    while keep >= MIN_TRUNCATED_TOKENS:
+        text = tokens.text[: tokens.offsets[1][keep - 1]] + TRUNCATION_MARKER
+        # Re-count: the cut text may not tokenize exactly like the prefix did
+        text_tokens = len(token_offsets(text)[0])
+        overshoot = tokens.fixed_tokens + text_tokens - budget
+        if overshoot <= 0:
+            return replace(
+                item,
+                content={**item.content, tokens.field: text},
+                token_count=tokens.fixed_tokens + text_tokens,
+                tokens=None,
+                truncated=True,
+            )
+        keep -= overshoot
+    return None
+
+
+def pack_items(
+    items: List[ContextItem],
+    max_tokens: int,
+    token_offsets: TokenOffsets = tiktoken_offsets,
+) -> Tuple[List[ContextItem], PackingReport]:
+    """
+    Pack items, sorted by priority, into max_tokens.
+
+    Whole items are taken greedily in priority order, so a large item that
+    doesn't fit no longer pushes out the smaller ones after it. The remaining
+    budget then goes to the items that didn't fit, highest priority first,
+    truncated at a token boundary.
+
+    Returns:
+        The kept items in their original order and the packing report.
+    """
+    remaining = max_tokens
+    packed: Dict[int, ContextItem] = {}
+    overflow = []
+    for index, item in enumerate(items):
+        cost = item.token_count or 0
+        if cost <= remaining:
+            packed[index] = item
+            remaining -= cost
+        else:
+            overflow.append(index)
+
+    marker_tokens = len(token_offsets(TRUNCATION_MARKER)[0])
+    for index in overflow:
+        if remaining - marker_tokens < MIN_TRUNCATED_TOKENS:
+            break
+        truncated = _truncate(items[index], remaining, token_offsets, marker_tokens)
+        if truncated is not None:
+            packed[index] = truncated
+            remaining -= truncated.token_count or 0
+
+    report = PackingReport(max_tokens=max_tokens, used_tokens=max_tokens - remaining)
+    for index, item in enumerate(items):
+        kept = packed.get(index)
+        status = "dropped" if kept is None else "truncated" if kept.truncated else "included"
+        report.items.append(
+            PackedItem(
+                id=item.id,
+                type=item.type,
+                priority=item.priority,
+                status=status,
+                tokens=(kept.token_count or 0) if kept else 0,
+                original_tokens=item.token_count or 0,
+            )
+        )
+    return [packed[index] for index in sorted(packed)], report
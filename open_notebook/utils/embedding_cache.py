@@ -0,0 +1,246 @@
+"""
+Persistent embedding cache.
+
+Embeddings are stored in a local SQLite file keyed by (embedding model,
+SHA-256 of the text), so re-saving an unchanged note, re-vectorizing a source
+or rebuilding embeddings only calls the provider for text it hasn't seen with
+that model. The model key is "provider/model_name": the vector space is what
+matters, not which model record points at it.
+
+The file is shared by the API and the worker (WAL mode). When it grows past
+EMBEDDING_CACHE_MAX_MB, the least recently used entries are evicted.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from open_notebook.config import DATA_FOLDER
+
+EMBEDDING_CACHE_ENABLED = (
+    os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+)
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+EMBEDDING_CACHE_FILE = os.path.join(DATA_FOLDER, "sqlite-db", "embedding_cache.sqlite")
+
+# Evict down to this fraction of the limit, so eviction doesn't run on every write
+_EVICT_TO = 0.9
+# SQLite caps the number of host parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def model_key(model: Any) -> str:
+    """Cache namespace of an Esperanto embedding model."""
+    provider = getattr(model, "provider", None) or type(model).__name__
+    try:
+        name = model.get_model_name()
+    except Exception:
+        name = getattr(model, "model_name", None)
+    return f"{provider}/{name}"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed (model, text hash) -> vector store with LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._size_estimate: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding (
+                    model TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, hash)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embedding_last_used ON embedding (last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors among `hashes`, refreshing their LRU stamp."""
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start : start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embedding WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for hash_, blob in rows:
+                    found[hash_] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embedding SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, hash_) for hash_ in found],
+                )
+                conn.commit()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, Sequence[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        added = 0
+        for hash_, vector in items.items():
+            blob = array("f", vector).tobytes()
+            rows.append((model, hash_, blob, len(blob), now))
+            added += len(blob)
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding (model, hash, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            self.writes += len(rows)
+            if self._size_estimate is None:
+                self._size_estimate = self._total_size(conn)
+            else:
+                self._size_estimate += added
+            if self._size_estimate > self.max_bytes:
+                self._evict(conn)
+
+    def _total_size(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Other processes write too: re-read the real size before evicting
+        total = self._total_size(conn)
+        target = int(self.max_bytes * _EVICT_TO)
+        if total > self.max_bytes:
+            excess = total - target
+            # Least recently used entries until their sizes cover the excess
+            deleted = conn.execute(
+                """
+                DELETE FROM embedding WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, size,
+                            SUM(size) OVER (ORDER BY last_used, rowid) AS running
+                        FROM embedding
+                    ) WHERE running - size < ?
+                )
+                """,
+                (excess,),
+            ).rowcount
+            conn.commit()
+            self.evictions += deleted
+            logger.debug(f"Evicted {deleted} entries from the embedding cache")
+            total = self._total_size(conn)
+        self._size_estimate = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embedding"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": EMBEDDING_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+embedding_cache = EmbeddingCache(
+    EMBEDDING_CACHE_FILE, int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+)
+
+
+async def cached_embed(model: Any, texts: List[str]) -> List[List[float]]:
+    """
+    Embed `texts` with `model`, calling the provider only for cache misses.
+
+    Vectors are returned in input order; duplicate texts are embedded once.
+    Cache failures are logged and fall through to the provider.
+    """
+    if not texts:
+        return []
+    if not EMBEDDING_CACHE_ENABLED:
+        return await model.aembed(texts)
+
+    key = model_key(model)
+    hashes = [text_hash(text) for text in texts]
+    try:
+        found = await asyncio.to_thread(embedding_cache.get_many, key, hashes)
+    except Exception as e:
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        found = {}
+
+    missing: Dict[str, str] = {}
+    for hash_, text in zip(hashes, texts):
+        if hash_ not in found:
+            missing.setdefault(hash_, text)
+
+    if missing:
+        vectors = await model.aembed(list(missing.values()))
+        if len(vectors) != len(missing):
+            raise ValueError(
+                f"Embedding model returned {len(vectors)} vectors for {len(missing)} texts"
+            )
+        # Round-trip through float32 like cached vectors, so results don't
+        # depend on whether the text was cached
+        fresh = {
+            hash_: array("f", vector).tolist()
+            for hash_, vector in zip(missing.keys(), vectors)
+        }
+        found.update(fresh)
+        try:
+            await asyncio.to_thread(embedding_cache.put_many, key, fresh)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    return [found[hash_] for hash_ in hashes]
@@ -0,0 +1,241 @@
+"""
+Token-aware recursive text splitter that encodes the document once.
+
+Follows the rules of langchain's RecursiveCharacterTextSplitter (separator
+hierarchy, separators kept at the start of the following piece, chunk size
+and overlap measured in tokens, whitespace stripped) but works on character
+spans of the original text. The document is tokenized a single time; the
+length of any span is the number of document tokens overlapping it, found by
+binary search over the token offsets, instead of re-encoding every candidate
+fragment. Chunks carry their start/end character offsets.
+
+Token counts come from the whole-document encoding, so a span's length can
+differ by a token or so at its edges from encoding the fragment on its own.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from .token_utils import TOKEN_ENCODING
+
+DEFAULT_SEPARATORS = [
+    "\n\n",
+    "\n",
+    ".",
+    ",",
+    " ",
+    "\u200b",  # Zero-width space
+    "\uff0c",  # Fullwidth comma
+    "\u3001",  # Ideographic comma
+    "\uff0e",  # Fullwidth full stop
+    "\u3002",  # Ideographic full stop
+    "",
+]
+
+_WORD = re.compile(r"\S+")
+_WIDE_CHAR = re.compile(r"[^\x00-\x7f]")
+
+Span = Tuple[int, int]
+Offsets = Tuple[List[int], List[int]]
+
+
+@dataclass
+class TextChunk:
+    text: str
+    start: int
+    end: int
+
+
+def tiktoken_offsets(text: str) -> Offsets:
+    """Character (starts, ends) of every token of `text`."""
+    try:
+        import tiktoken
+    except ImportError:
+        # Same fallback as token_count: estimate with whitespace-separated words
+        return word_offsets(text)
+    encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+    tokens = encoding.encode(text, disallowed_special=())
+    sizes = _token_sizes(TOKEN_ENCODING)
+    byte_starts = list(accumulate(map(sizes.__getitem__, tokens), initial=0))[:-1]
+    if text.isascii():
+        starts = byte_starts
+    else:
+        starts = _char_starts(text, byte_starts)
+    # Tokens are contiguous: each one ends where the next starts
+    return starts, starts[1:] + [len(text)] if starts else []
+
+
+@lru_cache(maxsize=None)
+def _token_sizes(encoding_name: str) -> List[int]:
+    """Byte length of every token id of an encoding (0 for unused ids)."""
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    sizes = [0] * encoding.n_vocab
+    for token in range(encoding.n_vocab):
+        try:
+            sizes[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            pass
+    return sizes
+
+
+def _char_starts(text: str, byte_starts: List[int]) -> List[int]:
+    """
+    Convert UTF-8 byte offsets into character offsets of `text`.
+
+    Walks the multi-byte characters alongside the offsets, subtracting their
+    extra bytes. An offset inside a character maps to that character, as in
+    tiktoken's decode_with_offsets.
+    """
+    starts = []
+    extra = 0
+    wide = _WIDE_CHAR.finditer(text)
+    char = next(wide, None)
+    for byte in byte_starts:
+        while char is not None:
+            char_byte = char.start() + extra
+            size = len(char.group().encode("utf-8"))
+            if byte >= char_byte + size:
+                extra += size - 1
+                char = next(wide, None)
+                continue
+            if byte > char_byte:
+                byte = char_byte
+            break
+        starts.append(byte - extra)
+    return starts
+
+
+def word_offsets(text: str) -> Offsets:
+    """Character (starts, ends) of whitespace-separated words, one token each."""
+    matches = list(_WORD.finditer(text))
+    return [m.start() for m in matches], [m.end() for m in matches]
+
+
+class TokenOffsetSplitter:
+    """Recursive splitter measuring spans against one document encoding."""
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 75,
+        separators: Optional[Sequence[str]] = None,
+        token_offsets: Callable[[str], Offsets] = tiktoken_offsets,
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Chunk overlap ({chunk_overlap}) is larger than chunk size ({chunk_size})"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators if separators is not None else DEFAULT_SEPARATORS)
+        self.token_offsets = token_offsets
+
+    def split(self, text: str) -> List[TextChunk]:
+        if not text:
+            return []
+        self._text = text
+        # Token i covers [starts[i], ends[i]); both lists are sorted
+        self._starts, self._ends = self.token_offsets(text)
+        try:
+            spans = self._split_span((0, len(text)), self.separators)
+            return [TextChunk(text[start:end], start, end) for start, end in spans]
+        finally:
+            del self._text, self._starts, self._ends
+
+    def _length(self, span: Span) -> int:
+        start, end = span
+        if start >= end:
+            return 0
+        return bisect_left(self._starts, end) - bisect_right(self._ends, start)
+
+    def _pieces(self, span: Span, separator: str) -> List[Span]:
+        """Split a span at each occurrence of separator, keeping the separator
+        at the start of the following piece; empty pieces are dropped."""
+        start, end = span
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+        bounds = [start]
+        position = self._text.find(separator, start, end)
+        while position != -1:
+            bounds.append(position)
+            position = self._text.find(separator, position + len(separator), end)
+        bounds.append(end)
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+    def _strip(self, span: Span) -> Optional[Span]:
+        start, end = span
+        while start < end and self._text[start].isspace():
+            start += 1
+        while end > start and self._text[end - 1].isspace():
+            end -= 1
+        return (start, end) if start < end else None
+
+    def _split_span(self, span: Span, separators: List[str]) -> List[Span]:
+        separator = separators[-1]
+        remaining: List[str] = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if self._text.find(candidate, span[0], span[1]) != -1:
+                separator = candidate
+                remaining = separators[i + 1 :]
+                break
+
+        chunks: List[Span] = []
+        good: List[Span] = []
+        for piece in self._pieces(span, separator):
+            if self._length(piece) < self.chunk_size:
+                good.append(piece)
+                continue
+            if good:
+                chunks.extend(self._merge(good))
+                good = []
+            if remaining:
+                chunks.extend(self._split_span(piece, remaining))
+            else:
+                chunks.append(piece)
+        if good:
+            chunks.extend(self._merge(good))
+        return chunks
+
+    def _merge(self, pieces: List[Span]) -> List[Span]:
+        """Combine adjacent pieces into chunks of up to chunk_size tokens, each
+        starting with up to chunk_overlap tokens of the previous one."""
+        chunks: List[Span] = []
+        current: List[Span] = []
+        lengths: List[int] = []
+        total = 0
+        for piece in pieces:
+            length = self._length(piece)
+            if total + length > self.chunk_size:
+                if total > self.chunk_size:
+                    logger.warning(
+                        f"Created a chunk of size {total}, which is longer than "
+                        f"the specified {self.chunk_size}"
+                    )
+                if current:
+                    chunk = self._strip((current[0][0], current[-1][1]))
+                    if chunk:
+                        chunks.append(chunk)
+                    while total > self.chunk_overlap or (
+                        total + length > self.chunk_size and total > 0
+                    ):
+                        total -= lengths.pop(0)
+                        current.pop(0)
+            current.append(piece)
+            lengths.append(length)
+            total += length
+        if current:
+            chunk = self._strip((current[0][0], current[-1][1]))
+            if chunk:
+                chunks.append(chunk)
+        return chunks
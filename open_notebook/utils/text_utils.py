@@ -5,10 +5,9 @@ Extracted from main utils to avoid circular imports.
 
 import re
 import unicodedata
-from typing import Tuple
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import Callable, List, Tuple
 
+from .text_splitter import TextChunk, TokenOffsetSplitter
 from .token_utils import token_count
 
 # Patterns for matching thinking content in AI responses
@@ -18,6 +17,23 @@ THINK_PATTERN = re.compile(r"<think>(.*?)</think>", re.DOTALL)
 THINK_PATTERN_NO_OPEN = re.compile(r"^(.*?)</think>", re.DOTALL)
 
 
+def split_text_with_offsets(txt: str, chunk_size=500) -> List[TextChunk]:
+    """
+    Split the input text into chunks, keeping each chunk's character offsets.
+
+    The text is tokenized once; chunk size and overlap are measured in tokens.
+
+    Args:
+        txt (str): The input text to be split.
+        chunk_size (int): The size of each chunk in tokens. Default is 500.
+
+    Returns:
+        list: TextChunk objects with text, start and end (txt[start:end] == text).
+    """
+    overlap = int(chunk_size * 0.15)
+    return TokenOffsetSplitter(chunk_size=chunk_size, chunk_overlap=overlap).split(txt)
+
+
 def split_text(txt: str, chunk_size=500):
     """
     Split the input text into chunks.
@@ -29,26 +45,46 @@ def split_text(txt: str, chunk_size=500):
     Returns:
         list: A list of text chunks.
     """
-    overlap = int(chunk_size * 0.15)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=overlap,
-        length_function=token_count,
-        separators=[
-            "\n\n",
-            "\n",
-            ".",
-            ",",
-            " ",
-            "\u200b",  # Zero-width space
-            "\uff0c",  # Fullwidth comma
-            "\u3001",  # Ideographic comma
-            "\uff0e",  # Fullwidth full stop
-            "\u3002",  # Ideographic full stop
-            "",
-        ],
-    )
-    return text_splitter.split_text(txt)
+    return [chunk.text for chunk in split_text_with_offsets(txt, chunk_size)]
+
+
+def batch_chunks(
+    chunks: List[str],
+    max_texts: int = 32,
+    max_tokens: int = 16000,
+    length_function: Callable[[str], int] = token_count,
+) -> List[List[str]]:
+    """
+    Group consecutive chunks into batches for a single embedding call.
+
+    A batch is closed when adding the next chunk would exceed either max_texts
+    entries or max_tokens tokens. A chunk larger than max_tokens on its own still
+    gets a batch of its own.
+
+    Args:
+        chunks (List[str]): Chunks in document order.
+        max_texts (int): Maximum number of texts per batch.
+        max_tokens (int): Maximum total tokens per batch.
+        length_function (Callable): Function used to measure each chunk.
+
+    Returns:
+        List[List[str]]: Batches preserving the original chunk order.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for chunk in chunks:
+        tokens = length_function(chunk)
+        if current and (
+            len(current) >= max_texts or current_tokens + tokens > max_tokens
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
 
 
 def remove_non_ascii(text: str) -> str:
@@ -154,3 +190,63 @@ def clean_thinking_content(content: str) -> str:
     """
     _, cleaned_content = parse_thinking_content(content)
     return cleaned_content
+
+
+def _partial_tag_suffix(text: str, tag: str) -> int:
+    """Length of the longest suffix of text that is a proper prefix of tag."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkingStreamFilter:
+    """
+    Remove <think>...</think> blocks from a stream of tokens.
+
+    feed() returns the visible text a token adds. Thinking text is dropped and
+    a tag split across tokens is held back until it is complete. Output that
+    only closes the tag (no opening <think>) can't be detected while
+    streaming; clean_thinking_content on the final message handles it.
+
+    Example:
+        >>> stream = ThinkingStreamFilter()
+        >>> [stream.feed(t) for t in ["<thi", "nk>hmm</think>Hel", "lo"]]
+        ["", "Hel", "lo"]
+    """
+
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._thinking = False
+
+    def feed(self, token: str) -> str:
+        self._buffer += token
+        visible = []
+        while self._buffer:
+            if self._thinking:
+                end = self._buffer.find(self.CLOSE)
+                if end == -1:
+                    keep = _partial_tag_suffix(self._buffer, self.CLOSE)
+                    self._buffer = self._buffer[len(self._buffer) - keep :]
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE) :]
+                self._thinking = False
+            else:
+                start = self._buffer.find(self.OPEN)
+                if start == -1:
+                    keep = _partial_tag_suffix(self._buffer, self.OPEN)
+                    visible.append(self._buffer[: len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep :]
+                    break
+                visible.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN) :]
+                self._thinking = True
+        return "".join(visible)
+
+    def flush(self) -> str:
+        """Visible text still held back at the end of the stream."""
+        rest = "" if self._thinking else self._buffer
+        self._buffer = ""
+        return rest
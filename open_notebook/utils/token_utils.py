@@ -11,6 +11,8 @@ from open_notebook.config import TIKTOKEN_CACHE_DIR
 # tokenizer encodings are cached persistently in the data folder
 os.environ["TIKTOKEN_CACHE_DIR"] = TIKTOKEN_CACHE_DIR
 
+TOKEN_ENCODING = "o200k_base"
+
 
 def token_count(input_string: str) -> int:
     """
@@ -24,7 +26,7 @@ def token_count(input_string: str) -> int:
     """
     try:
         import tiktoken
-        encoding = tiktoken.get_encoding("o200k_base")
+        encoding = tiktoken.get_encoding(TOKEN_ENCODING)
         tokens = encoding.encode(input_string)
         return len(tokens)
     except ImportError:
@@ -5,13 +5,22 @@ This test suite focuses on validation logic, business rules, and data structures
 that can be tested without database mocking.
 """
 
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
+from esperanto import EmbeddingModel
 from pydantic import ValidationError
 
 from open_notebook.domain.base import RecordModel
 from open_notebook.domain.content_settings import ContentSettings
-from open_notebook.domain.models import ModelManager
-from open_notebook.domain.notebook import Note, Notebook, Source
+from open_notebook.domain.models import DefaultModels, Model, ModelManager
+from open_notebook.domain.notebook import (
+    Note,
+    Notebook,
+    Source,
+    hybrid_search_many,
+    reciprocal_rank_fusion,
+)
 from open_notebook.domain.podcast import EpisodeProfile, SpeakerProfile
 from open_notebook.domain.transformation import Transformation
 from open_notebook.exceptions import InvalidInputError
@@ -64,6 +73,42 @@ class TestModelManager:
         assert manager1 is not manager2
         assert id(manager1) != id(manager2)
 
+    @pytest.mark.asyncio
+    async def test_models_are_cached_until_invalidated(self):
+        """Test defaults, records and provider clients are reused and invalidated."""
+        defaults = DefaultModels.model_construct(default_embedding_model="model:emb")
+        record = Model(id="model:emb", name="text-embedding-3-small", provider="openai", type="embedding")
+        with (
+            patch.object(DefaultModels, "get_instance", AsyncMock(return_value=defaults)) as get_defaults,
+            patch.object(Model, "get", AsyncMock(return_value=record)) as get_record,
+            patch("open_notebook.domain.models.AIFactory.create_embedding") as create,
+        ):
+            create.side_effect = lambda **kw: MagicMock(spec=EmbeddingModel)
+            manager = ModelManager(ttl=60)
+
+            first = await manager.get_embedding_model()
+            assert await manager.get_embedding_model() is first
+            assert await manager.get_model("model:emb", timeout=5) is not first
+            assert (get_defaults.await_count, get_record.await_count, create.call_count) == (1, 1, 2)
+
+            stats = manager.stats()
+            assert stats["defaults"] == {"hits": 1, "misses": 1}
+            assert stats["instances"]["hits"] == 1 and stats["instances"]["size"] == 2
+
+            manager.invalidate("model:emb")
+            assert await manager.get_embedding_model() is not first
+            assert (get_defaults.await_count, get_record.await_count) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self):
+        """Test cached entries are refetched once the TTL has passed."""
+        defaults = DefaultModels.model_construct(default_embedding_model=None)
+        with patch.object(DefaultModels, "get_instance", AsyncMock(return_value=defaults)) as get_defaults:
+            manager = ModelManager(ttl=0)
+            await manager.get_defaults()
+            await manager.get_defaults()
+            assert get_defaults.await_count == 2
+
 
 # ============================================================================
 # TEST SUITE 3: Notebook Domain Logic
@@ -304,5 +349,179 @@ class TestEpisodeProfile:
         assert profile.num_segments == 5
 
 
+# ============================================================================
+# TEST SUITE 10: Hybrid Search Fusion
+# ============================================================================
+
+
+class TestReciprocalRankFusion:
+    """Test suite for reciprocal_rank_fusion."""
+
+    text = [
+        {"id": "source_embedding:1", "parent_id": "source:a", "title": "A", "matches": ["`ai` text"], "relevance": 3.0},
+        {"id": "note:n", "parent_id": "note:n", "title": "N", "matches": ["note"], "relevance": 2.0},
+        {"id": "source_embedding:2", "parent_id": "source:a", "title": "A", "matches": ["more"], "relevance": 1.0},
+    ]
+    vector = [
+        {"id": "source:b", "parent_id": "source:b", "title": "B", "matches": ["b"], "similarity": 0.9},
+        {"id": "note:n", "parent_id": "note:n", "title": "N", "matches": ["note"], "similarity": 0.8},
+        {"id": "source:a", "parent_id": "source:a", "title": "A", "matches": ["vec"], "similarity": 0.7},
+    ]
+
+    def test_results_are_fused_and_deduplicated(self):
+        """Test parents appearing in both rankings win and appear once."""
+        results = reciprocal_rank_fusion([(self.text, 1.0), (self.vector, 1.0)], 10, k=60)
+
+        assert [r["parent_id"] for r in results] == ["source:a", "note:n", "source:b"]
+        top = results[0]
+        assert top["final_score"] == pytest.approx(1 / 61 + 1 / 63)
+        assert top["matches"] == ["`ai` text", "more", "vec"]
+        assert top["relevance"] == 3.0 and top["similarity"] == 0.7
+
+    def test_weights_and_limit(self):
+        """Test weights shift the ranking and the limit is applied after fusion."""
+        results = reciprocal_rank_fusion([(self.text, 0.0), (self.vector, 1.0)], 2, k=60)
+        assert [r["parent_id"] for r in results] == ["source:b", "note:n"]
+
+    @pytest.mark.asyncio
+    async def test_vector_candidates_stay_within_the_index(self):
+        """Test hybrid search asks the vector search for no more than the index serves."""
+        with (
+            patch("open_notebook.domain.notebook.text_search", new_callable=AsyncMock) as text,
+            patch(
+                "open_notebook.domain.notebook.vector_search_many", new_callable=AsyncMock
+            ) as vector,
+        ):
+            text.return_value = self.text
+            vector.return_value = [self.vector]
+            await hybrid_search_many(["ai"], 100)
+
+        assert text.call_args.args[1] == 200
+        assert vector.call_args.args[1] == 100
+
+
+# ============================================================================
+# TEST SUITE 11: Partial Saves
+# ============================================================================
+
+
+class TestPartialSave:
+    """Test suite for dirty-field tracking in ObjectModel.save."""
+
+    @pytest.fixture
+    def repo(self):
+        with (
+            patch("open_notebook.domain.base.repo_query", new_callable=AsyncMock) as query,
+            patch("open_notebook.domain.base.repo_update", new_callable=AsyncMock) as update,
+            patch("open_notebook.domain.base.invalidate_context", new_callable=AsyncMock),
+            patch("open_notebook.domain.base.prepare_vector_write", new_callable=AsyncMock),
+            patch("open_notebook.domain.base.vector_store.record_vectors", new_callable=AsyncMock),
+            patch("open_notebook.domain.base.cached_embed", new_callable=AsyncMock) as embed,
+            patch(
+                "open_notebook.domain.models.model_manager.get_embedding_model",
+                new_callable=AsyncMock,
+            ),
+        ):
+            embed.return_value = [[0.1, 0.2]]
+            yield query, update, embed
+
+    @pytest.mark.asyncio
+    async def test_only_changed_fields_are_sent(self, repo):
+        """Test updating a source's command doesn't resend its full text."""
+        query, update, embed = repo
+        query.return_value = [
+            {"id": "source:1", "title": "T", "full_text": "x" * 10_000, "topics": []}
+        ]
+        source = await Source.get("source:1")
+        assert source.dirty_fields() == set()
+
+        source.command = "command:abc"
+        assert source.dirty_fields() == {"command"}
+        await source.save()
+
+        data = update.call_args.args[2]
+        assert set(data) == {"command", "updated"}
+        assert update.call_args.kwargs["returning"] == "NONE"
+        assert source.dirty_fields() == set()
+
+        # Saving again only bumps the timestamp
+        await source.save()
+        assert set(update.call_args.args[2]) == {"updated"}
+
+    @pytest.mark.asyncio
+    async def test_unchanged_content_is_not_reembedded(self, repo):
+        """Test a note is only embedded again when its content changes."""
+        query, update, embed = repo
+        query.return_value = [
+            {"id": "note:1", "title": "T", "content": "hello", "embedding": [0.3, 0.4]}
+        ]
+        note = await Note.get("note:1")
+
+        note.title = "Renamed"
+        await note.save()
+        embed.assert_not_called()
+        assert set(update.call_args.args[2]) == {"title", "updated"}
+
+        note.content = "hello again"
+        await note.save()
+        embed.assert_called_once()
+        assert update.call_args.args[2]["embedding"] == [0.1, 0.2]
+
+        await note.save()
+        embed.assert_called_once()
+        await note.save(reembed=True)
+        assert embed.call_count == 2
+
+
+# ============================================================================
+# TEST SUITE 12: Field Projection
+# ============================================================================
+
+
+class TestFieldProjection:
+    """Test suite for projected loads and lazy full_text."""
+
+    @pytest.mark.asyncio
+    async def test_omitted_full_text_loads_on_first_access(self):
+        """Test full_text is left out of the load and fetched once when needed."""
+        with patch(
+            "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+        ) as query:
+            query.return_value = [{"id": "source:1", "title": "T"}]
+            source = await Source.get("source:1", omit=["full_text"])
+            assert query.call_args.args[0] == "SELECT * OMIT full_text FROM $id"
+            assert source.full_text is None
+
+            query.return_value = [{"full_text": "the text"}]
+            assert await source.get_full_text() == "the text"
+            assert await source.get_full_text() == "the text"
+            assert query.call_count == 2
+            assert query.call_args.args[0] == "SELECT full_text FROM $id"
+            # Loading it doesn't make it dirty
+            assert source.dirty_fields() == set()
+
+    @pytest.mark.asyncio
+    async def test_fields_projection(self):
+        """Test fields selects the id plus the listed columns only."""
+        with patch(
+            "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+        ) as query:
+            query.return_value = [{"id": "note:1", "title": "T"}]
+            notes = await Note.get_all(order_by="updated desc", fields=["title"])
+            assert (
+                query.call_args.args[0]
+                == "SELECT id, title FROM note ORDER BY updated desc"
+            )
+            assert notes[0].title == "T" and notes[0].content is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_projection_is_rejected(self):
+        """Test field names are checked before being put in the query."""
+        with pytest.raises(InvalidInputError):
+            await Source.get("source:1", omit=["full_text; DELETE source"])
+        with pytest.raises(InvalidInputError):
+            await Source.get("source:1", fields=["title"], omit=["full_text"])
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
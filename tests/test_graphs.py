@@ -154,5 +154,504 @@ class TestTransformationGraph:
         assert hasattr(transformation_graph, "ainvoke")
 
 
+
+# ============================================================================
+# TEST SUITE 4: Chat Checkpointer
+# ============================================================================
+
+
+def echo_graph(checkpointer):
+    """One-node message graph that answers every turn."""
+    from langchain_core.messages import AIMessage
+    from langgraph.graph import END, START, MessagesState, StateGraph
+
+    def answer(state):
+        return {"messages": AIMessage(content=f"turn {len(state['messages'])}")}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+async def checkpoint_count(checkpointer, thread_id):
+    async with checkpointer.conn.execute(
+        "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (thread_id,)
+    ) as cur:
+        return (await cur.fetchone())[0]
+
+
+class TestChatCheckpointer:
+    """Test suite for checkpoint pruning, deletion and compaction."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_last_checkpoints_and_full_history(self, tmp_path):
+        from open_notebook.graphs.checkpointer import open_checkpointer
+
+        checkpointer = await open_checkpointer(str(tmp_path / "cp.sqlite"), keep_last=3)
+        try:
+            graph = echo_graph(checkpointer)
+            config = {"configurable": {"thread_id": "chat_session:a"}}
+            for turn in range(5):
+                await graph.ainvoke({"messages": [("user", f"q{turn}")]}, config)
+
+            assert await checkpoint_count(checkpointer, "chat_session:a") == 3
+            state = await graph.aget_state(config)
+            assert len(state.values["messages"]) == 10
+            stats = await checkpointer.stats()
+            assert stats["pruned"] > 0
+            assert stats["writes"]["count"] > 0
+        finally:
+            await checkpointer.conn.close()
+
+    @pytest.mark.asyncio
+    async def test_delete_and_compact(self, tmp_path, monkeypatch):
+        from open_notebook.graphs import checkpointer as module
+
+        checkpointer = await module.open_checkpointer(
+            str(tmp_path / "cp.sqlite"), keep_last=50
+        )
+        monkeypatch.setattr(module, "_checkpointer", checkpointer)
+        try:
+            graph = echo_graph(checkpointer)
+            for thread_id in ["abc", "chat_session:def"]:
+                for turn in range(3):
+                    await graph.ainvoke(
+                        {"messages": [("user", "hi")]},
+                        {"configurable": {"thread_id": thread_id}},
+                    )
+
+            # Deleting a session removes its thread, whichever id form it used
+            await module.delete_chat_checkpoints("chat_session:abc")
+            assert await checkpoint_count(checkpointer, "abc") == 0
+
+            checkpointer.keep_last = 2
+            result = await checkpointer.compact()
+            assert result["pruned"] > 0
+            assert await checkpoint_count(checkpointer, "chat_session:def") == 2
+            state = await graph.aget_state(
+                {"configurable": {"thread_id": "chat_session:def"}}
+            )
+            assert len(state.values["messages"]) == 6
+        finally:
+            await checkpointer.conn.close()
+
+    @pytest.mark.asyncio
+    async def test_migration_drops_source_chat_context(self, tmp_path):
+        from typing import Annotated, Optional
+
+        import aiosqlite
+        from langchain_core.messages import AIMessage
+        from langgraph.graph import END, START, StateGraph
+        from langgraph.graph.message import add_messages
+        from typing_extensions import TypedDict
+
+        from open_notebook.graphs.checkpointer import (
+            ChatCheckpointer,
+            open_checkpointer,
+        )
+
+        class FatState(TypedDict):
+            messages: Annotated[list, add_messages]
+            source_id: Optional[str]
+            context: Optional[str]
+
+        def answer(state):
+            if state.get("source_id"):
+                return {"messages": AIMessage(content="ok"), "context": "x" * 5000}
+            return {"messages": AIMessage(content="ok")}
+
+        builder = StateGraph(FatState)
+        builder.add_node("answer", answer)
+        builder.add_edge(START, "answer")
+        builder.add_edge("answer", END)
+
+        path = str(tmp_path / "cp.sqlite")
+        # A checkpoint file written before the format version existed
+        old = ChatCheckpointer(await aiosqlite.connect(path), path)
+        graph = builder.compile(checkpointer=old)
+        source = {"configurable": {"thread_id": "source-chat"}}
+        notebook = {"configurable": {"thread_id": "notebook-chat"}}
+        await graph.ainvoke({"messages": [("user", "hi")], "source_id": "source:a"}, source)
+        await graph.ainvoke({"messages": [("user", "hi")], "context": "notes"}, notebook)
+        await old.conn.close()
+
+        checkpointer = await open_checkpointer(path)
+        try:
+            graph = builder.compile(checkpointer=checkpointer)
+            state = (await graph.aget_state(source)).values
+            assert "context" not in state
+            assert state["source_id"] == "source:a"
+            assert len(state["messages"]) == 2
+            # Only source chat threads are touched
+            assert (await graph.aget_state(notebook)).values["context"] == "notes"
+            # The migration runs once
+            assert await checkpointer.migrate() == 0
+        finally:
+            await checkpointer.conn.close()
+
+
+# ============================================================================
+# TEST SUITE 5: Chat History Windowing
+# ============================================================================
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count words instead of tiktoken tokens, recording what was counted."""
+    from open_notebook.graphs import history
+
+    counted = []
+
+    def count(text):
+        counted.append(text)
+        return len(text.split())
+
+    monkeypatch.setattr(history, "token_count", count)
+    monkeypatch.setattr(history, "_message_token_cache", history.OrderedDict())
+    return counted
+
+
+def conversation(turns, words=10):
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"q{turn} " + "w " * words, id=f"h{turn}"))
+        messages.append(AIMessage(content=f"a{turn} " + "w " * words, id=f"a{turn}"))
+    return messages
+
+
+class TestChatHistory:
+    """Test suite for history windowing and rolling summaries."""
+
+    def test_window_folds_to_half_at_turn_boundary(self, word_tokens):
+        from open_notebook.graphs.history import window_start
+
+        messages = conversation(10)
+        assert window_start(messages, 0, max_turns=10, max_tokens=1000) == 0
+
+        messages = conversation(12)
+        start = window_start(messages, 0, max_turns=10, max_tokens=1000)
+        assert start == 14  # the last 5 turns
+        assert messages[start].type == "human"
+
+        # The token limit applies too; the last turn is always kept
+        assert window_start(messages, 0, max_turns=50, max_tokens=30) == 22
+
+    @pytest.mark.asyncio
+    async def test_summary_rolls_forward(self, word_tokens):
+        from open_notebook.graphs.history import window_history
+
+        calls = []
+
+        async def summarize(summary, messages):
+            calls.append((summary, [m.id for m in messages]))
+            return f"{summary or ''}+{len(messages)}"
+
+        state = {"messages": conversation(12)}
+        window = await window_history(state, summarize, max_turns=10, max_tokens=1000)
+        assert calls == [(None, [m.id for m in state["messages"][:14]])]
+        assert window.state_update() == {
+            "history_summary": "+14",
+            "history_summarized": 14,
+        }
+        assert [m.id for m in window.messages][0] == "h7"
+
+        # The next turn fits again: no new summary, cached token counts
+        state = {"messages": conversation(13), **window.state_update()}
+        word_tokens.clear()
+        window = await window_history(state, summarize, max_turns=10, max_tokens=1000)
+        assert len(calls) == 1
+        assert window.summary == "+14" and window.state_update() == {}
+        assert len(word_tokens) == 2  # only the new turn was tokenized
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_still_windows(self, word_tokens):
+        from open_notebook.graphs.history import window_history
+
+        async def summarize(summary, messages):
+            raise RuntimeError("model unavailable")
+
+        window = await window_history(
+            {"messages": conversation(12)}, summarize, max_turns=10, max_tokens=1000
+        )
+        assert window.state_update() == {}
+        assert len(window.messages) == 10
+
+
+# ============================================================================
+# TEST SUITE 6: Ask Graph Retrieval
+# ============================================================================
+
+
+class TestAskRetrieval:
+    """Test suite for batched and speculative retrieval in the ask graph."""
+
+    @pytest.mark.asyncio
+    async def test_searches_are_batched_and_question_is_reused(self, monkeypatch):
+        import asyncio
+        import json
+
+        from langchain_core.language_models.fake_chat_models import (
+            GenericFakeChatModel,
+        )
+        from langchain_core.messages import AIMessage
+
+        from open_notebook.graphs import ask
+
+        question = "What is deep learning?"
+        searches = []
+        before_strategy = []
+
+        async def search_terms(terms, config):
+            searches.append(list(terms))
+            return [[{"id": f"note:{i}", "matches": [term]}] for i, term in enumerate(terms)]
+
+        async def provision(content, model_id, default_type, **kwargs):
+            if model_id == "strategy":
+                await asyncio.sleep(0)
+                before_strategy.extend(searches)
+                response = json.dumps(
+                    {
+                        "reasoning": "r",
+                        "searches": [
+                            {"term": "deep learning", "instructions": "i"},
+                            {"term": "neural networks", "instructions": "i"},
+                            {"term": "what is  deep learning?", "instructions": "i"},
+                        ],
+                    }
+                )
+            else:
+                response = "answer"
+            return GenericFakeChatModel(messages=iter([AIMessage(content=response)]))
+
+        monkeypatch.setattr(ask, "search_terms", search_terms)
+        monkeypatch.setattr(ask, "provision_langchain_model", provision)
+
+        result = await ask.graph.ainvoke(
+            {"question": question},
+            {"configurable": {"strategy_model": "strategy"}},
+        )
+        # The question was searched while the strategy was being written
+        assert before_strategy == [[question]]
+        # The other terms in one batch; the question's results were reused
+        assert searches == [[question], ["deep learning", "neural networks"]]
+        assert len(result["answers"]) == 3
+        assert result["final_answer"] == "answer"
+
+    @pytest.mark.asyncio
+    async def test_empty_searches_fall_back_to_question_results(self, monkeypatch):
+        from open_notebook.graphs import ask
+
+        question_hits = [{"id": "note:q", "matches": ["question"]}]
+
+        async def search_terms(terms, config):
+            return [[{"id": "note:t", "matches": [t]}] if t == "found" else [] for t in terms]
+
+        monkeypatch.setattr(ask, "search_terms", search_terms)
+        state = {
+            "question": "What is deep learning?",
+            "strategy": ask.Strategy(
+                reasoning="r",
+                searches=[
+                    ask.Search(term="found", instructions="i"),
+                    ask.Search(term="missing", instructions="i"),
+                    ask.Search(term="also missing", instructions="i"),
+                ],
+            ),
+            "question_results": question_hits,
+        }
+
+        result = await ask.retrieve(state, {})
+
+        # Only the first empty search gets them: one answer call, not one per term
+        assert result["search_results"] == {
+            "found": [{"id": "note:t", "matches": ["found"]}],
+            "missing": question_hits,
+            "also missing": [],
+        }
+
+        # A planned search for the question itself already uses them
+        state["strategy"].searches.insert(
+            0, ask.Search(term="what is deep learning?", instructions="i")
+        )
+        result = await ask.retrieve(state, {})
+        assert result["search_results"]["what is deep learning?"] == question_hits
+        assert result["search_results"]["missing"] == []
+
+    @pytest.mark.asyncio
+    async def test_fast_mode_single_answer_call(self, monkeypatch):
+        from functools import partial
+
+        from langchain_core.language_models.fake_chat_models import (
+            GenericFakeChatModel,
+        )
+        from langchain_core.messages import AIMessage
+
+        from open_notebook.graphs import ask
+        from open_notebook.utils.text_splitter import word_offsets
+
+        searches = []
+        model_calls = []
+
+        async def search_terms(terms, config, results=10):
+            searches.append((list(terms), results))
+            return [[{"id": "source:1", "title": "t", "matches": ["deep nets"]}]]
+
+        async def provision(content, model_id, default_type, **kwargs):
+            model_calls.append(model_id)
+            return GenericFakeChatModel(messages=iter([AIMessage(content="fast")]))
+
+        monkeypatch.setattr(ask, "search_terms", search_terms)
+        monkeypatch.setattr(ask, "provision_langchain_model", provision)
+        monkeypatch.setattr(
+            ask, "pack_results", partial(ask.pack_results, token_offsets=word_offsets)
+        )
+
+        result = await ask.fast_graph.ainvoke(
+            {"question": "What is deep learning?"},
+            {"configurable": {"final_answer_model": "final"}},
+        )
+        assert searches == [(["What is deep learning?"], ask.FAST_ASK_RESULTS)]
+        assert model_calls == ["final"]
+        assert result["final_answer"] == "fast"
+        assert result["results"][0]["id"] == "source:1"
+
+    def test_pack_results_truncates_to_budget(self):
+        from open_notebook.graphs.ask import pack_results
+        from open_notebook.utils.text_splitter import word_offsets
+
+        hits = [
+            {"id": f"source:{i}", "title": f"s{i}", "matches": ["word " * 100]}
+            for i in range(3)
+        ]
+        packed, report = pack_results(hits, 150, word_offsets)
+        # The best hit fits whole, the next is cut down and the last dropped
+        assert [item["id"] for item in packed] == ["source:0", "source:1"]
+        assert [item.status for item in report.items] == [
+            "included",
+            "truncated",
+            "dropped",
+        ]
+        assert report.used_tokens <= 150
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+# ============================================================================
+# TEST SUITE 7: Chat Streaming
+# ============================================================================
+
+
+def stub_chat_model(content):
+    """A provision_langchain_model stand-in whose model streams `content` word by word."""
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    async def provision(content_, model_id, default_type, **kwargs):
+        return GenericFakeChatModel(messages=iter([AIMessage(content=content)]))
+
+    return provision
+
+
+def parse_events(chunks):
+    import json
+
+    assert all(c.startswith("data: ") and c.endswith("\n\n") for c in chunks)
+    return [json.loads(c[len("data: "):]) for c in chunks]
+
+
+class TestChatStreaming:
+    """Test suite for the SSE event order of the streaming chat endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_chat_stream_event_order(self, word_tokens, monkeypatch):
+        from langchain_core.messages import HumanMessage
+        from langgraph.checkpoint.memory import MemorySaver
+
+        from api.routers import chat as chat_router
+        from open_notebook.graphs import chat
+
+        graph = chat.agent_state.compile(checkpointer=MemorySaver())
+
+        async def get_graph():
+            return graph
+
+        class Session:
+            saved = 0
+
+            async def save(self):
+                self.saved += 1
+
+        monkeypatch.setattr(
+            chat,
+            "provision_langchain_model",
+            stub_chat_model("<think>plan</think>Hello there world"),
+        )
+        monkeypatch.setattr(chat, "token_count", lambda text: len(text.split()))
+        monkeypatch.setattr(chat_router, "get_chat_graph", get_graph)
+
+        session = Session()
+        events = parse_events(
+            [
+                chunk
+                async for chunk in chat_router.stream_chat_response(
+                    session,
+                    {"messages": [HumanMessage(content="hi")], "context": None},
+                    {"configurable": {"thread_id": "t"}},
+                )
+            ]
+        )
+
+        types = [e["type"] for e in events]
+        assert types[-2:] == ["ai_message", "complete"]
+        assert set(types[:-2]) == {"ai_token"}
+        # Thinking is filtered from the tokens and the final message alike
+        assert "".join(e["content"] for e in events[:-2]) == "Hello there world"
+        assert events[-2]["content"] == "Hello there world"
+        assert session.saved == 1
+
+    @pytest.mark.asyncio
+    async def test_source_chat_stream_event_order(self, word_tokens, monkeypatch):
+        from langgraph.checkpoint.memory import MemorySaver
+
+        from api.routers import source_chat as source_chat_router
+        from open_notebook.graphs import source_chat
+        from open_notebook.utils.context_cache import CachedContext
+
+        graph = source_chat.source_chat_state.compile(checkpointer=MemorySaver())
+
+        async def get_graph():
+            return graph
+
+        async def load_source_context(source_id):
+            return CachedContext(context={}, text="", token_count=0)
+
+        monkeypatch.setattr(
+            source_chat,
+            "provision_langchain_model",
+            stub_chat_model("<think>plan</think>Hello there world"),
+        )
+        monkeypatch.setattr(source_chat, "token_count", lambda text: len(text.split()))
+        monkeypatch.setattr(source_chat, "load_source_context", load_source_context)
+        monkeypatch.setattr(source_chat_router, "get_source_chat_graph", get_graph)
+
+        events = parse_events(
+            [
+                chunk
+                async for chunk in source_chat_router.stream_source_chat_response(
+                    "chat_session:s", "source:s", "hi"
+                )
+            ]
+        )
+
+        types = [e["type"] for e in events]
+        assert types[0] == "user_message"
+        assert types[-3:] == ["ai_message", "context_indicators", "complete"]
+        assert set(types[1:-3]) == {"ai_token"}
+        assert "".join(e["content"] for e in events[1:-3]) == "Hello there world"
+        assert events[-3]["content"] == "Hello there world"
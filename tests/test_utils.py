@@ -8,6 +8,8 @@ without heavy mocking - string processing, validation, and algorithms.
 import pytest
 
 from open_notebook.utils import (
+    ThinkingStreamFilter,
+    batch_chunks,
     clean_thinking_content,
     compare_versions,
     get_installed_version,
@@ -17,7 +19,24 @@ from open_notebook.utils import (
     split_text,
     token_count,
 )
-from open_notebook.utils.context_builder import ContextBuilder, ContextConfig
+from open_notebook.utils import embedding_cache as embedding_cache_module
+from open_notebook.utils.context_builder import (
+    ContextBuilder,
+    ContextConfig,
+    ContextItem,
+)
+from open_notebook.utils.context_packing import (
+    TRUNCATION_MARKER,
+    measure_content,
+    pack_items,
+)
+from open_notebook.utils.embedding_cache import EmbeddingCache, cached_embed
+from open_notebook.utils.text_splitter import (
+    DEFAULT_SEPARATORS,
+    TokenOffsetSplitter,
+    _char_starts,
+    word_offsets,
+)
 
 # ============================================================================
 # TEST SUITE 1: Text Utilities
@@ -32,6 +51,73 @@ class TestTextUtilities:
         assert split_text("") == []
         assert split_text("short") == ["short"]
 
+    def test_batch_chunks_respects_limits(self):
+        """Test chunks are grouped by count and token limits, in order."""
+        chunks = ["aaaa", "bb", "cccccc", "d", "ee"]
+
+        by_count = batch_chunks(chunks, max_texts=2, max_tokens=100, length_function=len)
+        assert by_count == [["aaaa", "bb"], ["cccccc", "d"], ["ee"]]
+
+        by_tokens = batch_chunks(chunks, max_texts=10, max_tokens=7, length_function=len)
+        assert by_tokens == [["aaaa", "bb"], ["cccccc", "d"], ["ee"]]
+        assert sum(by_tokens, []) == chunks
+
+    def test_batch_chunks_oversized_chunk(self):
+        """Test a chunk larger than the token budget gets its own batch."""
+        assert batch_chunks(["x" * 50, "y"], max_tokens=10, length_function=len) == [
+            ["x" * 50],
+            ["y"],
+        ]
+        assert batch_chunks([], length_function=len) == []
+
+    def test_token_offset_splitter_matches_recursive_splitter(self):
+        """Test the encode-once splitter produces the same chunks as langchain's."""
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        text = (
+            "First paragraph. It has two sentences, and a comma.\n\n"
+            "Second paragraph is a little longer than the first one, "
+            "so it will need to be split somewhere in the middle.\n"
+            "A new line follows. "
+            + "word " * 40
+            + "\n\nx" + "y" * 30 + " end。全角，标点、测试"
+        )
+        for chunk_size in (3, 8, 20):
+            overlap = int(chunk_size * 0.15) + 1
+            expected = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=overlap,
+                length_function=lambda s: len(s.split()),
+                separators=DEFAULT_SEPARATORS,
+            ).split_text(text)
+            chunks = TokenOffsetSplitter(
+                chunk_size, overlap, token_offsets=word_offsets
+            ).split(text)
+
+            assert [chunk.text for chunk in chunks] == expected
+            assert all(text[c.start : c.end] == c.text for c in chunks)
+
+    def test_token_offset_splitter_offsets(self):
+        """Test chunks respect the size limit and carry increasing offsets."""
+        text = "\n\n".join(f"Sentence number {i} is here." for i in range(30))
+        chunks = TokenOffsetSplitter(12, 3, token_offsets=word_offsets).split(text)
+
+        assert len(chunks) > 1
+        assert all(len(c.text.split()) <= 12 for c in chunks)
+        assert [c.start for c in chunks] == sorted(c.start for c in chunks)
+        # Consecutive chunks overlap but every character is covered
+        assert chunks[0].start == 0 and chunks[-1].end == len(text)
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current.start <= previous.end + 2
+        assert TokenOffsetSplitter(12, 3, token_offsets=word_offsets).split("") == []
+
+    def test_char_starts_from_byte_offsets(self):
+        """Test UTF-8 byte offsets map to character offsets."""
+        text = "aé日b"  # bytes: a=0, é=1-2, 日=3-5, b=6
+        assert _char_starts(text, [0, 1, 3, 6]) == [0, 1, 2, 3]
+        # An offset inside a character maps to that character
+        assert _char_starts(text, [0, 2, 4, 5, 6]) == [0, 1, 2, 2, 3]
+
     def test_remove_non_ascii(self):
         """Test removal of non-ASCII characters."""
         # Text with various non-ASCII characters
@@ -75,6 +161,15 @@ class TestTextUtilities:
         assert thinking == "This is my thinking"
         assert cleaned == "Here is my answer"
 
+    def test_thinking_stream_filter(self):
+        """Test thinking blocks are removed from streamed tokens, split tags included."""
+        stream = ThinkingStreamFilter()
+        tokens = ["<thi", "nk>Let me ", "think</th", "ink>Here", " is <", "b>my</b> answer"]
+
+        visible = [stream.feed(token) for token in tokens] + [stream.flush()]
+
+        assert visible == ["", "", "", "Here", " is ", "<b>my</b> answer", ""]
+
     def test_parse_thinking_content_multiple_tags(self):
         """Test parsing multiple thinking blocks."""
         content = "<think>First thought</think>Answer<think>Second thought</think>More"
@@ -262,5 +357,133 @@ class TestContextBuilder:
         assert builder.include_insights is False
 
 
+# ============================================================================
+# TEST SUITE 5: Embedding Cache
+# ============================================================================
+
+
+class FakeEmbeddingModel:
+    """Embedding model that records which texts reach the provider."""
+
+    def __init__(self, provider="openai", name="text-embedding-3-small"):
+        self.provider = provider
+        self.name = name
+        self.calls = []
+
+    def get_model_name(self):
+        return self.name
+
+    async def aembed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_bytes=10_000)
+    monkeypatch.setattr(embedding_cache_module, "embedding_cache", cache)
+    monkeypatch.setattr(embedding_cache_module, "EMBEDDING_CACHE_ENABLED", True)
+    yield cache
+    cache.close()
+
+
+class TestEmbeddingCache:
+    """Test suite for the embedding cache."""
+
+    @pytest.mark.asyncio
+    async def test_only_misses_reach_the_provider(self, cache):
+        """Test cached texts are served locally and duplicates embedded once."""
+        model = FakeEmbeddingModel()
+
+        first = await cached_embed(model, ["alpha", "beta", "alpha"])
+        second = await cached_embed(model, ["beta", "gamma"])
+
+        assert model.calls == [["alpha", "beta"], ["gamma"]]
+        assert first == [[5.0, 1.0, 0.5], [4.0, 1.0, 0.5], [5.0, 1.0, 0.5]]
+        assert second[0] == first[1]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 4, 3)
+
+    @pytest.mark.asyncio
+    async def test_entries_are_per_model(self, cache):
+        """Test another model never gets vectors cached for a different one."""
+        await cached_embed(FakeEmbeddingModel(name="small"), ["text"])
+        other = FakeEmbeddingModel(name="large")
+        await cached_embed(other, ["text"])
+        assert other.calls == [["text"]]
+
+    def test_least_recently_used_entries_are_evicted(self, cache):
+        """Test the cache shrinks below its limit, dropping the oldest entries."""
+        vector = [0.0] * 250  # 1000 bytes as float32
+        for i in range(12):
+            cache.put_many("m", {f"h{i}": vector})
+
+        stats = cache.stats()
+        assert stats["size_bytes"] <= 10_000
+        assert stats["evictions"] > 0
+        assert "h11" in cache.get_many("m", ["h11"])
+        assert cache.get_many("m", ["h1"]) == {}
+
+
+
+# ============================================================================
+# TEST SUITE 6: Context Packing
+# ============================================================================
+
+
+def word_item(item_id, item_type, content, priority):
+    """ContextItem measured in whitespace-separated words."""
+    return ContextItem(
+        id=item_id,
+        type=item_type,
+        content=content,
+        priority=priority,
+        tokens=measure_content(item_type, content, word_offsets),
+    )
+
+
+class TestContextPacking:
+    """Test suite for token-budgeted context packing."""
+
+    def test_item_tokens_exclude_dict_punctuation(self):
+        """Test an item is counted on its text, not on the dict repr."""
+        item = word_item("note:1", "note", {"id": "note:1", "title": "T", "content": "a b c"}, 50)
+        assert item.token_count == 5
+
+    def test_large_source_is_truncated_not_dropped(self):
+        """Test the budget is filled and the oversized item is cut to fit."""
+        full_text = " ".join(f"w{i}" for i in range(1000))
+        items = [
+            word_item("source:big", "source", {"id": "source:big", "title": "Big", "full_text": full_text}, 100),
+            word_item("source_insight:1", "insight", {"id": "source_insight:1", "content": "short insight"}, 75),
+            word_item("note:1", "note", {"id": "note:1", "content": "a small note"}, 50),
+        ]
+
+        packed, report = pack_items(items, 200, word_offsets)
+
+        assert [item.id for item in packed] == ["source:big", "source_insight:1", "note:1"]
+        assert [item.status for item in report.items] == ["truncated", "included", "included"]
+        assert report.used_tokens == sum(item.token_count for item in packed) == 200
+        source = packed[0]
+        assert source.truncated
+        assert source.content["full_text"].endswith(TRUNCATION_MARKER)
+        assert full_text.startswith(source.content["full_text"][: -len(TRUNCATION_MARKER)])
+        assert report.items[0].original_tokens == 1002
+
+    def test_items_without_room_are_dropped(self):
+        """Test items are dropped when too little budget is left to cut them."""
+        items = [
+            word_item("note:1", "note", {"id": "note:1", "content": " ".join(["x"] * 50)}, 50),
+            word_item("note:2", "note", {"id": "note:2", "content": " ".join(["y"] * 50)}, 50),
+        ]
+
+        packed, report = pack_items(items, 60, word_offsets)
+
+        assert [item.id for item in packed] == ["note:1"]
+        assert report.to_dict()["dropped"] == 1
+        assert report.items[1].tokens == 0
+        assert report.used_tokens == 51
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])